@@ -34,7 +34,14 @@ logger = logging.getLogger("elasticsearch")
 logger.addHandler(logging.NullHandler())
 
 from .client import Elasticsearch
-from .connection import Connection, RequestsHttpConnection, Urllib3HttpConnection
+from .connection import (
+    Connection,
+    HttpxHttpConnection,
+    RawResponse,
+    RequestsHttpConnection,
+    StdlibHttpConnection,
+    Urllib3HttpConnection,
+)
 from .connection_pool import ConnectionPool, ConnectionSelector, RoundRobinSelector
 from .exceptions import (
     AuthenticationException,
@@ -47,6 +54,7 @@ from .exceptions import (
     ElasticsearchWarning,
     ImproperlyConfigured,
     NotFoundError,
+    PoolTimeout,
     RequestError,
     SerializationError,
     SSLError,
@@ -67,8 +75,11 @@ __all__ = [
     "RoundRobinSelector",
     "JSONSerializer",
     "Connection",
+    "HttpxHttpConnection",
     "RequestsHttpConnection",
+    "StdlibHttpConnection",
     "Urllib3HttpConnection",
+    "RawResponse",
     "ImproperlyConfigured",
     "ElasticsearchException",
     "SerializationError",
@@ -79,6 +90,7 @@ __all__ = [
     "ConnectionError",
     "SSLError",
     "ConnectionTimeout",
+    "PoolTimeout",
     "AuthenticationException",
     "AuthorizationException",
     "ElasticsearchWarning",
@@ -91,12 +103,21 @@ try:
         raise ImportError
 
     from ._async.client import AsyncElasticsearch
-    from ._async.http_aiohttp import AIOHttpConnection, AsyncConnection
+    from ._async.http_aiohttp import (
+        AIOHttpConnection,
+        AsyncConnection,
+        AsyncRawResponse,
+    )
+    from ._async.http_httpx import AsyncHttpxHttpConnection
+    from ._async.http_stdlib import AsyncStdlibHttpConnection
     from ._async.transport import AsyncTransport
 
     __all__ += [
         "AIOHttpConnection",
         "AsyncConnection",
+        "AsyncRawResponse",
+        "AsyncHttpxHttpConnection",
+        "AsyncStdlibHttpConnection",
         "AsyncTransport",
         "AsyncElasticsearch",
     ]
@@ -20,7 +20,10 @@ from typing import Tuple
 
 from .client import Elasticsearch as Elasticsearch
 from .connection import Connection as Connection
+from .connection import HttpxHttpConnection as HttpxHttpConnection
+from .connection import RawResponse as RawResponse
 from .connection import RequestsHttpConnection as RequestsHttpConnection
+from .connection import StdlibHttpConnection as StdlibHttpConnection
 from .connection import Urllib3HttpConnection as Urllib3HttpConnection
 from .connection_pool import ConnectionPool as ConnectionPool
 from .connection_pool import ConnectionSelector as ConnectionSelector
@@ -36,6 +39,7 @@ from .exceptions import (
 from .exceptions import ElasticsearchException as ElasticsearchException
 from .exceptions import ImproperlyConfigured as ImproperlyConfigured
 from .exceptions import NotFoundError as NotFoundError
+from .exceptions import PoolTimeout as PoolTimeout
 from .exceptions import RequestError as RequestError
 from .exceptions import SerializationError as SerializationError
 from .exceptions import SSLError as SSLError
@@ -49,6 +53,11 @@ try:
 
     from ._async.client import AsyncElasticsearch as AsyncElasticsearch
     from ._async.http_aiohttp import AIOHttpConnection as AIOHttpConnection
+    from ._async.http_aiohttp import AsyncRawResponse as AsyncRawResponse
+    from ._async.http_httpx import AsyncHttpxHttpConnection as AsyncHttpxHttpConnection
+    from ._async.http_stdlib import (
+        AsyncStdlibHttpConnection as AsyncStdlibHttpConnection,
+    )
     from ._async.transport import AsyncTransport as AsyncTransport
 except (ImportError, SyntaxError):
     pass
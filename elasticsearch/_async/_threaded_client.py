@@ -0,0 +1,117 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+import threading
+
+import httpx
+
+from ..connection.http_httpx import _with_unix_socket
+from ..exceptions import ConnectionError
+
+# seconds given to the AsyncClient to close its connections
+_CLOSE_TIMEOUT = 5.0
+
+
+def to_async_stream(content):
+    """
+    Returns ``content`` in a form accepted by an ``httpx.AsyncClient``, which
+    only streams asynchronous iterables.
+    """
+    if content is None or isinstance(content, (bytes, str)):
+        return content
+    if hasattr(content, "__aiter__"):
+        return content
+
+    async def stream():
+        for chunk in content:
+            yield chunk
+
+    return stream()
+
+
+class ThreadedHttpxClient(object):
+    """
+    Synchronous facade over an ``httpx.AsyncClient`` running on an event loop
+    in a background thread. The synchronous HTTP/2 implementation of httpx
+    can open streams out of order when several threads share a connection,
+    which servers reject, while its async implementation can't.
+
+    :meth:`close` stops accepting requests right away, the requests in flight
+    finish first and the last one to end closes the client.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs = _with_unix_socket(kwargs, httpx.AsyncHTTPTransport)
+        self._client = httpx.AsyncClient(**kwargs)
+        self.headers = self._client.headers
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="elasticsearch-httpx"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+        self._closed = False
+        # futures of the requests in flight, waited for by close()
+        self._lock = threading.Lock()
+        self._futures = set()
+
+    def _submit(self, coroutine):
+        with self._lock:
+            if self._closed:
+                coroutine.close()
+                raise ConnectionError(
+                    "N/A", "The client is closed.", RuntimeError("closed")
+                )
+            future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+            self._futures.add(future)
+        return future
+
+    def _run(self, coroutine):
+        future = self._submit(coroutine)
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                self._futures.discard(future)
+                last = self._closed and not self._futures
+            if last:
+                self._shutdown()
+
+    def request(self, method, url, content=None, **kwargs):
+        content = to_async_stream(content)
+        return self._run(self._client.request(method, url, content=content, **kwargs))
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._futures:
+                # closed by the last request in flight
+                return
+        self._shutdown()
+
+    def _shutdown(self):
+        closing = asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop)
+        try:
+            closing.result(timeout=_CLOSE_TIMEOUT)
+        except Exception:
+            closing.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
@@ -0,0 +1,50 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, AsyncIterable, Coroutine, Optional, Set, TypeVar, Union
+
+import httpx
+
+_T = TypeVar("_T")
+
+_CLOSE_TIMEOUT: float
+
+def to_async_stream(
+    content: Any,
+) -> Optional[Union[bytes, str, AsyncIterable[Any]]]: ...
+
+class ThreadedHttpxClient(object):
+    headers: httpx.Headers
+    _client: httpx.AsyncClient
+    _loop: asyncio.AbstractEventLoop
+    _thread: threading.Thread
+    _closed: bool
+    _lock: threading.Lock
+    _futures: Set[concurrent.futures.Future[Any]]
+    def __init__(self, **kwargs: Any) -> None: ...
+    def _submit(
+        self, coroutine: Coroutine[Any, Any, _T]
+    ) -> concurrent.futures.Future[_T]: ...
+    def _run(self, coroutine: Coroutine[Any, Any, _T]) -> _T: ...
+    def request(
+        self, method: str, url: str, content: Any = ..., **kwargs: Any
+    ) -> httpx.Response: ...
+    def close(self) -> None: ...
+    def _shutdown(self) -> None: ...
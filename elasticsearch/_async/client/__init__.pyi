@@ -115,6 +115,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -131,6 +134,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -158,6 +164,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -188,6 +197,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -216,6 +228,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -234,6 +249,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -266,6 +284,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -293,6 +314,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -343,6 +367,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -361,6 +388,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -380,6 +410,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -408,6 +441,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -436,6 +472,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -467,6 +506,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -490,6 +532,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -518,6 +563,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -536,6 +584,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -563,6 +614,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -589,6 +643,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -614,6 +671,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -635,6 +695,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -657,6 +720,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -682,6 +748,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -700,6 +769,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -718,6 +790,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -735,6 +810,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -755,6 +833,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -816,6 +897,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -839,6 +923,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -871,6 +958,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -889,6 +979,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -905,6 +998,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -921,6 +1017,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -944,6 +1043,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -974,6 +1076,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -1005,6 +1110,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -1035,6 +1143,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -1087,6 +1198,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -1104,6 +1218,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -1126,6 +1243,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -1144,6 +1264,9 @@ class AsyncElasticsearch(object):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -30,6 +30,9 @@ class AsyncSearchClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -50,6 +53,9 @@ class AsyncSearchClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -109,6 +115,9 @@ class AsyncSearchClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -126,6 +135,9 @@ class AsyncSearchClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
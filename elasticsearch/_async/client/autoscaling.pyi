@@ -30,6 +30,9 @@ class AutoscalingClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -48,6 +51,9 @@ class AutoscalingClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -65,6 +71,9 @@ class AutoscalingClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -81,6 +90,9 @@ class AutoscalingClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
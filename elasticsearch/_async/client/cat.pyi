@@ -36,6 +36,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -60,6 +63,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -81,6 +87,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -103,6 +112,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -121,6 +133,9 @@ class CatClient(NamespacedClient):
         format: Optional[str] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -149,6 +164,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -171,6 +189,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -196,6 +217,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -221,6 +245,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -245,6 +272,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -267,6 +297,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -290,6 +323,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -314,6 +350,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -336,6 +375,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -359,6 +401,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -381,6 +426,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -403,6 +451,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -427,6 +478,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -452,6 +506,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -475,6 +532,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -499,6 +559,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -523,6 +586,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -548,6 +614,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -574,6 +643,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
@@ -599,6 +671,9 @@ class CatClient(NamespacedClient):
         error_trace: Optional[bool] = ...,
         filter_path: Optional[Union[str, Collection[str]]] = ...,
         request_timeout: Optional[Union[int, float]] = ...,
+        total_timeout: Optional[Union[int, float]] = ...,
+        request_priority: Optional[str] = ...,
+        request_stream: Optional[bool] = ...,
         ignore: Optional[Union[int, Collection[int]]] = ...,
         opaque_id: Optional[str] = ...,
         http_auth: Optional[Union[str, Tuple[str, str]]] = ...,
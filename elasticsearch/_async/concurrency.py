@@ -0,0 +1,171 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+import time
+from collections import deque
+
+from ..exceptions import PoolTimeout
+from .compat import get_running_loop
+
+
+class AdaptiveConcurrencyLimiter(object):
+    """
+    Limits the number of requests the :class:`~elasticsearch.AsyncTransport`
+    has in flight, adjusting the limit to what the cluster can handle
+    (additive increase / multiplicative decrease).
+
+    While the limit is in use and requests are answered without signs of
+    congestion the limit grows by one per round trip (``1 / limit`` for each
+    response). It's multiplied by
+    ``backoff_ratio`` (at most once per round trip) when a request is rejected
+    with a 429, times out, or when the recent latency exceeds
+    ``latency_tolerance`` times the long term latency.
+
+    Requests over the limit wait for a free slot, in order, for up to
+    ``max_queue_wait`` seconds before failing with a
+    :class:`~elasticsearch.PoolTimeout`, like the requests waiting for a
+    free connection. They aren't retried on another node.
+
+    :arg initial_limit: number of concurrent requests allowed initially
+    :arg min_limit: lower bound of the limit
+    :arg max_limit: upper bound of the limit
+    :arg backoff_ratio: factor applied to the limit on congestion
+    :arg latency_tolerance: ratio of the recent latency to the long term
+        latency considered as congestion
+    :arg max_queue_wait: number of seconds a request waits for a free slot
+    """
+
+    # weights of the recent and of the long term latency averages
+    short_weight = 0.2
+    long_weight = 0.02
+
+    def __init__(
+        self,
+        initial_limit=20,
+        min_limit=1,
+        max_limit=1000,
+        backoff_ratio=0.9,
+        latency_tolerance=2.0,
+        max_queue_wait=5.0,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.max_queue_wait = max_queue_wait
+
+        self.in_flight = 0
+        self._waiters = deque()
+        self._short_rtt = None
+        self._long_rtt = None
+        self._last_decrease = 0.0
+
+        #: number of requests which had to wait for a slot
+        self.queued = 0
+        #: number of requests which failed waiting for a slot
+        self.rejected = 0
+
+    async def acquire(self):
+        """
+        Wait for a free slot, raises a :class:`~elasticsearch.PoolTimeout`
+        after ``max_queue_wait`` seconds.
+        """
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait((waiter,), timeout=self.max_queue_wait)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if not waiter.done():
+            self._abandon(waiter)
+            self.rejected += 1
+            raise PoolTimeout(
+                "POOL_TIMEOUT",
+                "Timed out after %ss waiting for one of the %d request slots."
+                % (self.max_queue_wait, int(self.limit)),
+                asyncio.TimeoutError(),
+            )
+
+    def _abandon(self, waiter):
+        if waiter.done() and not waiter.cancelled():
+            # a slot was handed over in the meantime, pass it on
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _wake_up(self):
+        while self._waiters and self.in_flight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def release(self, duration=None, overloaded=False):
+        """
+        Free the slot of a finished request and adjust the limit.
+
+        :arg duration: number of seconds the request took, ``None`` if it
+            didn't get a response (cancelled, connection error)
+        :arg overloaded: whether the cluster rejected the request (429) or it
+            timed out
+        """
+        saturated = self.in_flight * 2 >= self.limit
+        self.in_flight -= 1
+
+        congested = overloaded
+        if duration is not None and not overloaded:
+            if self._short_rtt is None:
+                self._short_rtt = self._long_rtt = duration
+            else:
+                self._short_rtt += (duration - self._short_rtt) * self.short_weight
+                self._long_rtt += (duration - self._long_rtt) * self.long_weight
+            congested = self._short_rtt > self._long_rtt * self.latency_tolerance
+
+        if congested:
+            now = time.monotonic()
+            # the requests in flight when the limit was lowered are still
+            # finishing, give them a round trip before lowering it again
+            if now - self._last_decrease >= (self._short_rtt or 0):
+                self._last_decrease = now
+                self.limit = max(self.limit * self.backoff_ratio, self.min_limit)
+        elif duration is not None and saturated:
+            # a full window of responses raises the limit by one
+            self.limit = min(self.limit + 1.0 / self.limit, self.max_limit)
+
+        self._wake_up()
+
+    def stats(self):
+        """Returns the current limit and counters as a dict."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
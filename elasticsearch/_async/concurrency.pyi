@@ -0,0 +1,45 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from typing import Dict, Optional
+
+class AdaptiveConcurrencyLimiter(object):
+    short_weight: float
+    long_weight: float
+    limit: float
+    min_limit: int
+    max_limit: int
+    backoff_ratio: float
+    latency_tolerance: float
+    max_queue_wait: Optional[float]
+    in_flight: int
+    queued: int
+    rejected: int
+    def __init__(
+        self,
+        initial_limit: int = ...,
+        min_limit: int = ...,
+        max_limit: int = ...,
+        backoff_ratio: float = ...,
+        latency_tolerance: float = ...,
+        max_queue_wait: Optional[float] = ...,
+    ) -> None: ...
+    async def acquire(self) -> None: ...
+    def release(
+        self, duration: Optional[float] = ..., overloaded: bool = ...
+    ) -> None: ...
+    def stats(self) -> Dict[str, int]: ...
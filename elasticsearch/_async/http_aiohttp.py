@@ -16,21 +16,27 @@
 #  under the License.
 
 import asyncio
+import functools
+import inspect
 import os
-import ssl
+import random
+import socket
+import sys
 import warnings
+import weakref
 
 import urllib3  # type: ignore
 
 from ..compat import reraise_exceptions, urlencode
 from ..connection.base import Connection
+from ..connection.tls import create_client_ssl_context
 from ..exceptions import (
     ConnectionError,
     ConnectionTimeout,
     ImproperlyConfigured,
     SSLError,
 )
-from ..utils import _client_meta_version
+from ..utils import _client_meta_version, _connection_expired, _socket_options
 from ._extra_imports import aiohttp, aiohttp_exceptions, yarl
 from .compat import get_running_loop
 
@@ -40,6 +46,11 @@ from .compat import get_running_loop
 VERIFY_CERTS_DEFAULT = object()
 SSL_SHOW_WARN_DEFAULT = object()
 
+# aiohttp>=3.12 creates the sockets with a given factory
+_HAS_SOCKET_FACTORY = (
+    "socket_factory" in inspect.signature(aiohttp.TCPConnector).parameters
+)
+
 CA_CERTS = None
 
 try:
@@ -50,6 +61,14 @@ except ImportError:
     pass
 
 
+def _create_socket(options, addr_info):
+    family, type_, proto = addr_info[:3]
+    sock = socket.socket(family, type_, proto)
+    for option in options:
+        sock.setsockopt(*option)
+    return sock
+
+
 class AsyncConnection(Connection):
     """Base class for Async HTTP connection implementations"""
 
@@ -62,9 +81,14 @@ class AsyncConnection(Connection):
         timeout=None,
         ignore=(),
         headers=None,
+        priority=None,
+        stream=False,
     ):
         raise NotImplementedError()
 
+    async def warm_up(self, count=1):
+        return 0
+
     async def close(self):
         raise NotImplementedError()
 
@@ -94,6 +118,10 @@ class AIOHttpConnection(AsyncConnection):
         api_key=None,
         opaque_id=None,
         loop=None,
+        priority_maxsize=None,
+        tcp_keepalive=None,
+        idle_timeout=None,
+        max_connection_age=None,
         **kwargs,
     ):
         """
@@ -131,6 +159,22 @@ class AIOHttpConnection(AsyncConnection):
         :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
             For tracing all requests made by this transport.
         :arg loop: asyncio Event Loop to use with aiohttp. This is set by default to the currently running loop.
+        :arg unix_socket: path of a Unix domain socket to send the requests to
+            instead of ``host`` and ``port``
+        :arg priority_maxsize: dict mapping request priorities (the
+            ``request_priority`` of the requests) to the number of connections
+            of a separate pool used for them, requests with another or no
+            priority use the main pool of ``maxsize`` connections
+        :arg tcp_keepalive: enable TCP keep-alive probes on the sockets, see
+            :class:`~elasticsearch.Urllib3HttpConnection` (requires
+            aiohttp>=3.12). aiohttp always disables Nagle's algorithm
+            (``TCP_NODELAY``).
+        :arg idle_timeout: close the connections idle for more than this
+            number of seconds instead of reusing them (aiohttp's
+            ``keepalive_timeout``, 15 seconds by default)
+        :arg max_connection_age: close the connections which served requests
+            for more than this number of seconds (minus up to 10%, at random)
+            once they are released
         """
 
         self.headers = {}
@@ -166,12 +210,11 @@ class AIOHttpConnection(AsyncConnection):
             )
 
         self.ssl_assert_fingerprint = ssl_assert_fingerprint
+        # requires aiohttp>=3.9, only passed when needed
+        self._request_kwargs = {}
+        if self.use_ssl and self.server_hostname:
+            self._request_kwargs["server_hostname"] = self.server_hostname
         if self.use_ssl and ssl_context is None:
-            if ssl_version is None:
-                ssl_context = ssl.create_default_context()
-            else:
-                ssl_context = ssl.SSLContext(ssl_version)
-
             # Convert all sentinel values to their actual default
             # values if not using an SSLContext.
             if verify_certs is VERIFY_CERTS_DEFAULT:
@@ -179,13 +222,6 @@ class AIOHttpConnection(AsyncConnection):
             if ssl_show_warn is SSL_SHOW_WARN_DEFAULT:
                 ssl_show_warn = True
 
-            if verify_certs:
-                ssl_context.verify_mode = ssl.CERT_REQUIRED
-                ssl_context.check_hostname = True
-            else:
-                ssl_context.check_hostname = False
-                ssl_context.verify_mode = ssl.CERT_NONE
-
             ca_certs = CA_CERTS if ca_certs is None else ca_certs
             if verify_certs:
                 if not ca_certs:
@@ -201,11 +237,7 @@ class AIOHttpConnection(AsyncConnection):
                         % self.host
                     )
 
-            if os.path.isfile(ca_certs):
-                ssl_context.load_verify_locations(cafile=ca_certs)
-            elif os.path.isdir(ca_certs):
-                ssl_context.load_verify_locations(capath=ca_certs)
-            else:
+            if not os.path.exists(ca_certs):
                 raise ImproperlyConfigured("ca_certs parameter is not a path")
 
             # Use client_cert and client_key variables for SSL certificate configuration.
@@ -213,26 +245,55 @@ class AIOHttpConnection(AsyncConnection):
                 raise ImproperlyConfigured("client_cert is not a path to a file")
             if client_key and not os.path.isfile(client_key):
                 raise ImproperlyConfigured("client_key is not a path to a file")
-            if client_cert and client_key:
-                ssl_context.load_cert_chain(client_cert, client_key)
-            elif client_cert:
-                ssl_context.load_cert_chain(client_cert)
+
+            ssl_context = create_client_ssl_context(
+                verify_certs=verify_certs,
+                ca_certs=ca_certs if verify_certs else None,
+                client_cert=client_cert,
+                client_key=client_key,
+                ssl_version=ssl_version,
+            )
 
         self.headers.setdefault("connection", "keep-alive")
         self.loop = loop
         self.session = None
+        self.priority_sessions = {}
 
         # Parameters for creating an aiohttp.ClientSession later.
         self._limit = maxsize
+        self._priority_limits = dict(priority_maxsize or {})
         self._http_auth = http_auth
         self._ssl_context = ssl_context
 
+        self._connector_kwargs = {}
+        if idle_timeout is not None:
+            self._connector_kwargs["keepalive_timeout"] = idle_timeout
+        if tcp_keepalive and not self.unix_socket:
+            if not _HAS_SOCKET_FACTORY:
+                raise ImproperlyConfigured("tcp_keepalive requires aiohttp>=3.12")
+            self._connector_kwargs["socket_factory"] = functools.partial(
+                _create_socket, _socket_options(True, tcp_keepalive)
+            )
+        self.max_connection_age = max_connection_age
+        # protocol (connection) -> (time of its first request, jitter)
+        self._connection_times = weakref.WeakKeyDictionary()
+
     async def perform_request(
-        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+        priority=None,
+        stream=False,
     ):
         if self.session is None:
             await self._create_aiohttp_session()
         assert self.session is not None
+        session = self.priority_sessions.get(priority, self.session)
 
         orig_body = body
         url_path = self.url_prefix + url
@@ -288,20 +349,36 @@ class AIOHttpConnection(AsyncConnection):
 
         start = self.loop.time()
         try:
-            async with self.session.request(
+            # entered by hand, a streamed response stays open once returned
+            request_cm = session.request(
                 method,
                 url,
                 data=body,
                 headers=req_headers,
                 timeout=timeout,
                 fingerprint=self.ssl_assert_fingerprint,
-            ) as response:
+                **self._request_kwargs,
+            )
+            response = await request_cm.__aenter__()
+            try:
+                if self.max_connection_age is not None:
+                    self._close_if_too_old(response)
                 if is_head:  # We actually called 'GET' so throw away the data.
                     await response.release()
                     raw_data = ""
+                elif stream and (
+                    200 <= response.status < 300 or response.status in ignore
+                ):
+                    # read by the caller
+                    raw_data = None
                 else:
                     raw_data = await response.text()
                 duration = self.loop.time() - start
+            except BaseException:
+                await request_cm.__aexit__(*sys.exc_info())
+                raise
+            if raw_data is not None:
+                await request_cm.__aexit__(None, None, None)
 
         # We want to reraise a cancellation or recursion error.
         except reraise_exceptions:
@@ -344,6 +421,13 @@ class AIOHttpConnection(AsyncConnection):
             method, str(url), url_path, orig_body, response.status, raw_data, duration
         )
 
+        if stream:
+            raw_data = AsyncRawResponse(
+                response.status,
+                response.headers,
+                lambda amt: response.content.read(-1 if amt is None else amt),
+                response.release,
+            )
         return response.status, response.headers, raw_data
 
     async def close(self):
@@ -352,6 +436,8 @@ class AIOHttpConnection(AsyncConnection):
         """
         if self.session:
             await self.session.close()
+        for session in self.priority_sessions.values():
+            await session.close()
 
     async def _create_aiohttp_session(self):
         """Creates an aiohttp.ClientSession(). This is delayed until
@@ -360,17 +446,50 @@ class AIOHttpConnection(AsyncConnection):
         """
         if self.loop is None:
             self.loop = get_running_loop()
-        self.session = aiohttp.ClientSession(
+        self.session = self._new_session(self._limit)
+        # the connector of each priority lane has its own connection limit
+        self.priority_sessions = {
+            priority: self._new_session(limit)
+            for priority, limit in self._priority_limits.items()
+        }
+
+    def _new_session(self, limit):
+        return aiohttp.ClientSession(
             headers=self.headers,
             skip_auto_headers=("accept", "accept-encoding"),
             auto_decompress=True,
             loop=self.loop,
             cookie_jar=aiohttp.DummyCookieJar(),
             response_class=ESClientResponse,
-            connector=aiohttp.TCPConnector(
-                limit=self._limit, use_dns_cache=True, ssl=self._ssl_context
-            ),
+            connector=self._new_connector(limit),
+        )
+
+    def _new_connector(self, limit):
+        if self.unix_socket:
+            return aiohttp.UnixConnector(
+                path=self.unix_socket, limit=limit, **self._connector_kwargs
+            )
+        return aiohttp.TCPConnector(
+            limit=limit,
+            use_dns_cache=True,
+            ssl=self._ssl_context,
+            **self._connector_kwargs,
+        )
+
+    def _close_if_too_old(self, response):
+        connection = response.connection
+        protocol = connection and connection.protocol
+        if protocol is None:
+            return
+        now = self.loop.time()
+        first_used, jitter = self._connection_times.setdefault(
+            protocol, (now, random.random())
         )
+        if _connection_expired(
+            now, first_used, None, max_age=self.max_connection_age, jitter=jitter
+        ):
+            # closed by the connector instead of going back to the pool
+            protocol.force_close()
 
 
 class ESClientResponse(aiohttp.ClientResponse):
@@ -379,3 +498,80 @@ class ESClientResponse(aiohttp.ClientResponse):
             await self.read()
 
         return self._body.decode("utf-8", "surrogatepass")
+
+
+class AsyncRawResponse(object):
+    """
+    Body of a response to a request sent with ``request_stream=True``, read
+    incrementally as undecoded bytes, the asynchronous counterpart of
+    :class:`~elasticsearch.RawResponse`. Close it (or use it as an async
+    context manager) once done with it.
+
+    :arg status: HTTP status code of the response
+    :arg headers: headers of the response
+    :arg read: coroutine function returning the next ``amt`` bytes of the body
+        (all the remaining bytes if ``amt`` is ``None``), ``b""`` at the end
+    :arg close: coroutine function releasing the connection, called once
+    """
+
+    #: size of the chunks returned when iterating over the response
+    chunk_size = 64 * 1024
+
+    def __init__(self, status, headers, read, close):
+        self.status = status
+        self.headers = {name.lower(): value for name, value in headers.items()}
+        self._read = read
+        self._close = close
+        self.closed = False
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type")
+
+    async def read(self, amt=None):
+        """
+        Read up to ``amt`` bytes of the body, all of it if ``amt`` is
+        ``None``. Returns ``b""`` at the end of the body.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed response")
+        data = await self._read(amt)
+        if amt is None or not data:
+            # the whole body has been read, release the connection now
+            await self.close()
+        return data
+
+    async def __aiter__(self):
+        while not self.closed:
+            chunk = await self.read(self.chunk_size)
+            if chunk:
+                yield chunk
+
+    async def close(self):
+        if not self.closed:
+            self.closed = True
+            await self._close()
+
+    def _add_close_callback(self, callback):
+        # called once the connection has been released
+        if self.closed:
+            callback()
+            return
+        close = self._close
+
+        async def close_and_callback():
+            try:
+                await close()
+            finally:
+                callback()
+
+        self._close = close_and_callback
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    def __repr__(self):
+        return "<AsyncRawResponse: %s %s>" % (self.status, self.content_type)
@@ -16,7 +16,19 @@
 #  under the License.
 
 from asyncio import AbstractEventLoop
-from typing import Any, Collection, Mapping, MutableMapping, Optional, Tuple, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 from ..connection import Connection
 from ._extra_imports import aiohttp  # type: ignore
@@ -31,11 +43,15 @@ class AsyncConnection(Connection):
         timeout: Optional[Union[int, float]] = ...,
         ignore: Collection[int] = ...,
         headers: Optional[MutableMapping[str, str]] = ...,
-    ) -> Tuple[int, Mapping[str, str], str]: ...
+        priority: Optional[str] = ...,
+        stream: bool = ...,
+    ) -> Tuple[int, Mapping[str, str], Union[str, AsyncRawResponse]]: ...
+    async def warm_up(self, count: int = ...) -> int: ...  # type: ignore
     async def close(self) -> None: ...
 
 class AIOHttpConnection(AsyncConnection):
     session: Optional[aiohttp.ClientSession]
+    priority_sessions: Dict[str, aiohttp.ClientSession]
     ssl_assert_fingerprint: Optional[str]
     def __init__(
         self,
@@ -59,5 +75,29 @@ class AIOHttpConnection(AsyncConnection):
         opaque_id: Optional[str] = ...,
         meta_header: bool = ...,
         loop: Optional[AbstractEventLoop] = ...,
+        priority_maxsize: Optional[Mapping[str, int]] = ...,
+        tcp_keepalive: Optional[Union[bool, int, Tuple[int, int, int]]] = ...,
+        idle_timeout: Optional[float] = ...,
+        max_connection_age: Optional[float] = ...,
         **kwargs: Any,
     ) -> None: ...
+
+class AsyncRawResponse(object):
+    chunk_size: int
+    status: int
+    headers: Dict[str, str]
+    closed: bool
+    def __init__(
+        self,
+        status: int,
+        headers: Mapping[str, str],
+        read: Callable[[Optional[int]], Awaitable[bytes]],
+        close: Callable[[], Awaitable[Any]],
+    ) -> None: ...
+    @property
+    def content_type(self) -> Optional[str]: ...
+    async def read(self, amt: Optional[int] = ...) -> bytes: ...
+    def __aiter__(self) -> AsyncIterator[bytes]: ...
+    async def close(self) -> None: ...
+    async def __aenter__(self) -> "AsyncRawResponse": ...
+    async def __aexit__(self, *_: Any) -> None: ...
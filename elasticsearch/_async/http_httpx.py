@@ -0,0 +1,101 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import time
+import zlib
+
+from ..compat import reraise_exceptions
+from ..connection.http_httpx import HttpxHttpConnection, _with_unix_socket
+from ..exceptions import ImproperlyConfigured
+from ._threaded_client import to_async_stream
+from .http_aiohttp import AsyncConnection
+
+try:
+    import httpx
+except ImportError:
+    pass
+
+
+async def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class AsyncHttpxHttpConnection(HttpxHttpConnection, AsyncConnection):
+    """
+    Connection class for ``AsyncElasticsearch`` using the `httpx` library,
+    speaking HTTP/2 with the nodes which support it. Takes the same
+    parameters as :class:`~elasticsearch.HttpxHttpConnection` and shares its
+    request and response handling. Request bodies can also be asynchronous
+    iterables of bytes.
+    """
+
+    def _create_client(self, **kwargs):
+        return httpx.AsyncClient(**_with_unix_socket(kwargs, httpx.AsyncHTTPTransport))
+
+    def _compress(self, body):
+        if hasattr(body, "__aiter__"):
+            return _gzip_chunks(body)
+        return super()._compress(body)
+
+    async def perform_request(
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+        priority=None,
+        stream=False,
+    ):
+        if stream:
+            raise ImproperlyConfigured(
+                "%s doesn't support request_stream, use AIOHttpConnection."
+                % self.__class__.__name__
+            )
+        url, full_url, kw = self._prepare_request(url, params, body, timeout, headers)
+        kw["content"] = to_async_stream(kw["content"])
+
+        start = time.time()
+        try:
+            response = await self.client.request(method, full_url, **kw)
+            duration = time.time() - start
+        except reraise_exceptions:
+            raise
+        except Exception as e:
+            self.log_request_fail(
+                method, full_url, url, body, time.time() - start, exception=e
+            )
+            if isinstance(e, (httpx.TransportError, OSError)):
+                raise self._wrap_error(e)
+            raise
+
+        return self._process_response(
+            method, full_url, url, body, response, duration, ignore
+        )
+
+    async def close(self):
+        """
+        Explicitly closes connections
+        """
+        await self.client.aclose()
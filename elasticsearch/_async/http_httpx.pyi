@@ -0,0 +1,49 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from typing import (
+    IO,
+    Any,
+    AsyncIterable,
+    Collection,
+    Iterable,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from ..connection.http_httpx import HttpxHttpConnection
+from .http_aiohttp import AsyncConnection
+
+class AsyncHttpxHttpConnection(HttpxHttpConnection, AsyncConnection):
+    async def perform_request(  # type: ignore
+        self,
+        method: str,
+        url: str,
+        params: Optional[MutableMapping[str, Any]] = ...,
+        body: Optional[
+            Union[bytes, Iterable[bytes], AsyncIterable[bytes], IO[bytes]]
+        ] = ...,
+        timeout: Optional[Union[int, float]] = ...,
+        ignore: Collection[int] = ...,
+        headers: Optional[MutableMapping[str, str]] = ...,
+        priority: Optional[str] = ...,
+        stream: bool = ...,
+    ) -> Tuple[int, Mapping[str, str], str]: ...
+    async def close(self) -> None: ...
@@ -0,0 +1,450 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+import base64
+import ssl
+import time
+import zlib
+from collections import deque
+from platform import python_version
+
+from ..compat import reraise_exceptions, string_types, to_bytes, urlencode
+from ..exceptions import (
+    ConnectionError,
+    ConnectionTimeout,
+    ImproperlyConfigured,
+    PoolTimeout,
+    SSLError,
+)
+from ..utils import _client_meta_version
+from .http_aiohttp import AsyncConnection
+
+# responses without a body
+_NO_BODY_STATUSES = frozenset((204, 304))
+
+
+def _encode_headers(headers):
+    return "".join("%s: %s\r\n" % item for item in headers.items()).encode("latin-1")
+
+
+async def _read_chunked(reader):
+    chunks = []
+    while True:
+        size = int((await reader.readline()).split(b";", 1)[0], 16)
+        if not size:
+            break
+        chunks.append((await reader.readexactly(size + 2))[:-2])
+    # trailers
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return b"".join(chunks)
+
+
+async def _aiter_chunks(body, chunk_size=65536):
+    if hasattr(body, "__aiter__"):
+        async for chunk in body:
+            yield chunk
+        return
+    if hasattr(body, "read"):
+        read = body.read
+        body = iter(lambda: read(chunk_size), b"")
+    for chunk in body:
+        yield chunk
+
+
+async def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class AsyncStdlibHttpConnection(AsyncConnection):
+    """
+    Connection class for ``AsyncElasticsearch`` speaking HTTP/1.1 directly
+    over asyncio streams (:func:`asyncio.open_connection`), so it works with
+    any event loop implementing them such as uvloop. Each request is sent on
+    a keep-alive connection of the pool of the node, with little more work
+    than writing the request and parsing the response.
+
+    Besides bytes, the body of a request can be an iterable or an
+    asynchronous iterable of bytes, or a file object opened in binary mode,
+    it's then streamed to the node with ``transfer-encoding: chunked``
+    (compressed on the fly with ``http_compress``).
+
+    :arg host: hostname of the node (default: localhost)
+    :arg port: port to use (integer, default: 9200)
+    :arg url_prefix: optional url prefix for elasticsearch
+    :arg timeout: default timeout in seconds (float, default: 10)
+    :arg http_auth: optional http auth information as either ':' separated
+        string or a tuple
+    :arg use_ssl: use ssl for the connection if `True`
+    :arg verify_certs: whether to verify SSL certificates
+    :arg ssl_show_warn: show warning when verify certs is disabled
+    :arg ca_certs: optional path to CA bundle, defaults to the one of
+        ``certifi`` when installed, the system's otherwise
+    :arg client_cert: path to the file containing the private key and the
+        certificate, or cert only if using client_key
+    :arg client_key: path to the file containing the private key if using
+        separate cert and key files (client_cert will contain only the cert)
+    :arg ssl_context: :class:`ssl.SSLContext` to use instead of the other SSL
+        options
+    :arg maxsize: the maximum number of connections opened to this host,
+        requests wait for a free connection when all of them are in use, up
+        to their timeout before raising :class:`~elasticsearch.PoolTimeout`
+    :arg headers: any custom http headers to be add to requests
+    :arg http_compress: Use gzip compression
+    :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
+        Other host connection params will be ignored.
+    :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
+    :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
+        For tracing all requests made by this transport.
+    :arg unix_socket: path of a Unix domain socket to send the requests to
+        instead of ``host`` and ``port``
+    """
+
+    HTTP_CLIENT_META = ("as", _client_meta_version(python_version()))
+
+    def __init__(
+        self,
+        host="localhost",
+        port=None,
+        http_auth=None,
+        use_ssl=False,
+        verify_certs=True,
+        ssl_show_warn=True,
+        ca_certs=None,
+        client_cert=None,
+        client_key=None,
+        ssl_context=None,
+        maxsize=10,
+        headers=None,
+        http_compress=None,
+        cloud_id=None,
+        api_key=None,
+        opaque_id=None,
+        **kwargs
+    ):
+        super().__init__(
+            host=host,
+            port=port,
+            use_ssl=use_ssl,
+            headers=headers,
+            http_compress=http_compress,
+            cloud_id=cloud_id,
+            api_key=api_key,
+            opaque_id=opaque_id,
+            **kwargs
+        )
+        if http_auth is not None:
+            if isinstance(http_auth, (tuple, list)):
+                http_auth = ":".join(http_auth)
+            if isinstance(http_auth, string_types):
+                self.headers["authorization"] = "Basic %s" % (
+                    base64.b64encode(to_bytes(http_auth, "utf-8")).decode("ascii")
+                )
+
+        if self.use_ssl and ssl_context is None:
+            ssl_context = self._create_ssl_context(
+                verify_certs, ssl_show_warn, ca_certs, client_cert, client_key
+            )
+        self.ssl_context = ssl_context
+        self.maxsize = maxsize
+
+        # idle (reader, writer) pairs, the most recently used last
+        self._idle = deque()
+        # created in the event loop of the first request
+        self._slots = None
+        self._closed = False
+        self._host_header = self.host.split("://", 1)[1]
+        self._header_block = _encode_headers(self._default_headers())
+
+    def _default_headers(self):
+        headers = {"host": self._host_header}
+        headers.update(self.headers)
+        return headers
+
+    async def _open_connection(self):
+        if self.unix_socket:
+            return await asyncio.open_unix_connection(self.unix_socket)
+        if self.use_ssl:
+            return await asyncio.open_connection(
+                self.hostname,
+                self.port,
+                ssl=self.ssl_context,
+                server_hostname=self.server_hostname or self.hostname,
+            )
+        return await asyncio.open_connection(self.hostname, self.port)
+
+    async def _acquire(self, timeout):
+        """
+        Waits for one of the ``maxsize`` connections of the pool to be free,
+        raises :class:`~elasticsearch.PoolTimeout` after ``timeout`` seconds.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.maxsize)
+        if not self._slots.locked():
+            # doesn't wait, even with a zero timeout
+            await self._slots.acquire()
+            return
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout)
+        except asyncio.TimeoutError as e:
+            raise PoolTimeout(
+                "POOL_TIMEOUT", "Timed out waiting for a free connection.", e
+            )
+
+    async def _get_connection(self):
+        idle = self._idle
+        while idle:
+            reader, writer = idle.pop()
+            # the server closed the connection while it was idle
+            if reader.at_eof() or writer.transport.is_closing():
+                writer.close()
+                continue
+            return reader, writer
+        return await self._open_connection()
+
+    def _release(self, reader, writer, keep_alive):
+        if keep_alive and not self._closed:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def warm_up(self, count=1):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.maxsize)
+        idle = deque()
+        for reader, writer in self._idle:
+            if reader.at_eof() or writer.transport.is_closing():
+                writer.close()
+            else:
+                idle.append((reader, writer))
+        self._idle = idle
+
+        opened = 0
+        while (
+            len(self._idle) < min(count, self.maxsize)
+            and not self._slots.locked()
+            and not self._closed
+        ):
+            await self._slots.acquire()
+            try:
+                reader, writer = await asyncio.wait_for(
+                    self._open_connection(), self.timeout
+                )
+            except reraise_exceptions:
+                self._slots.release()
+                raise
+            except Exception as e:
+                self._slots.release()
+                if isinstance(e, asyncio.TimeoutError):
+                    raise ConnectionTimeout("TIMEOUT", str(e), e)
+                if isinstance(e, (ssl.SSLError, ssl.CertificateError)):
+                    raise SSLError("N/A", str(e), e)
+                raise ConnectionError("N/A", str(e), e)
+            self._release(reader, writer, True)
+            self._slots.release()
+            opened += 1
+        return opened
+
+    def _build_request(self, method, url, body, headers):
+        """
+        Returns the request up to the end of its body, and the chunks of a
+        streamed body to send after it (``None`` otherwise).
+        """
+        if not headers:
+            header_block = self._header_block
+        elif any(name.lower() in self.headers for name in headers):
+            request_headers = self._default_headers()
+            for name, value in headers.items():
+                request_headers[name.lower()] = value
+            header_block = _encode_headers(request_headers)
+        else:
+            header_block = self._header_block + _encode_headers(headers)
+
+        request_line = ("%s %s HTTP/1.1\r\n" % (method, url)).encode("utf-8")
+        if body is None:
+            if method in ("POST", "PUT"):
+                head = request_line + header_block + b"content-length: 0\r\n\r\n"
+                return head, None
+            return request_line + header_block + b"\r\n", None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif not isinstance(body, bytes):
+            head = request_line + header_block + b"transfer-encoding: chunked\r\n\r\n"
+            return head, _aiter_chunks(body)
+        request = b"".join(
+            (
+                request_line,
+                header_block,
+                b"content-length: %d\r\n\r\n" % len(body),
+                body,
+            )
+        )
+        return request, None
+
+    async def _read_response(self, reader, method):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        lines = head.split("\r\n")
+        version, status = lines[0].split(" ", 2)[:2]
+        status = int(status)
+
+        headers = {}
+        warning_headers = []
+        for line in lines[1:-2]:
+            name, _, value = line.partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            if name == "warning":
+                warning_headers.append(value)
+            if name in headers:
+                headers[name] += ", " + value
+            else:
+                headers[name] = value
+
+        keep_alive = (
+            version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        )
+        if method == "HEAD" or status in _NO_BODY_STATUSES or status < 200:
+            data = b""
+        elif "chunked" in headers.get("transfer-encoding", ""):
+            data = await _read_chunked(reader)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            # the body ends with the connection
+            data = await reader.read()
+            keep_alive = False
+        return status, headers, warning_headers, data, keep_alive
+
+    async def _exchange(self, method, request, chunks):
+        reader, writer = await self._get_connection()
+        try:
+            writer.write(request)
+            if chunks is not None:
+                async for chunk in chunks:
+                    if chunk:
+                        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                        await writer.drain()
+                writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            response = await self._read_response(reader, method)
+        except BaseException:
+            writer.close()
+            raise
+        self._release(reader, writer, response[-1])
+        return response
+
+    async def _send(self, method, request, chunks, timeout):
+        # the wait for a free connection isn't a failure of the node, it's
+        # timed apart from sending the request
+        await self._acquire(timeout)
+        try:
+            return await asyncio.wait_for(
+                self._exchange(method, request, chunks), timeout
+            )
+        finally:
+            self._slots.release()
+
+    async def perform_request(
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+        priority=None,
+        stream=False,
+    ):
+        if stream:
+            raise ImproperlyConfigured(
+                "%s doesn't support request_stream, use AIOHttpConnection."
+                % self.__class__.__name__
+            )
+        url_path = self.url_prefix + url
+        if params:
+            url_path = "%s?%s" % (url_path, urlencode(params))
+        full_url = self.host + url_path
+
+        orig_body = body
+        if self.http_compress and body:
+            if isinstance(body, (bytes, str)):
+                body = self._gzip_compress(body)
+            else:
+                body = _gzip_chunks(_aiter_chunks(body))
+            headers = dict(headers or ())
+            headers["content-encoding"] = "gzip"
+        request, chunks = self._build_request(method, url_path, body, headers)
+
+        start = time.time()
+        try:
+            status, response_headers, warning_headers, data, _ = await self._send(
+                method,
+                request,
+                chunks,
+                timeout if timeout is not None else self.timeout,
+            )
+            duration = time.time() - start
+        except reraise_exceptions:
+            raise
+        except Exception as e:
+            self.log_request_fail(
+                method, full_url, url_path, orig_body, time.time() - start, exception=e
+            )
+            if isinstance(e, PoolTimeout):
+                raise
+            if isinstance(e, asyncio.TimeoutError):
+                raise ConnectionTimeout("TIMEOUT", str(e), e)
+            if isinstance(e, (ssl.SSLError, ssl.CertificateError)):
+                raise SSLError("N/A", str(e), e)
+            raise ConnectionError("N/A", str(e), e)
+
+        if data and response_headers.get("content-encoding") in ("gzip", "deflate"):
+            # gzip or zlib header, auto-detected
+            data = zlib.decompress(data, 32 + zlib.MAX_WBITS)
+        raw_data = data.decode("utf-8", "surrogatepass")
+
+        # raise warnings if any from the 'Warnings' header.
+        self._raise_warnings(warning_headers)
+
+        # raise errors based on http status codes, let the client handle those if needed
+        if not (200 <= status < 300) and status not in ignore:
+            self.log_request_fail(
+                method, full_url, url_path, orig_body, duration, status, raw_data
+            )
+            self._raise_error(status, raw_data)
+
+        self.log_request_success(
+            method, full_url, url_path, orig_body, status, raw_data, duration
+        )
+
+        return status, response_headers, raw_data
+
+    async def close(self):
+        """
+        Explicitly closes connections
+        """
+        self._closed = True
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
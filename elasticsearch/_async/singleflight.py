@@ -0,0 +1,80 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+
+from ..singleflight import SingleFlight
+from .compat import get_running_loop
+
+
+class _Call(object):
+    def __init__(self, task):
+        self.task = task
+        self.callers = 0
+        self.active = 0
+
+
+class AsyncSingleFlight(SingleFlight):
+    """
+    :class:`~elasticsearch.singleflight.SingleFlight` for the
+    :class:`~elasticsearch.AsyncTransport`: identical reads issued
+    concurrently from different coroutines are sent once.
+
+    The request runs in its own task so that a caller being cancelled doesn't
+    cancel it for the others, it's only cancelled once all the callers waiting
+    for it are.
+    """
+
+    async def do(self, key, func, *args):
+        """
+        Await ``func(*args)`` unless a call for ``key`` is already in flight,
+        in which case wait for its result.
+        """
+        self.requests += 1
+        call = self._calls.get(key)
+        # a finished call is only removed on the next iteration of the loop,
+        # its result may already have been handed out
+        if call is None or call.task.done():
+            task = get_running_loop().create_task(func(*args))
+            call = self._calls[key] = _Call(task)
+            task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+        call.callers += 1
+        call.active += 1
+
+        try:
+            result = await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            call.active -= 1
+            if not call.active:
+                call.task.cancel()
+            raise
+        call.active -= 1
+        return self._copy(result) if call.callers > 1 else result
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self):
+        """Returns the counters as a dict."""
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
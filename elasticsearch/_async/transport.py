@@ -17,18 +17,30 @@
 
 import asyncio
 import logging
+import socket
 import sys
+import time
 from itertools import chain
 
 from ..exceptions import (
     ConnectionError,
     ConnectionTimeout,
+    PoolTimeout,
     SerializationError,
     TransportError,
 )
-from ..transport import Transport
+from ..transport import (
+    _SHARD_ROUTING_PARAMS,
+    Transport,
+    _body_position,
+    _is_node_failure,
+    _is_streamed_body,
+    _within_deadline,
+)
 from .compat import get_running_loop
-from .http_aiohttp import AIOHttpConnection
+from .concurrency import AdaptiveConcurrencyLimiter
+from .http_aiohttp import AIOHttpConnection, AsyncRawResponse
+from .singleflight import AsyncSingleFlight
 
 logger = logging.getLogger("elasticsearch")
 
@@ -43,7 +55,15 @@ class AsyncTransport(Transport):
 
     DEFAULT_CONNECTION_CLASS = AIOHttpConnection
 
-    def __init__(self, hosts, *args, sniff_on_start=False, **kwargs):
+    def __init__(
+        self,
+        hosts,
+        *args,
+        sniff_on_start=False,
+        concurrency_limiter=None,
+        single_flight=False,
+        **kwargs
+    ):
         """
         :arg hosts: list of dictionaries, each containing keyword arguments to
             create a `connection_class` instance
@@ -76,12 +96,39 @@ class AsyncTransport(Transport):
             don't support passing bodies with GET requests. If you set this to
             'POST' a POST method will be used instead, if to 'source' then the body
             will be serialized and passed as a query parameter `source`.
+        :arg concurrency_limiter: limit the number of requests in flight,
+            adapting the limit to the latency and rejections of the cluster.
+            Either ``True`` or an
+            :class:`~elasticsearch._async.concurrency.AdaptiveConcurrencyLimiter`
+            instance. Not limited by default.
+        :arg single_flight: send identical reads (search, count, mget,
+            msearch, get) issued concurrently only once and hand the response
+            to every caller. Either ``True`` or an
+            :class:`~elasticsearch._async.singleflight.AsyncSingleFlight`
+            instance. Disabled by default.
+        :arg resolve_dns: open one connection per address (A and AAAA records)
+            of the hosts given by hostname instead of a single one, resolving
+            the hostnames again every minute to follow the changes. Either
+            ``True`` or a :class:`~elasticsearch.resolver.DNSResolver`
+            instance, pass ``DNSResolver(ttl=...)`` to change the interval.
+            Disabled by default.
+        :arg shared_ssl_context: build a single :class:`ssl.SSLContext` from
+            the SSL options and pass it to every connection as
+            ``ssl_context``, new connections to a node resuming the TLS
+            session of the previous ones. Requires a connection class taking
+            an ``ssl_context``.
+        :arg warm_up_on_sniff: number of connections per node to open in a
+            background task after each sniff (see :meth:`warm_up`). Disabled
+            by default.
 
         Any extra keyword arguments will be passed to the `connection_class`
         when creating and instance unless overridden by that connection's
         options provided as part of the hosts parameter.
         """
         self.sniffing_task = None
+        self.health_check_task = None
+        self.routing_task = None
+        self.resolve_task = None
         self.loop = None
         self._async_init_called = False
         self._sniff_on_start_event = None  # type: asyncio.Event
@@ -100,6 +147,26 @@ class AsyncTransport(Transport):
         self.hosts = hosts
         self.sniff_on_start = sniff_on_start
 
+        # replace the threading.Event()s, created with the background tasks
+        self._health_check_event = None
+        self._routing_event = None
+
+        # number of requests in flight per connection, connections removed
+        # from the pool are only closed once they are done
+        self._in_flight = {}
+        self._draining = set()
+        self._closing = set()
+        # warm-ups started by sniff_hosts(), not awaited
+        self._warm_up_tasks = set()
+
+        if concurrency_limiter is True:
+            concurrency_limiter = AdaptiveConcurrencyLimiter()
+        self.concurrency_limiter = concurrency_limiter or None
+
+        if single_flight is True:
+            single_flight = AsyncSingleFlight()
+        self.single_flight = single_flight or None
+
     async def _async_init(self):
         """This is our stand-in for an async constructor. Everything
         that was deferred within __init__() should be done here now.
@@ -114,6 +181,7 @@ class AsyncTransport(Transport):
         self.kwargs["loop"] = self.loop
 
         # Now that we have a loop we can create all our HTTP connections...
+        await self._resolve_unknown_hostnames(self.hosts)
         self.set_connections(self.hosts)
         self.seed_connections = list(self.connection_pool.connections[:])
 
@@ -164,6 +232,9 @@ class AsyncTransport(Transport):
             if self.loop.time() >= self.last_sniff + self.sniffer_timeout:
                 self.create_sniff_task()
 
+        if self.resolver is not None and self.resolver.refresh_due():
+            self.create_resolve_task()
+
     async def _get_node_info(self, conn, initial):
         try:
             # use small timeout for the sniffing request, should be a fast api call
@@ -262,13 +333,111 @@ class AsyncTransport(Transport):
                 "N/A", "Unable to sniff hosts - no viable hosts found."
             )
 
-        # remember current live connections
-        orig_connections = self.connection_pool.connections[:]
+        # connections that are not in use any more are closed by
+        # _drain_connections()
+        await self._resolve_unknown_hostnames(hosts)
+        self.set_connections(hosts)
+        if self.warm_up_on_sniff:
+            # the requests don't wait for the connections to be opened
+            task = self.loop.create_task(self._warm_up(self.warm_up_on_sniff))
+            self._warm_up_tasks.add(task)
+            task.add_done_callback(self._warm_up_tasks.discard)
+
+    async def warm_up(self, connections_per_node=1):
+        """
+        Open connections to all the live nodes ahead of the requests,
+        concurrently. Connections which are already open count towards
+        ``connections_per_node``, nodes which can't be reached are only logged.
+
+        Returns the number of connections opened.
+
+        :arg connections_per_node: number of idle connections to keep open to
+            each node, at most the size of its connection pool
+        """
+        await self._async_call()
+        return await self._warm_up(connections_per_node)
+
+    async def _warm_up(self, connections_per_node):
+        connections = list(self.connection_pool.connections)
+        results = await asyncio.gather(
+            *(c.warm_up(connections_per_node) for c in connections),
+            return_exceptions=True,
+        )
+        opened = 0
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.warning("Warming up %r failed: %s", connection, result)
+            else:
+                opened += result
+        return opened
+
+    async def _resolve_hostnames(self, names):
+        """
+        Look the hostnames up with the loop's resolver, without blocking it,
+        and store their addresses in the :class:`~elasticsearch.resolver.DNSResolver`.
+        """
+        resolver = self.resolver
+        results = await asyncio.gather(
+            *(
+                self.loop.getaddrinfo(
+                    name, None, family=resolver.family, type=socket.SOCK_STREAM
+                )
+                for name in names
+            ),
+            return_exceptions=True,
+        )
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                resolver.fail(name, result)
+            else:
+                resolver.update(name, result)
+
+    async def _resolve_unknown_hostnames(self, hosts):
+        # set_connections() would otherwise resolve them blocking the loop
+        if self.resolver is not None:
+            names = self.resolver.get_hostnames(hosts, unknown_only=True)
+            if names:
+                await self._resolve_hostnames(names)
+
+    async def resolve_hosts(self):
+        """
+        Resolve the hostnames of the hosts again and update the connections
+        to their current addresses. Called every ``ttl`` seconds of the
+        resolver when ``resolve_dns`` is enabled.
+        """
+        hosts = self._unresolved_hosts
+        await self._resolve_hostnames(self.resolver.get_hostnames(hosts))
         self.set_connections(hosts)
-        # close those connections that are not in use any more
-        for c in orig_connections:
-            if c not in self.connection_pool.connections:
-                await c.close()
+
+    def create_resolve_task(self):
+        """
+        Initiate a task resolving the hostnames again, unless one is already
+        running.
+        """
+        task = self.resolve_task
+        if task is not None:
+            if not task.done():
+                return
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning("Resolving the hosts failed: %s", task.exception())
+        self.resolve_task = self.loop.create_task(self.resolve_hosts())
+
+    def _drain_connections(self, connections):
+        """
+        Close the connections removed from the pool, waiting for the requests
+        in flight on them to finish first.
+        """
+        for connection in connections:
+            if self._in_flight.get(connection):
+                self._draining.add(connection)
+            else:
+                self._close_removed(connection)
+
+    def _close_removed(self, connection):
+        self._draining.discard(connection)
+        task = self.loop.create_task(connection.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
 
     def create_sniff_task(self, initial=False):
         """
@@ -294,12 +463,232 @@ class AsyncTransport(Transport):
         :arg connection: instance of :class:`~elasticsearch.Connection` that failed
         """
         self.connection_pool.mark_dead(connection)
+        if getattr(self.connection_pool, "health_check", False):
+            self._start_health_checks()
         if self.sniff_on_connection_fail:
             self.create_sniff_task()
 
+    def _start_health_checks(self):
+        """
+        Wake up the task health checking dead connections in the background,
+        creating it first if needed.
+        """
+        if self.health_check_task is None or self.health_check_task.done():
+            self._health_check_event = asyncio.Event()
+            self.health_check_task = self.loop.create_task(self._health_check_loop())
+        self._health_check_event.set()
+
+    async def _health_check_loop(self):
+        while True:
+            self._health_check_event.clear()
+            # the pool can be replaced by sniffing at any time
+            pool = self.connection_pool
+            try:
+                connections = pool.get_dead_connections_to_check()
+                # check all the eligible connections in parallel
+                results = await asyncio.gather(
+                    *[
+                        self._check_health(conn, pool.health_check_timeout)
+                        for conn in connections
+                    ]
+                )
+                for connection, alive in zip(connections, results):
+                    pool.mark_checked(connection, alive)
+                next_check = pool.next_check_time()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Health checking dead connections failed")
+                next_check = time.time() + 1
+
+            # sleep until the next connection becomes eligible or until woken
+            # up by mark_dead()
+            timeout = None
+            if next_check is not None:
+                timeout = max(next_check - time.time(), 0)
+            try:
+                await asyncio.wait_for(self._health_check_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check_health(self, connection, timeout):
+        try:
+            await connection.perform_request("HEAD", "/", timeout=timeout)
+        except Exception as e:
+            logger.debug("Health check of %r failed: %s", connection, e)
+            return False
+        return True
+
+    def _start_routing_refresh(self):
+        """
+        Wake up the task refreshing the shard routing table in the background,
+        creating it first if needed.
+        """
+        if self.routing_task is None or self.routing_task.done():
+            self._routing_event = asyncio.Event()
+            self.routing_task = self.loop.create_task(self._routing_refresh_loop())
+        self._routing_event.set()
+
+    async def _routing_refresh_loop(self):
+        while True:
+            self._routing_event.clear()
+            try:
+                await self.refresh_shard_routing()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Refreshing the shard routing table failed: %s", e)
+            try:
+                await asyncio.wait_for(
+                    self._routing_event.wait(), self.shard_routing_refresh_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh_shard_routing(self):
+        """
+        Fetch the shard routing table of all the indices targeted so far by
+        single-document requests. Called periodically in the background when
+        ``shard_aware_routing`` is enabled.
+        """
+        if self.shard_router is None:
+            return
+        names = self.shard_router.names()
+        if not names:
+            return
+        node_info = await self.perform_request("GET", "/_nodes/_all/http")
+        cluster_state = await self.perform_request(
+            "GET", self._shard_routing_url(names), params=dict(_SHARD_ROUTING_PARAMS)
+        )
+        self._update_shard_routing(names, node_info, cluster_state)
+
     def get_connection(self):
         return self.connection_pool.get_connection()
 
+    async def _perform_on_connection(
+        self,
+        connection,
+        method,
+        url,
+        params,
+        body,
+        headers,
+        ignore,
+        timeout,
+        priority=None,
+        stream=False,
+    ):
+        limiter = self.concurrency_limiter
+        if limiter is not None:
+            await limiter.acquire()
+
+        # only transport errors tell about the health of the node, anything
+        # else is a problem with the request itself
+        failed = False
+        # whether the node answered, and the request tells about its latency
+        answered = overloaded = False
+        # whether the request only ends once the streamed body is released
+        deferred = False
+        in_flight = self._in_flight
+        in_flight[connection] = in_flight.get(connection, 0) + 1
+        pool = self.connection_pool
+        start = self.loop.time()
+        pool.mark_request_start(connection)
+
+        def end():
+            duration = self.loop.time() - start
+            tripped = pool.mark_request_end(connection, duration, failed)
+            # the pool marked the connection as dead itself
+            if tripped and getattr(pool, "health_check", False):
+                self._start_health_checks()
+            if limiter is not None:
+                limiter.release(duration if answered else None, overloaded)
+            count = in_flight.pop(connection) - 1
+            if count:
+                in_flight[connection] = count
+            elif connection in self._draining:
+                self._close_removed(connection)
+
+        try:
+            kwargs = {"headers": headers, "ignore": ignore, "timeout": timeout}
+            if priority is not None:
+                # only passed when set to support custom connection classes
+                kwargs["priority"] = priority
+            if stream:
+                kwargs["stream"] = True
+            result = await connection.perform_request(
+                method, url, params, body, **kwargs
+            )
+            answered = True
+            if stream and isinstance(result[2], AsyncRawResponse):
+                # the connection stays in flight until the body is released
+                result[2]._add_close_callback(end)
+                deferred = True
+            return result
+        except TransportError as e:
+            failed = _is_node_failure(e)
+            answered = not isinstance(e, (ConnectionError, PoolTimeout))
+            overloaded = isinstance(e, ConnectionTimeout) or e.status_code == 429
+            raise
+        finally:
+            if not deferred:
+                end()
+
+    async def _perform_hedged(self, connection, delay, request):
+        hedging = self.hedging
+
+        async def leg(conn):
+            start = self.loop.time()
+            result = await self._perform_on_connection(conn, *request)
+            hedging.record(self.loop.time() - start)
+            return result
+
+        legs = {self.loop.create_task(leg(connection)): connection}
+        try:
+            done, pending = await asyncio.wait(legs, timeout=delay)
+            if not done:
+                hedge = self._get_hedge_connection(connection)
+                if hedge is not None and hedging.acquire():
+                    legs[self.loop.create_task(leg(hedge))] = hedge
+                    pending = set(legs)
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+
+            while True:
+                outcomes = []
+                for task in done:
+                    error = task.exception()
+                    result = None if error else task.result()
+                    outcomes.append((legs[task], result, error))
+                # successful responses first, node failures last
+                outcomes.sort(
+                    key=lambda o: (o[2] is not None)
+                    + (isinstance(o[2], TransportError) and _is_node_failure(o[2]))
+                )
+                conn, _, error = outcome = outcomes.pop(0)
+                for other in outcomes:
+                    self._settle_hedge_leg(*other)
+                # a node failure doesn't decide the outcome while another leg
+                # is running
+                if (
+                    pending
+                    and isinstance(error, TransportError)
+                    and _is_node_failure(error)
+                ):
+                    self._settle_hedge_leg(*outcome)
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    continue
+                if error is None and conn is not connection:
+                    hedging.record_win()
+                return outcome
+        finally:
+            # the slower leg isn't needed anymore
+            for task in legs:
+                task.cancel()
+
     async def perform_request(self, method, url, headers=None, params=None, body=None):
         """
         Perform the actual request. Retrieve a connection from the connection
@@ -312,6 +701,10 @@ class AsyncTransport(Transport):
         If the operation was successful and the connection used was previously
         marked as dead, mark it as live, resetting it's failure count.
 
+        With ``request_stream=True`` in ``params`` the response isn't
+        deserialized, a :class:`~elasticsearch.AsyncRawResponse` reading its body
+        is returned instead.
+
         :arg method: HTTP method to use
         :arg url: absolute url (without host) to target
         :arg headers: dictionary of headers, will be handed over to the
@@ -323,23 +716,102 @@ class AsyncTransport(Transport):
         """
         await self._async_call()
 
-        method, headers, params, body, ignore, timeout = self._resolve_request_args(
-            method, headers, params, body
+        (
+            method,
+            headers,
+            params,
+            body,
+            ignore,
+            timeout,
+            total_timeout,
+            priority,
+            stream,
+        ) = self._resolve_request_args(method, headers, params, body)
+        request = (
+            method,
+            url,
+            params,
+            body,
+            headers,
+            ignore,
+            timeout,
+            priority,
+            stream,
+        )
+
+        # a streamed response can only be read once
+        if self.single_flight is not None and not stream:
+            key = self.single_flight.get_key(
+                method,
+                url,
+                headers,
+                params,
+                body,
+                ignore,
+                timeout,
+                total_timeout,
+                priority,
+            )
+            if key is not None:
+                return await self.single_flight.do(
+                    key, self._perform_request, request, total_timeout
+                )
+        return await self._perform_request(request, total_timeout)
+
+    async def _perform_request(self, request, total_timeout=None):
+        method, url, params = request[:3]
+        body, stream = request[3], request[8]
+        # a streamed body is consumed by sending it, it's never sent to two
+        # nodes at once and only sent again when it can be rewound
+        streamed = body is not None and _is_streamed_body(body)
+        position = _body_position(body) if streamed else None
+        hedging = self.hedging
+        hedgeable = (
+            hedging is not None
+            and not stream
+            and not streamed
+            and hedging.is_hedgeable(method, url, params)
         )
+        budget = self.retry_budget
+        if budget is not None:
+            budget.deposit()
+        deadline = None
+        if total_timeout is not None:
+            deadline = self.loop.time() + total_timeout
 
         for attempt in range(self.max_retries + 1):
-            connection = self.get_connection()
+            connection = None
+            # retries go through the connection pool as usual
+            if attempt == 0 and self.shard_router is not None:
+                connection = self._get_routed_connection(method, url, params)
+            if connection is None:
+                connection = self.get_connection()
+            if attempt and position is not None:
+                body.seek(position)
+            attempt_request = request
+            if deadline is not None:
+                attempt_request = _within_deadline(
+                    request, connection, deadline - self.loop.time()
+                )
 
             try:
-                status, headers_response, data = await connection.perform_request(
-                    method,
-                    url,
-                    params,
-                    body,
-                    headers=headers,
-                    ignore=ignore,
-                    timeout=timeout,
-                )
+                delay = hedging.get_delay() if hedgeable else None
+                if delay is None:
+                    start = self.loop.time()
+                    (
+                        status,
+                        headers_response,
+                        data,
+                    ) = await self._perform_on_connection(connection, *attempt_request)
+                    if hedgeable:
+                        hedging.record(self.loop.time() - start)
+                else:
+                    connection, result, error = await self._perform_hedged(
+                        connection, delay, attempt_request
+                    )
+                    if error is not None:
+                        raise error
+                    status, headers_response, data = result
 
                 # Lowercase all the header names for consistency in accessing them.
                 headers_response = {
@@ -349,15 +821,7 @@ class AsyncTransport(Transport):
                 if method == "HEAD" and e.status_code == 404:
                     return False
 
-                retry = False
-                if isinstance(e, ConnectionTimeout):
-                    retry = self.retry_on_timeout
-                elif isinstance(e, ConnectionError):
-                    retry = True
-                elif e.status_code in self.retry_on_status:
-                    retry = True
-
-                if retry:
+                if self._should_retry(e):
                     try:
                         # only mark as dead if we are retrying
                         self.mark_dead(connection)
@@ -368,6 +832,15 @@ class AsyncTransport(Transport):
                     # raise exception on last retry
                     if attempt == self.max_retries:
                         raise e
+                    # or when the streamed body can't be sent again
+                    if streamed and position is None:
+                        raise e
+                    # or once the total timeout is over
+                    if deadline is not None and self.loop.time() >= deadline:
+                        raise e
+                    # or when the retry budget is exhausted
+                    if budget is not None and not budget.withdraw():
+                        raise e
                 else:
                     raise e
 
@@ -378,6 +851,8 @@ class AsyncTransport(Transport):
                 if method == "HEAD":
                     return 200 <= status < 300
 
+                if stream:
+                    return data
                 if data:
                     data = self.deserializer.loads(
                         data, headers_response.get("content-type")
@@ -396,5 +871,46 @@ class AsyncTransport(Transport):
                 pass
             self.sniffing_task = None
 
-        for connection in self.connection_pool.connections:
+        if self.health_check_task:
+            try:
+                self.health_check_task.cancel()
+                await self.health_check_task
+            except asyncio.CancelledError:
+                pass
+            self.health_check_task = None
+
+        if self.routing_task:
+            try:
+                self.routing_task.cancel()
+                await self.routing_task
+            except asyncio.CancelledError:
+                pass
+            self.routing_task = None
+
+        if self.resolve_task:
+            try:
+                self.resolve_task.cancel()
+                await self.resolve_task
+            except asyncio.CancelledError:
+                pass
+            self.resolve_task = None
+
+        for task in list(self._warm_up_tasks):
+            task.cancel()
+        if self._warm_up_tasks:
+            await asyncio.gather(*self._warm_up_tasks, return_exceptions=True)
+
+        live = self.connection_pool.connections
+        for connection in live:
+            await connection.close()
+        # the seed connections removed from the pool are kept for sniffing
+        for connection in self.seed_connections:
+            if connection not in live:
+                await connection.close()
+
+        # connections removed from the pool while requests were in flight
+        draining, self._draining = self._draining, set()
+        for connection in draining:
             await connection.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
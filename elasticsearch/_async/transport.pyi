@@ -17,9 +17,15 @@
 
 from typing import Any, Callable, Collection, Dict, List, Mapping, Optional, Type, Union
 
+from ..budget import RetryBudget
 from ..connection import Connection
 from ..connection_pool import ConnectionPool
+from ..hedging import Hedging
+from ..resolver import DNSResolver
+from ..routing import ShardRouter
 from ..serializer import Deserializer, Serializer
+from .concurrency import AdaptiveConcurrencyLimiter
+from .singleflight import AsyncSingleFlight
 
 class AsyncTransport(object):
     DEFAULT_CONNECTION_CLASS: Type[Connection]
@@ -27,6 +33,8 @@ class AsyncTransport(object):
     deserializer: Deserializer
 
     max_retries: int
+    retry_budget: Optional[RetryBudget]
+    single_flight: Optional[AsyncSingleFlight]
     retry_on_timeout: bool
     retry_on_status: Collection[int]
     send_get_body_as: str
@@ -41,6 +49,11 @@ class AsyncTransport(object):
     sniff_on_connection_fail: bool
     last_sniff: float
     sniff_timeout: Optional[float]
+    shard_router: Optional[ShardRouter]
+    shard_routing_refresh_interval: float
+    hedging: Optional[Hedging]
+    resolver: Optional[DNSResolver]
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter]
     host_info_callback: Callable[
         [Dict[str, Any], Optional[Dict[str, Any]]], Dict[str, Any]
     ]
@@ -63,13 +76,28 @@ class AsyncTransport(object):
         retry_on_status: Collection[int] = ...,
         retry_on_timeout: bool = ...,
         send_get_body_as: str = ...,
+        shard_aware_routing: bool = ...,
+        shard_routing_refresh_interval: float = ...,
+        hedge_delay: Optional[float] = ...,
+        hedge_percentile: Optional[float] = ...,
+        hedge_max_ratio: float = ...,
+        retry_budget: Optional[Union[float, RetryBudget]] = ...,
+        concurrency_limiter: Union[bool, AdaptiveConcurrencyLimiter, None] = ...,
+        single_flight: Union[bool, AsyncSingleFlight, None] = ...,
+        resolve_dns: Union[bool, DNSResolver, None] = ...,
+        shared_ssl_context: bool = ...,
+        warm_up_on_sniff: int = ...,
         **kwargs: Any
     ) -> None: ...
     def add_connection(self, host: Any) -> None: ...
     def set_connections(self, hosts: Collection[Any]) -> None: ...
     def get_connection(self) -> Connection: ...
+    async def resolve_hosts(self) -> None: ...
+    def create_resolve_task(self) -> None: ...
     def sniff_hosts(self, initial: bool = ...) -> None: ...
+    async def warm_up(self, connections_per_node: int = ...) -> int: ...
     def mark_dead(self, connection: Connection) -> None: ...
+    async def refresh_shard_routing(self) -> None: ...
     async def perform_request(
         self,
         method: str,
@@ -0,0 +1,78 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import threading
+
+
+class RetryBudget(object):
+    """
+    Token bucket limiting the number of retries to a ratio of the requests,
+    so that a degraded cluster doesn't get hammered with retries.
+
+    Every request adds ``ratio`` tokens to the bucket, up to ``burst``, and
+    every retry takes one. When the bucket is empty the error is raised
+    instead of being retried. The bucket starts full so that a client sending
+    few requests can still retry occasionally.
+
+    A single instance can be shared between several clients (by passing it as
+    ``retry_budget``) to apply one budget to all of them.
+
+    :arg ratio: maximum ratio of retries to requests, defaults to 0.1
+    :arg burst: maximum number of retries available at once, defaults to 10
+    """
+
+    def __init__(self, ratio=0.1, burst=10):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+        #: number of requests
+        self.requests = 0
+        #: number of retries allowed
+        self.retries = 0
+        #: number of retries denied because the budget was exhausted
+        self.denied = 0
+
+    def deposit(self):
+        """Record a new request."""
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self._tokens + self.ratio, self.burst)
+
+    def withdraw(self):
+        """
+        Take a token to retry a request, returns ``False`` if the budget is
+        exhausted.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                self.denied += 1
+                return False
+            self._tokens -= 1
+            self.retries += 1
+            return True
+
+    def stats(self):
+        """Returns the counters of the budget as a dict."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "denied": self.denied,
+                "tokens": self._tokens,
+            }
@@ -32,6 +32,9 @@ def _normalize_hosts(hosts):
     """
     Helper function to transform hosts argument to
     :class:`~elasticsearch.Elasticsearch` to a list of dicts.
+
+    ``http+unix://`` urls designate a Unix domain socket by their
+    percent-encoded path, e.g. ``http+unix://%2Frun%2Fproxy.sock/prefix``.
     """
     # if hosts are empty, just defer to defaults down the line
     if hosts is None:
@@ -49,6 +52,9 @@ def _normalize_hosts(hosts):
                 host = "//%s" % host
 
             parsed_url = urlparse(host)
+            if parsed_url.scheme == "http+unix":
+                out.append(_normalize_unix_socket_url(parsed_url))
+                continue
             h = {"host": parsed_url.hostname}
 
             if parsed_url.port:
@@ -73,6 +79,18 @@ def _normalize_hosts(hosts):
     return out
 
 
+def _normalize_unix_socket_url(parsed_url):
+    # the netloc is the socket's path, which the hostname would lowercase
+    auth, _, path = parsed_url.netloc.rpartition("@")
+    h = {"host": "localhost", "unix_socket": unquote(path)}
+    if auth:
+        username, _, password = auth.partition(":")
+        h["http_auth"] = "%s:%s" % (unquote(username), unquote(password))
+    if parsed_url.path and parsed_url.path != "/":
+        h["url_prefix"] = parsed_url.path
+    return h
+
+
 def _escape(value):
     """
     Escape a single value of a URL string or a query parameter. If it is a list
@@ -161,8 +179,14 @@ def query_params(*es_query_params):
                     if v is not None:
                         params[p] = _escape(v)
 
-            # don't treat ignore, request_timeout, and opaque_id as other params to avoid escaping
-            for p in ("ignore", "request_timeout"):
+            # don't treat ignore, request_timeout, total_timeout, request_priority, request_stream, and opaque_id as other params to avoid escaping
+            for p in (
+                "ignore",
+                "request_timeout",
+                "total_timeout",
+                "request_priority",
+                "request_stream",
+            ):
                 if p in kwargs:
                     params[p] = kwargs.pop(p)
             return func(*args, params=params, headers=headers, **kwargs)
@@ -39,6 +39,7 @@ SKIP_IN_PATH: Collection[Any]
 def _normalize_hosts(
     hosts: Optional[Union[str, Collection[Union[str, Dict[str, Any]]]]]
 ) -> List[Dict[str, Any]]: ...
+def _normalize_unix_socket_url(parsed_url: Any) -> Dict[str, Any]: ...
 def _escape(value: Any) -> str: ...
 def _make_path(*parts: Any) -> str: ...
 
@@ -24,7 +24,7 @@ if PY2:
     from itertools import imap as map
     from urllib import quote, quote_plus, unquote, urlencode
 
-    from Queue import Queue
+    from Queue import Empty, Queue
     from urlparse import urlparse
 
     def to_str(x, encoding="ascii"):
@@ -39,7 +39,7 @@ else:
     from urllib.parse import quote, quote_plus, unquote, urlencode, urlparse
 
     map = map
-    from queue import Queue
+    from queue import Empty, Queue
 
     def to_str(x, encoding="ascii"):
         if not isinstance(x, str):
@@ -58,6 +58,12 @@ except ImportError:
     from collections import Mapping
 
 
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2: the wall clock
+    from time import time as monotonic
+
 try:
     reraise_exceptions = (RecursionError,)
 except NameError:
@@ -73,6 +79,7 @@ except (ImportError, AttributeError):
 
 __all__ = [
     "string_types",
+    "monotonic",
     "reraise_exceptions",
     "quote_plus",
     "quote",
@@ -80,6 +87,7 @@ __all__ = [
     "unquote",
     "urlparse",
     "map",
+    "Empty",
     "Queue",
     "Mapping",
 ]
@@ -24,6 +24,7 @@ string_types: Tuple[type, ...]
 to_str: Callable[[Union[str, bytes]], str]
 to_bytes: Callable[[Union[str, bytes]], bytes]
 reraise_exceptions: Tuple[Type[Exception], ...]
+monotonic: Callable[[], float]
 
 if sys.version_info[0] == 2:
     from itertools import imap as map
@@ -32,6 +33,7 @@ if sys.version_info[0] == 2:
     from urllib import unquote as unquote
     from urllib import urlencode as urlencode
 
+    from Queue import Empty as Empty
     from Queue import Queue as Queue
     from urlparse import urlparse as urlparse
 else:
@@ -42,4 +44,5 @@ else:
     from urllib.parse import urlparse as urlparse
 
     map = map
+    from queue import Empty as Empty
     from queue import Queue as Queue
@@ -15,13 +15,18 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
-from .base import Connection
+from .base import Connection, RawResponse
+from .http_httpx import HttpxHttpConnection
 from .http_requests import RequestsHttpConnection
+from .http_stdlib import StdlibHttpConnection
 from .http_urllib3 import Urllib3HttpConnection, create_ssl_context
 
 __all__ = [
     "Connection",
+    "HttpxHttpConnection",
+    "RawResponse",
     "RequestsHttpConnection",
+    "StdlibHttpConnection",
     "Urllib3HttpConnection",
     "create_ssl_context",
 ]
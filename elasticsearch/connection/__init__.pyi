@@ -16,6 +16,9 @@
 #  under the License.
 
 from .base import Connection as Connection
+from .base import RawResponse as RawResponse
+from .http_httpx import HttpxHttpConnection as HttpxHttpConnection
 from .http_requests import RequestsHttpConnection as RequestsHttpConnection
+from .http_stdlib import StdlibHttpConnection as StdlibHttpConnection
 from .http_urllib3 import Urllib3HttpConnection as Urllib3HttpConnection
 from .http_urllib3 import create_ssl_context as create_ssl_context
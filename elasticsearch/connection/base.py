@@ -36,6 +36,7 @@ from ..exceptions import (
     ImproperlyConfigured,
     TransportError,
 )
+from .tls import create_client_ssl_context
 
 logger = logging.getLogger("elasticsearch")
 
@@ -48,6 +49,15 @@ if not _tracer_already_configured:
 
 _WARNING_RE = re.compile(r"\"([^\"]*)\"")
 
+CA_CERTS = None
+
+try:
+    import certifi
+
+    CA_CERTS = certifi.where()
+except ImportError:
+    pass
+
 
 class Connection(object):
     """
@@ -66,6 +76,11 @@ class Connection(object):
     :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
     :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
         For tracing all requests made by this transport.
+    :arg unix_socket: path of a Unix domain socket to send the requests to
+        instead of ``host`` and ``port`` (e.g. a local proxy), ``host`` is
+        then only sent in the ``Host`` header
+    :arg server_hostname: hostname to verify the TLS certificate against
+        (and to send in the SNI extension) when ``host`` is an IP address
     """
 
     HTTP_CLIENT_META = None
@@ -83,6 +98,8 @@ class Connection(object):
         api_key=None,
         opaque_id=None,
         meta_header=True,
+        unix_socket=None,
+        server_hostname=None,
         **kwargs
     ):
 
@@ -142,7 +159,14 @@ class Connection(object):
         if use_ssl or scheme == "https":
             scheme = "https"
             use_ssl = True
+        if unix_socket and use_ssl:
+            raise ImproperlyConfigured(
+                "TLS isn't supported over a Unix domain socket, "
+                "use_ssl can't be set with unix_socket."
+            )
         self.use_ssl = use_ssl
+        self.unix_socket = unix_socket
+        self.server_hostname = server_hostname
         self.http_compress = http_compress or False
 
         self.scheme = scheme
@@ -180,6 +204,28 @@ class Connection(object):
             f.write(body)
         return buf.getvalue()
 
+    def _create_ssl_context(
+        self, verify_certs, ssl_show_warn, ca_certs, client_cert, client_key
+    ):
+        """
+        Returns an :class:`ssl.SSLContext` built from the SSL options shared by
+        the connection classes which take a context, resuming the TLS sessions
+        of the previous sockets.
+        """
+        if verify_certs:
+            ca_certs = ca_certs or CA_CERTS
+        elif ssl_show_warn:
+            warnings.warn(
+                "Connecting to %s using SSL with verify_certs=False is insecure."
+                % self.host
+            )
+        return create_client_ssl_context(
+            verify_certs=verify_certs,
+            ca_certs=ca_certs,
+            client_cert=client_cert,
+            client_key=client_key,
+        )
+
     def _raise_warnings(self, warning_headers):
         """If 'headers' contains a 'Warning' header raise
         the warnings to be seen by the user. Takes an iterable
@@ -250,9 +296,22 @@ class Connection(object):
         timeout=None,
         ignore=(),
         headers=None,
+        priority=None,
+        stream=False,
     ):
         raise NotImplementedError()
 
+    def warm_up(self, count=1):
+        """
+        Make sure ``count`` connections to the node are open (including their
+        TLS handshake) and idle, ahead of the requests. Returns the number of
+        connections opened, always ``0`` for the connection classes which
+        can't do it.
+
+        :arg count: number of connections, at most the size of the pool
+        """
+        return 0
+
     def log_request_success(
         self, method, full_url, path, body, status_code, response, duration
     ):
@@ -344,3 +403,81 @@ class Connection(object):
             s = "{0}:{1}".format(api_key[0], api_key[1]).encode("utf-8")
             return "ApiKey " + binascii.b2a_base64(s).rstrip(b"\r\n").decode("utf-8")
         return "ApiKey " + api_key
+
+
+class RawResponse(object):
+    """
+    Body of a response to a request sent with ``request_stream=True``, read
+    incrementally as undecoded bytes instead of being loaded in memory and
+    deserialized. Close it (or use it as a context manager) once done with it,
+    the connection goes back to the pool once the body has been read to the
+    end and is closed otherwise.
+
+    :arg status: HTTP status code of the response
+    :arg headers: headers of the response
+    :arg read: function returning the next ``amt`` bytes of the body (all the
+        remaining bytes if ``amt`` is ``None``), ``b""`` at the end of it
+    :arg close: function releasing the connection, called once
+    """
+
+    #: size of the chunks returned when iterating over the response
+    chunk_size = 64 * 1024
+
+    def __init__(self, status, headers, read, close):
+        self.status = status
+        self.headers = {name.lower(): value for name, value in headers.items()}
+        self._read = read
+        self._close = close
+        self.closed = False
+
+    @property
+    def content_type(self):
+        return self.headers.get("content-type")
+
+    def read(self, amt=None):
+        """
+        Read up to ``amt`` bytes of the body, all of it if ``amt`` is
+        ``None``. Returns ``b""`` at the end of the body.
+        """
+        if self.closed:
+            raise ValueError("I/O operation on closed response")
+        data = self._read(amt)
+        if amt is None or not data:
+            # the whole body has been read, release the connection now
+            self.close()
+        return data
+
+    def __iter__(self):
+        while not self.closed:
+            chunk = self.read(self.chunk_size)
+            if chunk:
+                yield chunk
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._close()
+
+    def _add_close_callback(self, callback):
+        # called once the connection has been released
+        if self.closed:
+            callback()
+            return
+        close = self._close
+
+        def close_and_callback():
+            try:
+                close()
+            finally:
+                callback()
+
+        self._close = close_and_callback
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __repr__(self):
+        return "<RawResponse: %s %s>" % (self.status, self.content_type)
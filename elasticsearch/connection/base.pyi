@@ -16,10 +16,13 @@
 #  under the License.
 
 import logging
+import ssl
 from typing import (
     Any,
+    Callable,
     Collection,
     Dict,
+    Iterator,
     List,
     Mapping,
     MutableMapping,
@@ -44,6 +47,8 @@ class Connection(object):
     url_prefix: str
     timeout: Optional[Union[float, int]]
     meta_header: bool
+    unix_socket: Optional[str]
+    server_hostname: Optional[str]
     def __init__(
         self,
         host: str = ...,
@@ -57,12 +62,22 @@ class Connection(object):
         api_key: Optional[Union[Tuple[str, str], List[str], str]] = ...,
         opaque_id: Optional[str] = ...,
         meta_header: bool = ...,
+        unix_socket: Optional[str] = ...,
+        server_hostname: Optional[str] = ...,
         **kwargs: Any
     ) -> None: ...
     def __repr__(self) -> str: ...
     def __eq__(self, other: object) -> bool: ...
     def __hash__(self) -> int: ...
     def _gzip_compress(self, body: bytes) -> bytes: ...
+    def _create_ssl_context(
+        self,
+        verify_certs: bool,
+        ssl_show_warn: bool,
+        ca_certs: Optional[str],
+        client_cert: Optional[str],
+        client_key: Optional[str],
+    ) -> ssl.SSLContext: ...
     def _raise_warnings(self, warning_headers: Sequence[str]) -> None: ...
     def _pretty_json(self, data: Any) -> str: ...
     def _log_trace(
@@ -83,7 +98,10 @@ class Connection(object):
         timeout: Optional[Union[int, float]] = ...,
         ignore: Collection[int] = ...,
         headers: Optional[MutableMapping[str, str]] = ...,
-    ) -> Tuple[int, Mapping[str, str], str]: ...
+        priority: Optional[str] = ...,
+        stream: bool = ...,
+    ) -> Tuple[int, Mapping[str, str], Union[str, RawResponse]]: ...
+    def warm_up(self, count: int = ...) -> int: ...
     def log_request_success(
         self,
         method: str,
@@ -108,3 +126,23 @@ class Connection(object):
     def _raise_error(self, status_code: int, raw_data: str) -> NoReturn: ...
     def _get_default_user_agent(self) -> str: ...
     def _get_api_key_header_val(self, api_key: Any) -> str: ...
+
+class RawResponse(object):
+    chunk_size: int
+    status: int
+    headers: Dict[str, str]
+    closed: bool
+    def __init__(
+        self,
+        status: int,
+        headers: Mapping[str, str],
+        read: Callable[[Optional[int]], bytes],
+        close: Callable[[], Any],
+    ) -> None: ...
+    @property
+    def content_type(self) -> Optional[str]: ...
+    def read(self, amt: Optional[int] = ...) -> bytes: ...
+    def __iter__(self) -> Iterator[bytes]: ...
+    def close(self) -> None: ...
+    def __enter__(self) -> "RawResponse": ...
+    def __exit__(self, *_: Any) -> None: ...
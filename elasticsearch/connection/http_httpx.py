@@ -0,0 +1,344 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import ssl
+import threading
+import time
+import zlib
+
+from ..compat import reraise_exceptions, string_types, urlencode
+from ..exceptions import (
+    ConnectionError,
+    ConnectionTimeout,
+    ImproperlyConfigured,
+    PoolTimeout,
+    SSLError,
+)
+from ..utils import _client_meta_version
+from .base import Connection
+
+try:
+    import httpx
+
+    HTTPX_AVAILABLE = True
+    _HTTPX_META_VERSION = _client_meta_version(httpx.__version__)
+except ImportError:
+    HTTPX_AVAILABLE = False
+    _HTTPX_META_VERSION = ""
+
+
+def _with_unix_socket(kwargs, transport_class):
+    """
+    Returns the arguments of an httpx client, its transport connected to the
+    Unix domain socket ``uds`` when set.
+    """
+    uds = kwargs.pop("uds", None)
+    if uds is not None and "transport" not in kwargs:
+        kwargs["transport"] = transport_class(
+            uds=uds,
+            verify=kwargs["verify"],
+            http1=kwargs["http1"],
+            http2=kwargs["http2"],
+            limits=kwargs["limits"],
+        )
+    return kwargs
+
+
+def _iter_chunks(body, chunk_size=65536):
+    if hasattr(body, "read"):
+        return iter(lambda: body.read(chunk_size), b"")
+    return body
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class HttpxHttpConnection(Connection):
+    """
+    Connection using the `httpx` library, speaking HTTP/2 with the nodes (or
+    the TLS-terminating proxy in front of them) which support it. Concurrent
+    requests are then multiplexed over a few connections instead of needing a
+    connection each.
+
+    HTTP/2 is negotiated during the TLS handshake (ALPN), plain HTTP and
+    servers which don't support it get HTTP/1.1. Set ``http1=False`` to speak
+    HTTP/2 to a server without TLS (h2c).
+
+    Besides bytes, the body of a request can be an iterable of bytes or a file
+    object opened in binary mode, it's then streamed to the node (compressed
+    on the fly with ``http_compress``) instead of being read in memory first.
+
+    :arg host: hostname of the node (default: localhost)
+    :arg port: port to use (integer, default: 9200)
+    :arg url_prefix: optional url prefix for elasticsearch
+    :arg timeout: default timeout in seconds (float, default: 10)
+    :arg http_auth: optional http auth information as either ':' separated
+        string or a tuple
+    :arg use_ssl: use ssl for the connection if `True`
+    :arg verify_certs: whether to verify SSL certificates
+    :arg ssl_show_warn: show warning when verify certs is disabled
+    :arg ca_certs: optional path to CA bundle.
+    :arg client_cert: path to the file containing the private key and the
+        certificate, or cert only if using client_key
+    :arg client_key: path to the file containing the private key if using
+        separate cert and key files (client_cert will contain only the cert)
+    :arg ssl_context: :class:`ssl.SSLContext` to use instead of the other SSL
+        options
+    :arg maxsize: the maximum number of connections opened to this host, each
+        of them carries many concurrent requests with HTTP/2. Requests wait
+        for a free connection when all of them are in use.
+    :arg pool_timeout: number of seconds to wait for a free connection,
+        defaults to the timeout of the request
+    :arg keepalive_maxsize: the number of idle connections kept open, defaults
+        to ``maxsize``
+    :arg keepalive_expiry: number of seconds after which an idle connection is
+        closed, defaults to 5
+    :arg http2: negotiate HTTP/2 (requires the ``h2`` package, installed with
+        ``httpx[http2]``), defaults to ``True``. The requests of this class
+        then go through an event loop in a background thread, which costs
+        several times the CPU time per request of HTTP/1.1.
+    :arg http1: allow HTTP/1.1, defaults to ``True``
+    :arg unix_socket: path of a Unix domain socket to send the requests to
+        instead of ``host`` and ``port``
+    :arg headers: any custom http headers to be add to requests
+    :arg http_compress: Use gzip compression
+    :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
+        Other host connection params will be ignored.
+    :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
+    :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
+        For tracing all requests made by this transport.
+    """
+
+    HTTP_CLIENT_META = ("hx", _HTTPX_META_VERSION)
+
+    def __init__(
+        self,
+        host="localhost",
+        port=None,
+        http_auth=None,
+        use_ssl=False,
+        verify_certs=True,
+        ssl_show_warn=True,
+        ca_certs=None,
+        client_cert=None,
+        client_key=None,
+        ssl_context=None,
+        maxsize=10,
+        pool_timeout=None,
+        keepalive_maxsize=None,
+        keepalive_expiry=5.0,
+        http2=True,
+        http1=True,
+        headers=None,
+        http_compress=None,
+        cloud_id=None,
+        api_key=None,
+        opaque_id=None,
+        **kwargs
+    ):
+        if not HTTPX_AVAILABLE:
+            raise ImproperlyConfigured(
+                "Please install httpx to use %s." % self.__class__.__name__
+            )
+
+        super(HttpxHttpConnection, self).__init__(
+            host=host,
+            port=port,
+            use_ssl=use_ssl,
+            headers=headers,
+            http_compress=http_compress,
+            cloud_id=cloud_id,
+            api_key=api_key,
+            opaque_id=opaque_id,
+            **kwargs
+        )
+
+        if http_auth is not None:
+            if isinstance(http_auth, (tuple, list)):
+                http_auth = tuple(http_auth)
+            elif isinstance(http_auth, string_types):
+                http_auth = tuple(http_auth.split(":", 1))
+
+        if ssl_context is None and self.use_ssl:
+            ssl_context = self._create_ssl_context(
+                verify_certs, ssl_show_warn, ca_certs, client_cert, client_key
+            )
+
+        if keepalive_maxsize is None:
+            keepalive_maxsize = maxsize
+        self.http2 = http2
+        self.maxsize = maxsize
+        self.pool_timeout = pool_timeout
+        # set by _create_client() for the synchronous HTTP/1.1 client only
+        self._slots = None
+        client_kwargs = {"uds": self.unix_socket} if self.unix_socket else {}
+        self.client = self._create_client(
+            auth=http_auth,
+            verify=ssl_context if ssl_context is not None else True,
+            http1=http1,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=maxsize,
+                max_keepalive_connections=keepalive_maxsize,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=self._get_timeout(self.timeout),
+            headers=self.headers,
+            **client_kwargs
+        )
+        if not self.http_compress:
+            # httpx asks for compressed responses by default
+            self.client.headers.pop("accept-encoding", None)
+
+    def _create_client(self, **kwargs):
+        if kwargs["http2"]:
+            # httpx can't share HTTP/2 connections between threads safely, the
+            # requests are sent by an AsyncClient on a background event loop
+            from .._async._threaded_client import ThreadedHttpxClient
+
+            return ThreadedHttpxClient(**kwargs)
+        # requests of the threads waiting for a connection of httpx.Client's
+        # pool sometimes get a socket closed by another thread, they wait here
+        self._slots = threading.BoundedSemaphore(self.maxsize)
+        return httpx.Client(**_with_unix_socket(kwargs, httpx.HTTPTransport))
+
+    def _get_timeout(self, timeout):
+        if self.pool_timeout is None:
+            return timeout
+        return httpx.Timeout(timeout, pool=self.pool_timeout)
+
+    def _get_pool_wait(self, timeout):
+        if self.pool_timeout is not None:
+            return self.pool_timeout
+        # the timeout of the request, None when there's none blocks until a
+        # connection is free
+        return timeout if timeout is not None else self.timeout
+
+    def _compress(self, body):
+        if isinstance(body, bytes):
+            return self._gzip_compress(body)
+        return _gzip_chunks(_iter_chunks(body))
+
+    def _prepare_request(self, url, params, body, timeout, headers):
+        """
+        Returns the path, the full url and the keyword arguments of the
+        request, shared with :class:`~elasticsearch.AsyncHttpxHttpConnection`.
+        """
+        url = self.url_prefix + url
+        if params:
+            url = "%s?%s" % (url, urlencode(params))
+        if self.http_compress and body:
+            body = self._compress(body)
+            headers = dict(headers or ())
+            headers["content-encoding"] = "gzip"
+        elif hasattr(body, "read"):
+            body = _iter_chunks(body)
+        kw = {"content": body, "headers": headers}
+        if self.use_ssl and self.server_hostname:
+            kw["extensions"] = {"sni_hostname": self.server_hostname}
+        if timeout is not None:
+            kw["timeout"] = self._get_timeout(timeout)
+        return url, self.host + url, kw
+
+    def _wrap_error(self, e):
+        if isinstance(e, httpx.PoolTimeout):
+            return PoolTimeout("POOL_TIMEOUT", str(e), e)
+        if isinstance(e, httpx.TimeoutException):
+            return ConnectionTimeout("TIMEOUT", str(e), e)
+        if isinstance(e, ssl.SSLError) or isinstance(e.__context__, ssl.SSLError):
+            return SSLError("N/A", str(e), e)
+        return ConnectionError("N/A", str(e), e)
+
+    def _process_response(
+        self, method, full_url, url, orig_body, response, duration, ignore
+    ):
+        raw_data = response.content.decode("utf-8", "surrogatepass")
+
+        # raise warnings if any from the 'Warnings' header.
+        self._raise_warnings(response.headers.get_list("warning"))
+
+        # raise errors based on http status codes, let the client handle those if needed
+        status = response.status_code
+        if not (200 <= status < 300) and status not in ignore:
+            self.log_request_fail(
+                method, full_url, url, orig_body, duration, status, raw_data
+            )
+            self._raise_error(status, raw_data)
+
+        self.log_request_success(
+            method, full_url, url, orig_body, status, raw_data, duration
+        )
+
+        return status, response.headers, raw_data
+
+    def perform_request(
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+        priority=None,
+        stream=False,
+    ):
+        if stream:
+            raise ImproperlyConfigured(
+                "%s doesn't support request_stream, use Urllib3HttpConnection "
+                "or RequestsHttpConnection." % self.__class__.__name__
+            )
+        url, full_url, kw = self._prepare_request(url, params, body, timeout, headers)
+
+        start = time.time()
+        slots = self._slots
+        try:
+            if slots is not None and not slots.acquire(
+                timeout=self._get_pool_wait(timeout)
+            ):
+                raise httpx.PoolTimeout("Timed out waiting for a free connection.")
+            try:
+                response = self.client.request(method, full_url, **kw)
+            finally:
+                if slots is not None:
+                    slots.release()
+            duration = time.time() - start
+        except reraise_exceptions:
+            raise
+        except Exception as e:
+            self.log_request_fail(
+                method, full_url, url, body, time.time() - start, exception=e
+            )
+            if isinstance(e, (httpx.TransportError, OSError)):
+                raise self._wrap_error(e)
+            raise
+
+        return self._process_response(
+            method, full_url, url, body, response, duration, ignore
+        )
+
+    def close(self):
+        """
+        Explicitly closes connections
+        """
+        self.client.close()
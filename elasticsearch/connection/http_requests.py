@@ -15,6 +15,7 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import functools
 import time
 import warnings
 
@@ -25,14 +26,60 @@ from ..exceptions import (
     ImproperlyConfigured,
     SSLError,
 )
-from ..utils import _client_meta_version
-from .base import Connection
+from ..utils import _client_meta_version, _socket_options
+from .base import Connection, RawResponse
+from .http_urllib3 import _pool_classes, _release_response, _UnixHTTPConnectionPool
 
 try:
     import requests
 
     REQUESTS_AVAILABLE = True
     _REQUESTS_META_VERSION = _client_meta_version(requests.__version__)
+
+    class _UnixSocketAdapter(requests.adapters.HTTPAdapter):
+        """Sends all the requests of a session to a Unix domain socket."""
+
+        def __init__(self, unix_socket, maxsize=10, pool_attrs=None):
+            super(_UnixSocketAdapter, self).__init__(pool_maxsize=maxsize)
+            self.pool = _UnixHTTPConnectionPool(
+                "localhost", maxsize=maxsize, unix_socket=unix_socket
+            )
+            for name, value in (pool_attrs or {}).items():
+                setattr(self.pool, name, value)
+
+        def get_connection(self, url, proxies=None):
+            return self.pool
+
+        def get_connection_with_tls_context(
+            self, request, verify, proxies=None, cert=None
+        ):
+            return self.pool
+
+        def close(self):
+            super(_UnixSocketAdapter, self).close()
+            self.pool.close()
+
+    class _PoolOptionsAdapter(requests.adapters.HTTPAdapter):
+        """
+        Passes extra options to the connection pools: ``pool_kwargs`` (e.g.
+        ``server_hostname`` to verify the certificates against, or
+        ``socket_options``) and ``pool_attrs``, the settings of the pool
+        classes of :mod:`elasticsearch.connection.http_urllib3`.
+        """
+
+        def __init__(self, pool_kwargs=None, pool_attrs=None):
+            self.pool_kwargs = pool_kwargs or {}
+            self.pool_attrs = pool_attrs
+            super(_PoolOptionsAdapter, self).__init__()
+
+        def init_poolmanager(self, *args, **kwargs):
+            kwargs.update(self.pool_kwargs)
+            super(_PoolOptionsAdapter, self).init_poolmanager(*args, **kwargs)
+            if self.pool_attrs:
+                self.poolmanager.pool_classes_by_scheme = _pool_classes(
+                    **self.pool_attrs
+                )
+
 except ImportError:
     REQUESTS_AVAILABLE = False
     _REQUESTS_META_VERSION = ""
@@ -60,6 +107,16 @@ class RequestsHttpConnection(Connection):
     :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
     :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
         For tracing all requests made by this transport.
+    :arg unix_socket: path of a Unix domain socket to send the requests to
+        instead of ``host`` and ``port``
+    :arg tcp_nodelay: disable Nagle's algorithm on the sockets (default:
+        ``True``)
+    :arg tcp_keepalive: enable TCP keep-alive probes on the sockets, see
+        :class:`~elasticsearch.Urllib3HttpConnection`
+    :arg idle_timeout: close the connections idle for more than this number
+        of seconds instead of reusing them
+    :arg max_connection_age: close the connections open for more than this
+        number of seconds (minus up to 10%, at random) once they are released
     """
 
     HTTP_CLIENT_META = ("rq", _REQUESTS_META_VERSION)
@@ -80,12 +137,21 @@ class RequestsHttpConnection(Connection):
         cloud_id=None,
         api_key=None,
         opaque_id=None,
+        tcp_nodelay=True,
+        tcp_keepalive=None,
+        idle_timeout=None,
+        max_connection_age=None,
         **kwargs
     ):
         if not REQUESTS_AVAILABLE:
             raise ImproperlyConfigured(
                 "Please install requests to use RequestsHttpConnection."
             )
+        if kwargs.pop("ssl_context", None) is not None:
+            warnings.warn(
+                "RequestsHttpConnection doesn't support ssl_context, it's ignored. "
+                "Use the verify_certs, ca_certs, client_cert and client_key options."
+            )
 
         # Initialize Session so .headers works before calling super().__init__().
         self.session = requests.Session()
@@ -119,6 +185,30 @@ class RequestsHttpConnection(Connection):
             self.host,
             self.url_prefix,
         )
+        pool_attrs = {}
+        if idle_timeout is not None or max_connection_age is not None:
+            pool_attrs = {
+                "idle_timeout": idle_timeout,
+                "max_connection_age": max_connection_age,
+            }
+        if self.unix_socket:
+            self.session.mount(
+                self.host, _UnixSocketAdapter(self.unix_socket, pool_attrs=pool_attrs)
+            )
+            # proxies from the environment don't apply to a local socket
+            self.session.trust_env = False
+        else:
+            pool_kwargs = {}
+            if self.use_ssl and self.server_hostname:
+                pool_kwargs["server_hostname"] = self.server_hostname
+            if tcp_keepalive or not tcp_nodelay:
+                pool_kwargs["socket_options"] = _socket_options(
+                    tcp_nodelay, tcp_keepalive
+                )
+            if pool_kwargs or pool_attrs:
+                self.session.mount(
+                    self.host, _PoolOptionsAdapter(pool_kwargs, pool_attrs)
+                )
         self.session.verify = verify_certs
         if not client_key:
             self.session.cert = client_cert
@@ -142,7 +232,16 @@ class RequestsHttpConnection(Connection):
             )
 
     def perform_request(
-        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+        priority=None,
+        stream=False,
     ):
         url = self.base_url + url
         headers = headers or {}
@@ -158,14 +257,19 @@ class RequestsHttpConnection(Connection):
         request = requests.Request(method=method, headers=headers, url=url, data=body)
         prepared_request = self.session.prepare_request(request)
         settings = self.session.merge_environment_settings(
-            prepared_request.url, {}, None, None, None
+            prepared_request.url, {}, stream, None, None
         )
         send_kwargs = {"timeout": timeout or self.timeout}
         send_kwargs.update(settings)
         try:
             response = self.session.send(prepared_request, **send_kwargs)
             duration = time.time() - start
-            raw_data = response.content.decode("utf-8", "surrogatepass")
+            status = response.status_code
+            if stream and (200 <= status < 300 or status in ignore):
+                # read by the caller
+                raw_data = None
+            else:
+                raw_data = response.content.decode("utf-8", "surrogatepass")
         except reraise_exceptions:
             raise
         except Exception as e:
@@ -215,6 +319,13 @@ class RequestsHttpConnection(Connection):
             duration,
         )
 
+        if stream:
+            raw_data = RawResponse(
+                response.status_code,
+                response.headers,
+                functools.partial(response.raw.read, decode_content=True),
+                functools.partial(_release_response, response.raw),
+            )
         return response.status_code, response.headers, raw_data
 
     @property
@@ -15,11 +15,11 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
-from typing import Any, Mapping, Optional
+from typing import Any, Collection, Mapping, MutableMapping, Optional, Tuple, Union
 
 import requests
 
-from .base import Connection
+from .base import Connection, RawResponse
 
 class RequestsHttpConnection(Connection):
     session: requests.Session
@@ -40,5 +40,21 @@ class RequestsHttpConnection(Connection):
         api_key: Optional[Any] = ...,
         opaque_id: Optional[str] = ...,
         meta_header: bool = ...,
+        tcp_nodelay: bool = ...,
+        tcp_keepalive: Optional[Union[bool, int, Tuple[int, int, int]]] = ...,
+        idle_timeout: Optional[float] = ...,
+        max_connection_age: Optional[float] = ...,
         **kwargs: Any
     ) -> None: ...
+    def perform_request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[MutableMapping[str, Any]] = ...,
+        body: Optional[bytes] = ...,
+        timeout: Optional[Union[int, float]] = ...,
+        ignore: Collection[int] = ...,
+        headers: Optional[MutableMapping[str, str]] = ...,
+        priority: Optional[str] = ...,
+        stream: bool = ...,
+    ) -> Tuple[int, Mapping[str, str], Union[str, RawResponse]]: ...
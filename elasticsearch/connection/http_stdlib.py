@@ -0,0 +1,307 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import base64
+import select
+import socket
+import ssl
+import time
+import zlib
+from platform import python_version
+
+from ..compat import reraise_exceptions, string_types, to_bytes, urlencode
+from ..exceptions import (
+    ConnectionError,
+    ConnectionTimeout,
+    ImproperlyConfigured,
+    SSLError,
+)
+from ..utils import _client_meta_version, _connect_unix_socket
+from .pooling import PoolingConnection
+
+try:
+    from http.client import HTTPConnection, HTTPSConnection
+except ImportError:
+    from httplib import HTTPConnection, HTTPSConnection  # type: ignore
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, unix_socket, *args, **kwargs):
+        self.unix_socket = unix_socket
+        HTTPConnection.__init__(self, *args, **kwargs)
+
+    def connect(self):
+        self.sock = _connect_unix_socket(self.unix_socket, self.timeout)
+
+
+class _HTTPSConnection(HTTPSConnection):
+    """HTTPS connection verifying the certificate against ``server_hostname``."""
+
+    def __init__(self, server_hostname, *args, **kwargs):
+        self.server_hostname = server_hostname
+        HTTPSConnection.__init__(self, *args, **kwargs)
+
+    def connect(self):
+        HTTPConnection.connect(self)
+        self.sock = self._context.wrap_socket(
+            self.sock, server_hostname=self.server_hostname
+        )
+
+
+def _is_dropped(sock):
+    # an idle keep-alive socket only becomes readable when the server closed it
+    if hasattr(select, "poll"):
+        poller = select.poll()
+        poller.register(sock, select.POLLIN)
+        return bool(poller.poll(0))
+    return bool(select.select([sock], [], [], 0)[0])
+
+
+def _get_all(message, name):
+    if hasattr(message, "get_all"):
+        return message.get_all(name) or ()
+    # python 2's mimetools.Message
+    return message.getheaders(name)
+
+
+class StdlibHttpConnection(PoolingConnection):
+    """
+    Connection using the ``http.client`` module of the standard library,
+    without any dependency. Each request is sent on a keep-alive connection
+    taken from a thread-safe pool, with as little work as possible besides
+    the request itself, so it has the lowest client-side overhead per request.
+
+    :arg host: hostname of the node (default: localhost)
+    :arg port: port to use (integer, default: 9200)
+    :arg url_prefix: optional url prefix for elasticsearch
+    :arg timeout: default timeout in seconds (float, default: 10)
+    :arg http_auth: optional http auth information as either ':' separated
+        string or a tuple
+    :arg use_ssl: use ssl for the connection if `True`
+    :arg verify_certs: whether to verify SSL certificates
+    :arg ssl_show_warn: show warning when verify certs is disabled
+    :arg ca_certs: optional path to CA bundle, defaults to the one of
+        ``certifi`` when installed, the system's otherwise
+    :arg client_cert: path to the file containing the private key and the
+        certificate, or cert only if using client_key
+    :arg client_key: path to the file containing the private key if using
+        separate cert and key files (client_cert will contain only the cert)
+    :arg ssl_context: :class:`ssl.SSLContext` to use instead of the other SSL
+        options
+    :arg maxsize: the number of idle connections kept open to this host,
+        concurrent requests open extra connections which are closed after
+        use when as many are idle
+    :arg headers: any custom http headers to be add to requests
+    :arg http_compress: Use gzip compression
+    :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
+        Other host connection params will be ignored.
+    :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
+    :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
+        For tracing all requests made by this transport.
+    :arg unix_socket: path of a Unix domain socket to send the requests to
+        instead of ``host`` and ``port``
+    """
+
+    HTTP_CLIENT_META = ("hc", _client_meta_version(python_version()))
+
+    def __init__(
+        self,
+        host="localhost",
+        port=None,
+        http_auth=None,
+        use_ssl=False,
+        verify_certs=True,
+        ssl_show_warn=True,
+        ca_certs=None,
+        client_cert=None,
+        client_key=None,
+        ssl_context=None,
+        maxsize=10,
+        headers=None,
+        http_compress=None,
+        cloud_id=None,
+        api_key=None,
+        opaque_id=None,
+        **kwargs
+    ):
+        super(StdlibHttpConnection, self).__init__(
+            host=host,
+            port=port,
+            use_ssl=use_ssl,
+            headers=headers,
+            http_compress=http_compress,
+            cloud_id=cloud_id,
+            api_key=api_key,
+            opaque_id=opaque_id,
+            maxsize=maxsize,
+            **kwargs
+        )
+        if http_auth is not None:
+            if isinstance(http_auth, (tuple, list)):
+                http_auth = ":".join(http_auth)
+            if isinstance(http_auth, string_types):
+                self.headers["authorization"] = "Basic %s" % (
+                    base64.b64encode(to_bytes(http_auth, "utf-8")).decode("ascii")
+                )
+
+        if self.use_ssl and ssl_context is None:
+            ssl_context = self._create_ssl_context(
+                verify_certs, ssl_show_warn, ca_certs, client_cert, client_key
+            )
+        self.ssl_context = ssl_context
+
+    def _make_connection(self):
+        if self.unix_socket:
+            return _UnixHTTPConnection(
+                self.unix_socket, self.hostname, self.port, timeout=self.timeout
+            )
+        if self.use_ssl and self.server_hostname:
+            return _HTTPSConnection(
+                self.server_hostname,
+                self.hostname,
+                self.port,
+                timeout=self.timeout,
+                context=self.ssl_context,
+            )
+        if self.use_ssl:
+            return HTTPSConnection(
+                self.hostname,
+                self.port,
+                timeout=self.timeout,
+                context=self.ssl_context,
+            )
+        return HTTPConnection(self.hostname, self.port, timeout=self.timeout)
+
+    def _get_connection(self):
+        con = super(StdlibHttpConnection, self)._get_connection()
+        if con.sock is not None and _is_dropped(con.sock):
+            # reconnects on the next request
+            con.close()
+        return con
+
+    def warm_up(self, count=1):
+        cons = []
+        opened = 0
+        try:
+            maxsize = self._free_connections.maxsize
+            for _ in range(min(count, maxsize) if maxsize else count):
+                con = self._get_connection()
+                cons.append(con)
+                if con.sock is None:
+                    con.connect()
+                    opened += 1
+        except reraise_exceptions:
+            raise
+        except Exception as e:
+            if isinstance(e, socket.timeout):
+                raise ConnectionTimeout("TIMEOUT", str(e), e)
+            if isinstance(e, ssl.SSLError):
+                raise SSLError("N/A", str(e), e)
+            raise ConnectionError("N/A", str(e), e)
+        finally:
+            for con in cons:
+                self._release_connection(con)
+        return opened
+
+    def perform_request(
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+        priority=None,
+        stream=False,
+    ):
+        if stream:
+            raise ImproperlyConfigured(
+                "%s doesn't support request_stream, use Urllib3HttpConnection "
+                "or RequestsHttpConnection." % self.__class__.__name__
+            )
+        url = self.url_prefix + url
+        if params:
+            url = "%s?%s" % (url, urlencode(params))
+        full_url = self.host + url
+
+        request_headers = self.headers
+        if headers:
+            request_headers = request_headers.copy()
+            request_headers.update(headers)
+        orig_body = body
+        if self.http_compress and body:
+            body = self._gzip_compress(body)
+            if request_headers is self.headers:
+                request_headers = request_headers.copy()
+            request_headers["content-encoding"] = "gzip"
+
+        start = time.time()
+        con = self._get_connection()
+        try:
+            timeout = timeout or self.timeout
+            con.timeout = timeout
+            if con.sock is not None:
+                con.sock.settimeout(timeout)
+            con.request(method, url, body, request_headers)
+            response = con.getresponse()
+            raw_data = response.read()
+            duration = time.time() - start
+        except reraise_exceptions:
+            con.close()
+            raise
+        except Exception as e:
+            con.close()
+            self.log_request_fail(
+                method, full_url, url, orig_body, time.time() - start, exception=e
+            )
+            if isinstance(e, socket.timeout):
+                raise ConnectionTimeout("TIMEOUT", str(e), e)
+            if isinstance(e, ssl.SSLError):
+                raise SSLError("N/A", str(e), e)
+            raise ConnectionError("N/A", str(e), e)
+
+        if response.will_close:
+            con.close()
+        else:
+            self._release_connection(con)
+
+        response_headers = response.msg
+        encoding = response_headers.get("content-encoding")
+        if encoding in ("gzip", "deflate") and raw_data:
+            # gzip or zlib header, auto-detected
+            raw_data = zlib.decompress(raw_data, 32 + zlib.MAX_WBITS)
+        raw_data = raw_data.decode("utf-8", "surrogatepass")
+
+        # raise warnings if any from the 'Warnings' header.
+        self._raise_warnings(_get_all(response_headers, "warning"))
+
+        # raise errors based on http status codes, let the client handle those if needed
+        status = response.status
+        if not (200 <= status < 300) and status not in ignore:
+            self.log_request_fail(
+                method, full_url, url, orig_body, duration, status, raw_data
+            )
+            self._raise_error(status, raw_data)
+
+        self.log_request_success(
+            method, full_url, url, orig_body, status, raw_data, duration
+        )
+
+        return status, response_headers, raw_data
@@ -15,24 +15,41 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import functools
+import random
+import socket
 import ssl
+import threading
 import time
 import warnings
 
 import urllib3  # type: ignore
-from urllib3.exceptions import ReadTimeoutError
+from urllib3.connection import HTTPConnection, HTTPSConnection  # type: ignore
+from urllib3.exceptions import (  # type: ignore
+    ConnectTimeoutError,
+    EmptyPoolError,
+    NewConnectionError,
+    ReadTimeoutError,
+)
 from urllib3.exceptions import SSLError as UrllibSSLError  # type: ignore
+from urllib3.util.connection import is_connection_dropped  # type: ignore
 from urllib3.util.retry import Retry  # type: ignore
 
-from ..compat import reraise_exceptions, urlencode
+from ..compat import Empty, reraise_exceptions, urlencode
 from ..exceptions import (
     ConnectionError,
     ConnectionTimeout,
     ImproperlyConfigured,
+    PoolTimeout,
     SSLError,
 )
-from ..utils import _client_meta_version
-from .base import Connection
+from ..utils import (
+    _client_meta_version,
+    _connect_unix_socket,
+    _connection_expired,
+    _socket_options,
+)
+from .base import Connection, RawResponse
 
 # sentinel value for `verify_certs` and `ssl_show_warn`.
 # This is used to detect if a user is passing in a value
@@ -62,6 +79,176 @@ def create_ssl_context(**kwargs):
     return ctx
 
 
+class _PoolStats(object):
+    """Counters shared by the pools of a connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.exhausted = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def record(self, duration, exhausted, timed_out):
+        with self._lock:
+            self.requests += 1
+            self.wait_time += duration
+            self.max_wait = max(self.max_wait, duration)
+            if exhausted:
+                self.exhausted += 1
+            if timed_out:
+                self.timeouts += 1
+
+
+class _TimedConnectionMixin(object):
+    """Records when the connection was (re)opened and last released."""
+
+    connected_at = None
+    released_at = None
+    # random factor shortening the maximum age of the connection
+    age_jitter = 0.0
+
+    def connect(self):
+        super(_TimedConnectionMixin, self).connect()
+        self.connected_at = time.time()
+        self.released_at = None
+        self.age_jitter = random.random()
+
+
+class _HTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _MeteredPoolMixin(object):
+    """
+    Records how long the requests wait for a connection of the pool and, with
+    ``auto_size``, grows the pool up to the number of running threads.
+
+    Connections idle for more than ``idle_timeout`` seconds or older than
+    ``max_connection_age`` are closed instead of being reused (the pool then
+    opens a new one).
+    """
+
+    auto_size = False
+    stats = None
+    idle_timeout = None
+    max_connection_age = None
+
+    def _is_expired(self, conn, now):
+        return conn.sock is not None and _connection_expired(
+            now,
+            getattr(conn, "connected_at", None),
+            getattr(conn, "released_at", None),
+            self.idle_timeout,
+            self.max_connection_age,
+            getattr(conn, "age_jitter", 0.0),
+        )
+
+    def _get_conn(self, timeout=None):
+        conn = self._get_metered_conn(timeout)
+        if self._is_expired(conn, time.time()):
+            conn.close()
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            now = time.time()
+            conn.released_at = now
+            if self.max_connection_age is not None and self._is_expired(conn, now):
+                conn.close()
+        super(_MeteredPoolMixin, self)._put_conn(conn)
+
+    def _get_metered_conn(self, timeout):
+        queue = self.pool
+        exhausted = False
+        if queue is not None and not queue.queue:
+            if self.auto_size:
+                self._grow(queue)
+            # no idle connection: the request waits if the pool blocks,
+            # otherwise an extra connection is opened and thrown away after use
+            exhausted = not queue.queue
+
+        timed_out = False
+        start = time.time()
+        try:
+            return super(_MeteredPoolMixin, self)._get_conn(timeout)
+        except EmptyPoolError:
+            timed_out = True
+            raise
+        finally:
+            if self.stats is not None:
+                self.stats.record(time.time() - start, exhausted, timed_out)
+
+    def _grow(self, queue):
+        with queue.mutex:
+            if queue.queue or queue.maxsize >= threading.active_count():
+                return
+            queue.maxsize += 1
+            # an empty slot, the pool opens a new connection for it
+            queue.queue.append(None)
+            queue.not_empty.notify()
+
+
+class _HTTPConnectionPool(_MeteredPoolMixin, urllib3.HTTPConnectionPool):
+    ConnectionCls = _HTTPConnection
+
+
+class _HTTPSConnectionPool(_MeteredPoolMixin, urllib3.HTTPSConnectionPool):
+    ConnectionCls = _HTTPSConnection
+
+
+def _pool_classes(**attrs):
+    """
+    Pool classes by scheme with the given attributes (``idle_timeout``,
+    ``max_connection_age``), for the pools created by a ``PoolManager``.
+    """
+    return {
+        "http": type("_HTTPConnectionPool", (_HTTPConnectionPool,), attrs),
+        "https": type("_HTTPSConnectionPool", (_HTTPSConnectionPool,), attrs),
+    }
+
+
+def _release_response(response):
+    """
+    Gives the connection of a response read with ``preload_content=False`` back
+    to its pool, closing it first if the body hasn't been read to the end.
+    """
+    if not response.closed:
+        response.close()
+    response.release_conn()
+
+
+class _UnixHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, *args, **kwargs):
+        self.unix_socket = kwargs.pop("unix_socket")
+        super(_UnixHTTPConnection, self).__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        try:
+            return _connect_unix_socket(self.unix_socket, self.timeout)
+        except socket.timeout:
+            raise ConnectTimeoutError(
+                self,
+                "Connection to %s timed out. (connect timeout=%s)"
+                % (self.unix_socket, self.timeout),
+            )
+        except socket.error as e:
+            raise NewConnectionError(
+                self, "Failed to establish a new connection: %s" % e
+            )
+
+
+class _UnixHTTPConnectionPool(_HTTPConnectionPool):
+    ConnectionCls = _UnixHTTPConnection
+
+
 class Urllib3HttpConnection(Connection):
     """
     Default connection class using the `urllib3` library and the http protocol.
@@ -89,7 +276,29 @@ class Urllib3HttpConnection(Connection):
     :arg ssl_assert_fingerprint: verify the supplied certificate fingerprint if not `None`
     :arg maxsize: the number of connections which will be kept open to this
         host. See https://urllib3.readthedocs.io/en/1.4/pools.html#api for more
-        information.
+        information. With ``'auto'`` the pool starts with one connection per
+        running thread and grows when there are more threads than connections.
+    :arg pool_block: wait for a connection of the pool to be free instead of
+        opening an extra connection (closed after use) when all of them are in
+        use
+    :arg pool_timeout: number of seconds to wait for a free connection when
+        ``pool_block`` is set, defaults to the timeout of the request
+    :arg tcp_nodelay: disable Nagle's algorithm on the sockets (default:
+        ``True``)
+    :arg tcp_keepalive: enable TCP keep-alive probes on the sockets, either
+        ``True`` (system settings), the number of idle seconds before the
+        first probe and between probes, or an ``(idle, interval, count)``
+        tuple
+    :arg idle_timeout: close the connections idle for more than this number
+        of seconds instead of reusing them, e.g. shorter than the idle timeout
+        of a load balancer which drops the idle connections silently
+    :arg max_connection_age: close the connections open for more than this
+        number of seconds (minus up to 10%, at random) once they are released
+        so that the load spreads over new nodes or addresses
+    :arg priority_maxsize: dict mapping request priorities (the
+        ``request_priority`` of the requests) to the number of connections of
+        a separate pool used for them, requests with another or no priority
+        use the main pool of ``maxsize`` connections
     :arg headers: any custom http headers to be add to requests
     :arg http_compress: Use gzip compression
     :arg cloud_id: The Cloud ID from ElasticCloud. Convenient way to connect to cloud instances.
@@ -97,6 +306,8 @@ class Urllib3HttpConnection(Connection):
     :arg api_key: optional API Key authentication as either base64 encoded string or a tuple.
     :arg opaque_id: Send this value in the 'X-Opaque-Id' HTTP header
         For tracing all requests made by this transport.
+    :arg unix_socket: path of a Unix domain socket to send the requests to
+        instead of ``host`` and ``port``
     """
 
     HTTP_CLIENT_META = ("ur", _client_meta_version(urllib3.__version__))
@@ -122,6 +333,13 @@ class Urllib3HttpConnection(Connection):
         cloud_id=None,
         api_key=None,
         opaque_id=None,
+        priority_maxsize=None,
+        pool_block=False,
+        pool_timeout=None,
+        tcp_nodelay=True,
+        tcp_keepalive=None,
+        idle_timeout=None,
+        max_connection_age=None,
         **kwargs
     ):
         # Initialize headers before calling super().__init__().
@@ -143,7 +361,7 @@ class Urllib3HttpConnection(Connection):
                 http_auth = ":".join(http_auth)
             self.headers.update(urllib3.make_headers(basic_auth=http_auth))
 
-        pool_class = urllib3.HTTPConnectionPool
+        pool_class = _HTTPConnectionPool
         kw = {}
 
         # if providing an SSL context, raise error if any other SSL related flag is used
@@ -159,9 +377,13 @@ class Urllib3HttpConnection(Connection):
                 "When using `ssl_context`, all other SSL related kwargs are ignored"
             )
 
+        if self.unix_socket:
+            pool_class = _UnixHTTPConnectionPool
+            kw["unix_socket"] = self.unix_socket
+
         # if ssl_context provided use SSL by default
-        if ssl_context and self.use_ssl:
-            pool_class = urllib3.HTTPSConnectionPool
+        elif ssl_context and self.use_ssl:
+            pool_class = _HTTPSConnectionPool
             kw.update(
                 {
                     "assert_fingerprint": ssl_assert_fingerprint,
@@ -170,7 +392,7 @@ class Urllib3HttpConnection(Connection):
             )
 
         elif self.use_ssl:
-            pool_class = urllib3.HTTPSConnectionPool
+            pool_class = _HTTPSConnectionPool
             kw.update(
                 {
                     "ssl_version": ssl_version,
@@ -213,12 +435,89 @@ class Urllib3HttpConnection(Connection):
                 if not ssl_show_warn:
                     urllib3.disable_warnings()
 
-        self.pool = pool_class(
-            self.hostname, port=self.port, timeout=self.timeout, maxsize=maxsize, **kw
-        )
+        if self.use_ssl and self.server_hostname:
+            kw["server_hostname"] = self.server_hostname
+        if not self.unix_socket and (tcp_keepalive or not tcp_nodelay):
+            kw["socket_options"] = _socket_options(tcp_nodelay, tcp_keepalive)
+
+        self.pool_block = pool_block
+        self.pool_timeout = pool_timeout
+        self._pool_stats = _PoolStats()
+
+        def create_pool(maxsize):
+            auto_size = maxsize == "auto"
+            if auto_size:
+                maxsize = threading.active_count()
+            pool = pool_class(
+                self.hostname,
+                port=self.port,
+                timeout=self.timeout,
+                maxsize=maxsize,
+                block=pool_block,
+                **kw
+            )
+            pool.auto_size = auto_size
+            pool.stats = self._pool_stats
+            pool.idle_timeout = idle_timeout
+            pool.max_connection_age = max_connection_age
+            return pool
+
+        self.pool = create_pool(maxsize)
+        # one pool per priority lane so that the requests of one priority
+        # can't take the connections of the others
+        self.priority_pools = {}
+        for priority, lane_maxsize in (priority_maxsize or {}).items():
+            self.priority_pools[priority] = create_pool(lane_maxsize)
+
+    def warm_up(self, count=1):
+        pool = self.pool
+        queue = pool.pool
+        if queue is None:
+            return 0
+        conns = []
+        opened = 0
+        try:
+            # the queue is read directly so that warming up doesn't show in
+            # the pool statistics
+            for _ in range(min(count, queue.maxsize)):
+                try:
+                    conn = queue.get(block=False)
+                except Empty:
+                    break
+                if conn is None:
+                    conn = pool._new_conn()
+                elif is_connection_dropped(conn) or pool._is_expired(conn, time.time()):
+                    conn.close()
+                conns.append(conn)
+                if conn.sock is None:
+                    conn.connect()
+                    opened += 1
+        except reraise_exceptions:
+            raise
+        except Exception as e:
+            if conns:
+                conns[-1].close()
+            if isinstance(e, UrllibSSLError):
+                raise SSLError("N/A", str(e), e)
+            if isinstance(e, ConnectTimeoutError):
+                raise ConnectionTimeout("TIMEOUT", str(e), e)
+            raise ConnectionError("N/A", str(e), e)
+        finally:
+            for conn in conns:
+                pool._put_conn(conn)
+        return opened
 
     def perform_request(
-        self, method, url, params=None, body=None, timeout=None, ignore=(), headers=None
+        self,
+        method,
+        url,
+        params=None,
+        body=None,
+        timeout=None,
+        ignore=(),
+        headers=None,
+        priority=None,
+        stream=False,
     ):
         url = self.url_prefix + url
         if params:
@@ -232,6 +531,8 @@ class Urllib3HttpConnection(Connection):
             kw = {}
             if timeout:
                 kw["timeout"] = timeout
+            if self.pool_block:
+                kw["pool_timeout"] = self.pool_timeout or timeout or self.timeout
 
             # in python2 we need to make sure the url and method are not
             # unicode. Otherwise the body will be decoded into unicode too and
@@ -248,11 +549,24 @@ class Urllib3HttpConnection(Connection):
                 body = self._gzip_compress(body)
                 request_headers["content-encoding"] = "gzip"
 
-            response = self.pool.urlopen(
-                method, url, body, retries=Retry(False), headers=request_headers, **kw
+            pool = self.priority_pools.get(priority, self.pool)
+            response = pool.urlopen(
+                method,
+                url,
+                body,
+                retries=Retry(False),
+                headers=request_headers,
+                preload_content=not stream,
+                **kw
             )
             duration = time.time() - start
-            raw_data = response.data.decode("utf-8", "surrogatepass")
+            if stream and (200 <= response.status < 300 or response.status in ignore):
+                # read by the caller
+                raw_data = None
+            else:
+                raw_data = response.data.decode("utf-8", "surrogatepass")
+                if stream:
+                    response.release_conn()
         except reraise_exceptions:
             raise
         except Exception as e:
@@ -261,6 +575,8 @@ class Urllib3HttpConnection(Connection):
             )
             if isinstance(e, UrllibSSLError):
                 raise SSLError("N/A", str(e), e)
+            if isinstance(e, EmptyPoolError):
+                raise PoolTimeout("POOL_TIMEOUT", str(e), e)
             if isinstance(e, ReadTimeoutError):
                 raise ConnectionTimeout("TIMEOUT", str(e), e)
             raise ConnectionError("N/A", str(e), e)
@@ -280,10 +596,38 @@ class Urllib3HttpConnection(Connection):
             method, full_url, url, orig_body, response.status, raw_data, duration
         )
 
+        if stream:
+            raw_data = RawResponse(
+                response.status,
+                response.headers,
+                response.read,
+                functools.partial(_release_response, response),
+            )
         return response.status, response.getheaders(), raw_data
 
+    def pool_stats(self):
+        """
+        Returns the usage of the connection pools as a dict: their total size,
+        the number of connections opened, of requests, of requests which found
+        no free connection (``exhausted``) and the time spent waiting for one.
+        """
+        pools = [self.pool] + list(self.priority_pools.values())
+        stats = self._pool_stats
+        with stats._lock:
+            return {
+                "maxsize": sum(p.pool.maxsize for p in pools if p.pool is not None),
+                "connections": sum(p.num_connections for p in pools),
+                "requests": stats.requests,
+                "exhausted": stats.exhausted,
+                "timeouts": stats.timeouts,
+                "wait_time": stats.wait_time,
+                "max_wait": stats.max_wait,
+            }
+
     def close(self):
         """
         Explicitly closes connection
         """
         self.pool.close()
+        for pool in self.priority_pools.values():
+            pool.close()
@@ -16,11 +16,20 @@
 #  under the License.
 
 import ssl
-from typing import Any, Mapping, Optional, Union
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import urllib3  # type: ignore
 
-from .base import Connection
+from .base import Connection, RawResponse
 
 def create_ssl_context(
     cafile: Any = ...,
@@ -30,6 +39,9 @@ def create_ssl_context(
 
 class Urllib3HttpConnection(Connection):
     pool: urllib3.HTTPConnectionPool
+    priority_pools: Dict[str, urllib3.HTTPConnectionPool]
+    pool_block: bool
+    pool_timeout: Optional[Union[float, int]]
     def __init__(
         self,
         host: str = ...,
@@ -46,7 +58,7 @@ class Urllib3HttpConnection(Connection):
         ssl_version: Optional[Any] = ...,
         ssl_assert_hostname: Optional[Any] = ...,
         ssl_assert_fingerprint: Optional[Any] = ...,
-        maxsize: int = ...,
+        maxsize: Union[int, str] = ...,
         headers: Optional[Mapping[str, str]] = ...,
         ssl_context: Optional[Any] = ...,
         http_compress: Optional[bool] = ...,
@@ -54,5 +66,26 @@ class Urllib3HttpConnection(Connection):
         api_key: Optional[Any] = ...,
         opaque_id: Optional[str] = ...,
         meta_header: bool = ...,
+        priority_maxsize: Optional[Mapping[str, Union[int, str]]] = ...,
+        pool_block: bool = ...,
+        pool_timeout: Optional[Union[float, int]] = ...,
+        tcp_nodelay: bool = ...,
+        tcp_keepalive: Optional[Union[bool, int, Tuple[int, int, int]]] = ...,
+        idle_timeout: Optional[float] = ...,
+        max_connection_age: Optional[float] = ...,
         **kwargs: Any
     ) -> None: ...
+    def warm_up(self, count: int = ...) -> int: ...
+    def perform_request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[MutableMapping[str, Any]] = ...,
+        body: Optional[bytes] = ...,
+        timeout: Optional[Union[int, float]] = ...,
+        ignore: Collection[int] = ...,
+        headers: Optional[MutableMapping[str, str]] = ...,
+        priority: Optional[str] = ...,
+        stream: bool = ...,
+    ) -> Tuple[int, Mapping[str, str], Union[str, RawResponse]]: ...
+    def pool_stats(self) -> Dict[str, Union[int, float]]: ...
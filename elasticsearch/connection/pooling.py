@@ -29,10 +29,13 @@ class PoolingConnection(Connection):
     safety and no capacity for connection pooling. To use this just implement a
     ``_make_connection`` method that constructs a new connection and returns
     it.
+
+    :arg maxsize: the number of idle connections kept open, the connections
+        released when as many are idle are closed. Unbounded by default.
     """
 
     def __init__(self, *args, **kwargs):
-        self._free_connections = queue.Queue()
+        self._free_connections = queue.Queue(kwargs.pop("maxsize", None) or 0)
         super(PoolingConnection, self).__init__(*args, **kwargs)
 
     def _make_connection(self):
@@ -45,10 +48,17 @@ class PoolingConnection(Connection):
             return self._make_connection()
 
     def _release_connection(self, con):
-        self._free_connections.put(con)
+        try:
+            self._free_connections.put_nowait(con)
+        except queue.Full:
+            con.close()
 
     def close(self):
         """
         Explicitly close connection
         """
-        pass
+        while True:
+            try:
+                self._free_connections.get_nowait().close()
+            except queue.Empty:
+                break
@@ -15,9 +15,14 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+from typing import Any, Optional
+
 from .base import Connection
 
 class PoolingConnection(Connection):
+    def __init__(
+        self, *args: Any, maxsize: Optional[int] = ..., **kwargs: Any
+    ) -> None: ...
     def _make_connection(self) -> Connection: ...
     def _get_connection(self) -> Connection: ...
     def _release_connection(self, con: Connection) -> None: ...
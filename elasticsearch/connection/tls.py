@@ -0,0 +1,203 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""
+TLS helpers: SSL contexts resuming the TLS sessions of the previous sockets to
+a server, which saves a full handshake (key exchange and certificate
+verification) on every new connection.
+"""
+
+import os
+import ssl
+import threading
+import weakref
+
+from ..exceptions import ImproperlyConfigured
+
+# TLS session resumption is exposed since Python 3.6
+_HAS_SESSIONS = hasattr(ssl, "SSLSession")
+
+
+def _pick_session(*sessions):
+    # prefer a session with a ticket, TLS 1.3 sessions only get one after the
+    # handshake
+    fallback = None
+    for session in sessions:
+        if session is None:
+            continue
+        if session.has_ticket:
+            return session
+        if fallback is None and session.id:
+            fallback = session
+    return fallback
+
+
+if _HAS_SESSIONS:
+
+    class _SSLSocket(ssl.SSLSocket):
+        # TLS 1.3 servers send the session ticket after the handshake, the
+        # session is saved again when the socket is closed. Sockets only get
+        # this class through SSLContext.sslsocket_class (Python 3.7+), on
+        # Python 3.6 the ticket is only read from the last socket while open.
+        def close(self):
+            if self._session_key is not None:
+                self.context._save_session(self._session_key, self.session)
+            super(_SSLSocket, self).close()
+
+        _session_key = None
+
+    class _SSLObject(ssl.SSLObject):
+        def unwrap(self):
+            if self._session_key is not None:
+                self.context._save_session(self._session_key, self.session)
+            return super(_SSLObject, self).unwrap()
+
+        _session_key = None
+
+    class SessionResumingSSLContext(ssl.SSLContext):
+        """
+        :class:`ssl.SSLContext` resuming the TLS session of the previous
+        socket opened to the same server, for sockets (``wrap_socket``, used
+        by urllib3 and ``http.client``) and memory BIOs (``wrap_bio``, used by
+        asyncio).
+
+        The servers are identified by their hostname and, for sockets, their
+        address. A session the server doesn't accept anymore only costs a
+        full handshake.
+        """
+
+        sslsocket_class = _SSLSocket
+        sslobject_class = _SSLObject
+
+        def __init__(self, *args, **kwargs):
+            super(SessionResumingSSLContext, self).__init__()
+            self._session_lock = threading.Lock()
+            # server -> (session, weak reference to the last socket)
+            self._sessions = {}
+
+        def _get_session(self, key):
+            with self._session_lock:
+                entry = self._sessions.get(key)
+            if entry is None:
+                return None
+            session, ref = entry
+            last = ref and ref()
+            # the last socket may have received a newer session (ticket)
+            return _pick_session(last and last.session, session)
+
+        def _save_session(self, key, session, sslobj=None):
+            with self._session_lock:
+                previous, ref = self._sessions.get(key, (None, None))
+                if sslobj is not None:
+                    ref = weakref.ref(sslobj)
+                self._sessions[key] = (_pick_session(session, previous), ref)
+
+        def wrap_socket(self, sock, *args, **kwargs):
+            if kwargs.get("server_side"):
+                return super(SessionResumingSSLContext, self).wrap_socket(
+                    sock, *args, **kwargs
+                )
+            try:
+                key = (kwargs.get("server_hostname"), sock.getpeername())
+            except (OSError, ValueError):
+                key = (kwargs.get("server_hostname"), None)
+            if kwargs.get("session") is None:
+                kwargs["session"] = self._get_session(key)
+            sslsock = super(SessionResumingSSLContext, self).wrap_socket(
+                sock, *args, **kwargs
+            )
+            sslsock._session_key = key
+            self._save_session(key, sslsock.session or kwargs["session"], sslsock)
+            return sslsock
+
+        def wrap_bio(self, incoming, outgoing, *args, **kwargs):
+            if kwargs.get("server_side"):
+                return super(SessionResumingSSLContext, self).wrap_bio(
+                    incoming, outgoing, *args, **kwargs
+                )
+            key = (kwargs.get("server_hostname"), None)
+            if kwargs.get("session") is None:
+                kwargs["session"] = self._get_session(key)
+            sslobj = super(SessionResumingSSLContext, self).wrap_bio(
+                incoming, outgoing, *args, **kwargs
+            )
+            sslobj._session_key = key
+            # the handshake happens later, the session is read from the object
+            self._save_session(key, kwargs["session"], sslobj)
+            return sslobj
+
+
+def _create_default_context():
+    # same settings as ssl.create_default_context()
+    if not _HAS_SESSIONS:
+        return ssl.create_default_context()
+    ctx = SessionResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ctx.load_default_certs()
+    return ctx
+
+
+def create_client_ssl_context(
+    verify_certs=True,
+    ca_certs=None,
+    client_cert=None,
+    client_key=None,
+    ssl_version=None,
+):
+    """
+    Returns an SSL context for the SSL options of the connection classes,
+    resuming the TLS sessions of the previous connections to a server.
+
+    :arg verify_certs: whether to verify SSL certificates
+    :arg ca_certs: path to a CA bundle (or a directory of CA certificates),
+        the system's CA certificates are used by default
+    :arg client_cert: path to the file containing the private key and the
+        certificate, or cert only if using client_key
+    :arg client_key: path to the file containing the private key if using
+        separate cert and key files
+    :arg ssl_version: version of the SSL protocol to use, all the TLS versions
+        supported by both ends by default
+    """
+    if ssl_version is None:
+        ctx = _create_default_context()
+    elif _HAS_SESSIONS:
+        ctx = SessionResumingSSLContext(ssl_version)
+    else:
+        ctx = ssl.SSLContext(ssl_version)
+
+    if verify_certs:
+        ctx.verify_mode = ssl.CERT_REQUIRED
+        ctx.check_hostname = True
+        if ca_certs is None:
+            if ssl_version is not None:
+                ctx.load_default_certs()
+        elif os.path.isdir(ca_certs):
+            ctx.load_verify_locations(capath=ca_certs)
+        elif os.path.isfile(ca_certs):
+            ctx.load_verify_locations(cafile=ca_certs)
+        else:
+            raise ImproperlyConfigured("ca_certs parameter is not a path")
+    else:
+        if ca_certs:
+            raise ImproperlyConfigured(
+                "You cannot pass CA certificates when verify SSL is off."
+            )
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+
+    if client_cert:
+        ctx.load_cert_chain(client_cert, client_key)
+    return ctx
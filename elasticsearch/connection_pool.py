@@ -15,11 +15,15 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import heapq
 import logging
+import math
 import random
 import threading
 import time
+from collections import deque
 
+from .compat import monotonic
 from .exceptions import ImproperlyConfigured
 
 try:
@@ -46,7 +50,8 @@ class ConnectionSelector(object):
 
     Example of where this would be useful is a zone-aware selector that would
     only select connections from it's own zones and only fall back to other
-    connections where there would be none in its zones.
+    connections where there would be none in its zones (see
+    :class:`~elasticsearch.connection_pool.ZoneAwareSelector`).
     """
 
     def __init__(self, opts):
@@ -63,6 +68,40 @@ class ConnectionSelector(object):
         """
         pass
 
+    def mark_request_start(self, connection):
+        """
+        Called by the :class:`~elasticsearch.Transport` right before a request
+        is sent over ``connection``. Selectors that want to keep track of the
+        load on each connection can override this, by default it's a no-op.
+
+        :arg connection: the connection the request is about to be sent to
+        """
+        pass
+
+    def mark_request_end(self, connection, duration, failed=False):
+        """
+        Called by the :class:`~elasticsearch.Transport` once a request sent
+        over ``connection`` has finished, successfully or not. By default it's
+        a no-op.
+
+        :arg connection: the connection the request was sent to
+        :arg duration: number of seconds the request took
+        :arg failed: ``True`` if the node failed to serve the request (a
+            connection error, a timeout, a 5xx or a 429 response)
+        """
+        pass
+
+    def remove_connections(self, connections):
+        """
+        Called by the :class:`~elasticsearch.ConnectionPool` with the
+        connections it no longer holds (after a sniff or a DNS refresh), so
+        that selectors keeping per-connection state can drop it. By default
+        it's a no-op.
+
+        :arg connections: list of the removed connections
+        """
+        pass
+
 
 class RandomSelector(ConnectionSelector):
     """
@@ -88,6 +127,253 @@ class RoundRobinSelector(ConnectionSelector):
         return connections[self.data.rr]
 
 
+class ZoneAwareSelector(RoundRobinSelector):
+    """
+    Selector preferring connections to nodes in the same zone (availability
+    zone, rack, ...) as the client, using round-robin among them. Connections
+    to nodes in other zones are only used when there is no live connection in
+    the local zone.
+
+    The zone of a node is read from the ``attributes`` of its connection
+    options, as retrieved by sniffing (node attributes such as
+    ``node.attr.zone``) or set manually in the ``hosts`` parameter. The local
+    zone is passed with the ``selector_kwargs`` option of the pool::
+
+        es = Elasticsearch(
+            [{"host": "node1", "attributes": {"zone": "us-east-1a"}}, ...],
+            selector_class=ZoneAwareSelector,
+            selector_kwargs={"zone": "us-east-1a"},
+        )
+
+    :arg zone: the zone the client is running in, all zones are treated the
+        same if ``None``
+    :arg zone_attribute: name of the node attribute holding the zone (default:
+        ``zone``)
+    """
+
+    zone = None
+    zone_attribute = "zone"
+
+    def __init__(self, opts, zone=None, zone_attribute=None):
+        super(ZoneAwareSelector, self).__init__(opts)
+        # the class attributes stay the defaults for subclasses
+        if zone is not None:
+            self.zone = zone
+        if zone_attribute is not None:
+            self.zone_attribute = zone_attribute
+        # the pool never modifies its list of live connections in place, so
+        # the local ones only need to be found again when the list changes.
+        self._local = (None, None)
+
+    def is_local(self, connection):
+        """
+        Returns ``True`` if the node behind ``connection`` is in the local zone.
+
+        :arg connection: connection to evaluate
+        """
+        opts = self.connection_opts.get(connection) or {}
+        attributes = opts.get("attributes") or {}
+        return attributes.get(self.zone_attribute) == self.zone
+
+    def select(self, connections):
+        if self.zone is None:
+            return super(ZoneAwareSelector, self).select(connections)
+
+        cached, local = self._local
+        if cached is not connections:
+            local = [c for c in connections if self.is_local(c)]
+            self._local = (connections, local)
+
+        # fall back to the other zones only when no local node is live
+        return super(ZoneAwareSelector, self).select(local or connections)
+
+
+class LatencyAwareSelector(ConnectionSelector):
+    """
+    Selector that prefers the connections which have been answering fastest.
+
+    For every connection it tracks an exponentially weighted moving average
+    (EWMA) of the request latency, along with the number of requests currently
+    in flight. On each selection two distinct connections are picked at random
+    and the one with the lower expected cost (``ewma * (in_flight + 1)``) wins
+    ("power of two choices"). This quickly steers traffic away from a node that
+    is slow (in GC, busy merging, ...) without sending all the traffic to the
+    single fastest node.
+
+    The behavior can be tuned by subclassing and overriding the class
+    attributes:
+
+    :attr decay_time: number of seconds after which an observed latency has
+        lost most (~63%) of its weight in the average
+    :attr failure_penalty: minimum latency, in seconds, recorded for a request
+        that failed, so that nodes which fail fast don't look attractive
+    """
+
+    decay_time = 10.0
+    failure_penalty = 1.0
+
+    def __init__(self, opts):
+        super(LatencyAwareSelector, self).__init__(opts)
+        self._lock = threading.Lock()
+        # connection -> [ewma, in_flight, last_update]
+        self._stats = {}
+
+    def _get_stats(self, connection):
+        stats = self._stats.get(connection)
+        if stats is None:
+            stats = self._stats.setdefault(connection, [0.0, 0, monotonic()])
+        return stats
+
+    def cost(self, connection):
+        """
+        Return the expected cost of sending a request over ``connection``.
+
+        :arg connection: connection to evaluate
+        """
+        stats = self._stats.get(connection)
+        if stats is None:
+            # unknown connections are cheap so that they get probed
+            return 0.0
+        return stats[0] * (stats[1] + 1)
+
+    def select(self, connections):
+        if len(connections) == 2:
+            a, b = connections
+        else:
+            a, b = random.sample(connections, 2)
+        return a if self.cost(a) <= self.cost(b) else b
+
+    def mark_request_start(self, connection):
+        with self._lock:
+            self._get_stats(connection)[1] += 1
+
+    def mark_request_end(self, connection, duration, failed=False):
+        if failed:
+            duration = max(duration, self.failure_penalty)
+        now = monotonic()
+        with self._lock:
+            stats = self._stats.get(connection)
+            if stats is None:
+                # removed from the pool while the request was in flight
+                return
+            stats[1] = max(stats[1] - 1, 0)
+            if stats[0] == 0.0:
+                # first observation, nothing to average with yet
+                stats[0] = duration
+            else:
+                weight = math.exp(-max(now - stats[2], 0) / self.decay_time)
+                stats[0] = stats[0] * weight + duration * (1 - weight)
+            stats[2] = now
+
+    def remove_connections(self, connections):
+        with self._lock:
+            for connection in connections:
+                self._stats.pop(connection, None)
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker of a single connection, used by the
+    :class:`~elasticsearch.ConnectionPool` when given a ``circuit_breaker_class``.
+
+    The breaker keeps the outcome of the last ``window_size`` requests sent over
+    its connection. Once at least ``min_requests`` have been observed, it opens
+    when the ratio of node failures (connection errors, 429 and 5xx responses)
+    reaches ``error_rate_threshold`` or, if ``slow_call_duration`` is set, when
+    the ratio of requests taking longer than that reaches
+    ``slow_rate_threshold``. The pool then takes the connection out of rotation
+    for the same timeout as a dead connection.
+
+    When the timeout is over the breaker is half-open: only
+    ``half_open_requests`` trial requests are let through. If all of them
+    succeed in time the breaker closes again, otherwise it opens right away.
+
+    The behavior can be tuned by subclassing and overriding the class
+    attributes.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    window_size = 20
+    min_requests = 10
+    error_rate_threshold = 0.5
+    #: number of seconds after which a request counts as slow, ``None`` to
+    #: disable
+    slow_call_duration = None
+    slow_rate_threshold = 0.5
+    half_open_requests = 3
+
+    def __init__(self):
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        # (failed, slow) of the last requests
+        self._outcomes = deque(maxlen=self.window_size)
+        self._trials = 0
+        self._successes = 0
+
+    def allow_request(self):
+        """
+        Returns ``True`` if a request can be sent over the connection, taking a
+        trial request when half-open.
+        """
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trials < self.half_open_requests:
+                self._trials += 1
+                return True
+            return self.state == self.CLOSED
+
+    def half_open(self):
+        """Let trial requests through after the breaker has been open."""
+        with self._lock:
+            self.state = self.HALF_OPEN
+            self._trials = self._successes = 0
+
+    def record(self, duration, failed=False):
+        """
+        Record the outcome of a request, returns the new state if it changed.
+
+        :arg duration: number of seconds the request took
+        :arg failed: whether the node failed to serve the request
+        """
+        slow = (
+            self.slow_call_duration is not None and duration >= self.slow_call_duration
+        )
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                if failed or slow:
+                    return self._open()
+                self._successes += 1
+                if self._successes >= self.half_open_requests:
+                    self.state = self.CLOSED
+                    return self.CLOSED
+                return None
+
+            if self.state == self.OPEN:
+                # late response of a request sent before the breaker opened
+                return None
+
+            outcomes = self._outcomes
+            outcomes.append((failed, slow))
+            if len(outcomes) < self.min_requests:
+                return None
+            failures = sum(1 for f, _ in outcomes if f)
+            slow_calls = sum(1 for _, s in outcomes if s)
+            if failures and failures >= self.error_rate_threshold * len(outcomes):
+                return self._open()
+            if slow_calls and slow_calls >= self.slow_rate_threshold * len(outcomes):
+                return self._open()
+            return None
+
+    def _open(self):
+        self.state = self.OPEN
+        self._outcomes.clear()
+        return self.OPEN
+
+
 class ConnectionPool(object):
     """
     Container holding the :class:`~elasticsearch.Connection` instances,
@@ -99,7 +385,10 @@ class ConnectionPool(object):
 
     Initially connections are stored on the class as a list and, along with the
     connection options, get passed to the `ConnectionSelector` instance for
-    future reference.
+    future reference. The list of live connections is never modified in place,
+    every state change (`mark_dead`, `resurrect`) builds a new list and swaps it
+    in atomically, so `get_connection` can hand the current list to the
+    selector without copying or locking it.
 
     Upon each request the `Transport` will ask for a `Connection` via the
     `get_connection` method. If the connection fails (it's `perform_request`
@@ -109,8 +398,23 @@ class ConnectionPool(object):
     the timeout is over the connection will be resurrected and returned to the
     live pool. A connection that has been previously marked as dead and
     succeeds will be marked as live (its fail count will be deleted).
+
+    With ``health_check`` enabled a connection isn't returned to the live pool
+    just because its timeout is over. Instead the `Transport` checks it in the
+    background (via `get_dead_connections_to_check` and `mark_checked`) and
+    it's only resurrected once it responds, so no user request has to find out
+    whether the node is back.
+
+    With a ``circuit_breaker_class`` every connection also gets a
+    :class:`~elasticsearch.connection_pool.CircuitBreaker` fed with the outcome
+    and duration of its requests. A connection whose breaker opens is retired
+    like a dead one, and only a limited number of trial requests is sent to it
+    after its resurrection until the breaker closes again.
     """
 
+    #: whether dead connections are actively checked before being resurrected
+    health_check = False
+
     def __init__(
         self,
         connections,
@@ -118,6 +422,10 @@ class ConnectionPool(object):
         timeout_cutoff=5,
         selector_class=RoundRobinSelector,
         randomize_hosts=True,
+        health_check=False,
+        health_check_timeout=1,
+        circuit_breaker_class=None,
+        selector_kwargs=None,
         **kwargs
     ):
         """
@@ -131,29 +439,120 @@ class ConnectionPool(object):
             subclass to use if more than one connection is live
         :arg randomize_hosts: shuffle the list of connections upon arrival to
             avoid dog piling effect across processes
+        :arg health_check: only resurrect dead connections once they passed a
+            health check (a ``HEAD /`` request) instead of as soon as their
+            timeout is over
+        :arg health_check_timeout: timeout, in seconds, of the health check
+            requests
+        :arg circuit_breaker_class:
+            :class:`~elasticsearch.connection_pool.CircuitBreaker` subclass to
+            use for each connection, no circuit breaking by default
+        :arg selector_kwargs: keyword arguments passed to ``selector_class``,
+            for example the ``zone`` of
+            :class:`~elasticsearch.connection_pool.ZoneAwareSelector`
         """
         if not connections:
             raise ImproperlyConfigured(
                 "No defined connections, you need to " "specify at least one host."
             )
         self.connection_opts = connections
-        self.connections = [c for (c, opts) in connections]
+        live = [c for (c, opts) in connections]
         # remember original connection list for resurrect(force=True)
-        self.orig_connections = tuple(self.connections)
+        self.orig_connections = tuple(live)
+        self._members = frozenset(live)
         # PriorityQueue for thread safety and ease of timeout management
-        self.dead = PriorityQueue(len(self.connections))
+        self.dead = PriorityQueue(len(live))
         self.dead_count = {}
 
+        self.randomize_hosts = randomize_hosts
         if randomize_hosts:
             # randomize the connection list to avoid all clients hitting same node
             # after startup/restart
-            random.shuffle(self.connections)
+            random.shuffle(live)
+
+        # guards the swapping of the live connections list
+        self._lock = threading.Lock()
+        self.connections = live
 
         # default timeout after which to try resurrecting a connection
         self.dead_timeout = dead_timeout
         self.timeout_cutoff = timeout_cutoff
 
-        self.selector = selector_class(dict(connections))
+        self.health_check = health_check
+        self.health_check_timeout = health_check_timeout
+
+        self.selector = selector_class(dict(connections), **(selector_kwargs or {}))
+
+        self.circuit_breakers = None
+        self.circuit_breaker_class = circuit_breaker_class
+        if circuit_breaker_class is not None:
+            self.circuit_breakers = dict(
+                (c, circuit_breaker_class()) for c in self.orig_connections
+            )
+        # connections whose circuit breaker is half-open
+        self._half_open = set()
+
+    @property
+    def connections(self):
+        """
+        Snapshot of the currently live connections. Never modified in place.
+        """
+        return self._connections
+
+    @connections.setter
+    def connections(self, connections):
+        connections = list(connections)
+        # index of each live connection's slot in the list for O(1) lookups
+        self._live_index = {c: i for i, c in enumerate(connections)}
+        self._connections = connections
+
+    def set_connections(self, connections):
+        """
+        Replace the connections of the pool, keeping the state of the ones
+        which are part of both the old and the new list: a dead connection
+        stays on its timeout and keeps its fail count and circuit breaker. New
+        connections are added to the live pool. Returns the list of the
+        connections which were removed.
+
+        :arg connections: list of tuples containing the
+            :class:`~elasticsearch.Connection` instance and it's options
+        """
+        if not connections:
+            raise ImproperlyConfigured(
+                "No defined connections, you need to " "specify at least one host."
+            )
+        new = [c for (c, opts) in connections]
+        members = frozenset(new)
+
+        with self._lock:
+            old = self._members
+            removed = [c for c in self.orig_connections if c not in members]
+            added = [c for c in new if c not in old]
+            if self.randomize_hosts:
+                random.shuffle(added)
+            self.connection_opts = connections
+            self.orig_connections = tuple(new)
+            self._members = members
+            self.connections = [c for c in self._connections if c in members] + added
+
+        dead = self.dead
+        with dead.mutex:
+            dead.queue[:] = [entry for entry in dead.queue if entry[1] in members]
+            heapq.heapify(dead.queue)
+            dead.maxsize = len(new)
+        for connection in removed:
+            self.dead_count.pop(connection, None)
+            self._half_open.discard(connection)
+
+        self.selector.connection_opts = dict(connections)
+        if removed:
+            self.selector.remove_connections(removed)
+        if self.circuit_breakers is not None:
+            breakers = self.circuit_breakers
+            self.circuit_breakers = dict(
+                (c, breakers.get(c) or self.circuit_breaker_class()) for c in new
+            )
+        return removed
 
     def mark_dead(self, connection, now=None):
         """
@@ -164,26 +563,31 @@ class ConnectionPool(object):
         """
         # allow inject for testing purposes
         now = now if now else time.time()
-        try:
-            self.connections.remove(connection)
-        except ValueError:
+        with self._lock:
+            slot = self._live_index.get(connection)
+            if slot is not None:
+                live = self._connections
+                self.connections = live[:slot] + live[slot + 1 :]
+        if slot is None:
             logger.info(
                 "Attempted to remove %r, but it does not exist in the connection pool.",
                 connection,
             )
             # connection not alive or another thread marked it already, ignore
             return
-        else:
-            dead_count = self.dead_count.get(connection, 0) + 1
-            self.dead_count[connection] = dead_count
-            timeout = self.dead_timeout * 2 ** min(dead_count - 1, self.timeout_cutoff)
-            self.dead.put((now + timeout, connection))
-            logger.warning(
-                "Connection %r has failed for %i times in a row, putting on %i second timeout.",
-                connection,
-                dead_count,
-                timeout,
-            )
+        self._put_dead(connection, now)
+
+    def _put_dead(self, connection, now):
+        dead_count = self.dead_count.get(connection, 0) + 1
+        self.dead_count[connection] = dead_count
+        timeout = self.dead_timeout * 2 ** min(dead_count - 1, self.timeout_cutoff)
+        self.dead.put((now + timeout, connection))
+        logger.warning(
+            "Connection %r has failed for %i times in a row, putting on %i second timeout.",
+            connection,
+            dead_count,
+            timeout,
+        )
 
     def mark_live(self, connection):
         """
@@ -192,11 +596,11 @@ class ConnectionPool(object):
 
         :arg connection: the connection to redeem
         """
-        try:
-            del self.dead_count[connection]
-        except KeyError:
-            # race condition, safe to ignore
-            pass
+        # called after every successful request, avoid raising KeyError for
+        # the common case of a connection that has never failed
+        if connection in self.dead_count:
+            # pop() rather than del, another thread may have been faster
+            self.dead_count.pop(connection, None)
 
     def resurrect(self, force=False):
         """
@@ -209,8 +613,22 @@ class ConnectionPool(object):
             always returns a connection.
 
         """
+        # Peek at the heap backing the queue without taking its lock, this is
+        # called for every request and usually there's nothing to resurrect.
+        dead = self.dead.queue
+        if self.health_check and not force:
+            # connections are only resurrected once they pass a health check
+            return
+        try:
+            if dead and not force and dead[0][0] > time.time():
+                # the first connection to be resurrected isn't eligible yet
+                return
+        except IndexError:
+            # another thread emptied the queue in the meantime
+            pass
+
         # no dead connections
-        if self.dead.empty():
+        if not dead:
             # we are forced to return a connection, take one from the original
             # list. This is to avoid a race condition where get_connection can
             # see no live connections but when it calls resurrect self.dead is
@@ -235,11 +653,84 @@ class ConnectionPool(object):
             self.dead.put((timeout, connection))
             return
 
+        if connection not in self._members:
+            # removed from the pool by set_connections() in the meantime
+            return self.resurrect(force) if force else None
+
         # either we were forced or the connection is elligible to be retried
-        self.connections.append(connection)
+        with self._lock:
+            if connection not in self._live_index:
+                self.connections = self._connections + [connection]
+        self._half_open_breaker(connection)
         logger.info("Resurrecting connection %r (force=%s).", connection, force)
         return connection
 
+    def _half_open_breaker(self, connection):
+        """
+        Only let trial requests through to a resurrected connection whose
+        circuit breaker had opened.
+        """
+        if self.circuit_breakers is None:
+            return
+        breaker = self.circuit_breakers.get(connection)
+        if breaker is not None and breaker.state == breaker.OPEN:
+            breaker.half_open()
+            self._half_open.add(connection)
+
+    def get_dead_connections_to_check(self, now=None):
+        """
+        Take all the dead connections whose timeout is over out of the dead
+        queue so they can be health checked. The result of each check has to
+        be reported back via `mark_checked`.
+        """
+        now = now if now else time.time()
+        connections = []
+        while True:
+            try:
+                timeout, connection = self.dead.get(block=False)
+            except Empty:
+                break
+            if timeout > now:
+                # not eligible yet, and neither is anything after it
+                self.dead.put((timeout, connection))
+                break
+            if connection in self._members:
+                connections.append(connection)
+        return connections
+
+    def next_check_time(self):
+        """
+        Return the time at which the next dead connection becomes eligible
+        for a health check, ``None`` if there are no dead connections.
+        """
+        try:
+            return self.dead.queue[0][0]
+        except IndexError:
+            return None
+
+    def mark_checked(self, connection, alive, now=None):
+        """
+        Report the result of a health check of a dead connection. A connection
+        that passed is returned to the live pool and its fail count deleted,
+        otherwise it's put on a (longer) timeout again.
+
+        :arg connection: the checked connection
+        :arg alive: whether the connection passed the health check
+        """
+        if connection not in self._members:
+            # removed from the pool while being checked
+            return
+        if not alive:
+            self._put_dead(connection, now if now else time.time())
+            return
+
+        with self._lock:
+            if connection not in self._live_index:
+                self.connections = self._connections + [connection]
+        self.mark_live(connection)
+        self._half_open_breaker(connection)
+        logger.info("Connection %r passed its health check, resurrecting.", connection)
+
     def get_connection(self):
         """
         Return a connection from the pool using the `ConnectionSelector`
@@ -252,7 +743,8 @@ class ConnectionPool(object):
         Returns a connection instance and it's current fail count.
         """
         self.resurrect()
-        connections = self.connections[:]
+        # the list is never modified in place, no need to copy it
+        connections = self.connections
 
         # no live nodes, resurrect one by force and return it
         if not connections:
@@ -260,10 +752,55 @@ class ConnectionPool(object):
 
         # only call selector if we have a selection
         if len(connections) > 1:
-            return self.selector.select(connections)
+            connection = self.selector.select(connections)
+        else:
+            # only one connection, no need for a selector
+            connection = connections[0]
+
+        if self._half_open and connection in self._half_open:
+            if not self.circuit_breakers[connection].allow_request():
+                # enough trial requests already, use another connection if any
+                others = [c for c in connections if c not in self._half_open]
+                if len(others) > 1:
+                    connection = self.selector.select(others)
+                elif others:
+                    connection = others[0]
+        return connection
+
+    def mark_request_start(self, connection):
+        """
+        Notify the pool (and its selector) that a request is about to be sent
+        over ``connection``.
 
-        # only one connection, no need for a selector
-        return connections[0]
+        :arg connection: the connection used for the request
+        """
+        self.selector.mark_request_start(connection)
+
+    def mark_request_end(self, connection, duration, failed=False):
+        """
+        Notify the pool (and its selector) that a request sent over
+        ``connection`` has finished. Returns ``True`` if the circuit breaker of
+        the connection opened and the connection was marked as dead.
+
+        :arg connection: the connection used for the request
+        :arg duration: number of seconds the request took
+        :arg failed: whether the node failed to serve the request
+        """
+        self.selector.mark_request_end(connection, duration, failed)
+        if self.circuit_breakers is None:
+            return False
+        breaker = self.circuit_breakers.get(connection)
+        if breaker is None:
+            return False
+        state = breaker.record(duration, failed)
+        if state == breaker.OPEN:
+            self._half_open.discard(connection)
+            logger.warning("Circuit breaker of connection %r opened.", connection)
+            self.mark_dead(connection)
+            return True
+        if state == breaker.CLOSED:
+            self._half_open.discard(connection)
+        return False
 
     def close(self):
         """
@@ -300,6 +837,13 @@ class DummyConnectionPool(ConnectionPool):
         pass
 
     mark_dead = mark_live = resurrect = _noop
+    mark_request_start = mark_request_end = _noop
+
+    def get_dead_connections_to_check(self, now=None):
+        return []
+
+    def next_check_time(self):
+        return None
 
 
 class EmptyConnectionPool(ConnectionPool):
@@ -316,3 +860,10 @@ class EmptyConnectionPool(ConnectionPool):
         pass
 
     close = mark_dead = mark_live = resurrect = _noop
+    mark_request_start = mark_request_end = _noop
+
+    def get_dead_connections_to_check(self, now=None):
+        return []
+
+    def next_check_time(self):
+        return None
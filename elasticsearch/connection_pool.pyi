@@ -16,7 +16,17 @@
 #  under the License.
 
 import logging
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Type, Union
+from typing import (
+    Any,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 
 from .connection import Connection
 
@@ -31,10 +41,47 @@ class ConnectionSelector(object):
     connection_opts: Sequence[Tuple[Connection, Any]]
     def __init__(self, opts: Sequence[Tuple[Connection, Any]]) -> None: ...
     def select(self, connections: Sequence[Connection]) -> Connection: ...
+    def mark_request_start(self, connection: Connection) -> None: ...
+    def mark_request_end(
+        self, connection: Connection, duration: float, failed: bool = ...
+    ) -> None: ...
+    def remove_connections(self, connections: Sequence[Connection]) -> None: ...
 
 class RandomSelector(ConnectionSelector): ...
 class RoundRobinSelector(ConnectionSelector): ...
 
+class ZoneAwareSelector(RoundRobinSelector):
+    zone: Optional[str]
+    zone_attribute: str
+    def __init__(
+        self,
+        opts: Sequence[Tuple[Connection, Any]],
+        zone: Optional[str] = ...,
+        zone_attribute: Optional[str] = ...,
+    ) -> None: ...
+    def is_local(self, connection: Connection) -> bool: ...
+
+class LatencyAwareSelector(ConnectionSelector):
+    decay_time: float
+    failure_penalty: float
+    def cost(self, connection: Connection) -> float: ...
+
+class CircuitBreaker(object):
+    CLOSED: str
+    OPEN: str
+    HALF_OPEN: str
+    window_size: int
+    min_requests: int
+    error_rate_threshold: float
+    slow_call_duration: Optional[float]
+    slow_rate_threshold: float
+    half_open_requests: int
+    state: str
+    def __init__(self) -> None: ...
+    def allow_request(self) -> bool: ...
+    def half_open(self) -> None: ...
+    def record(self, duration: float, failed: bool = ...) -> Optional[str]: ...
+
 class ConnectionPool(object):
     connections_opts: Sequence[Tuple[Connection, Any]]
     connections: Sequence[Connection]
@@ -44,6 +91,11 @@ class ConnectionPool(object):
     dead_timeout: float
     timeout_cutoff: int
     selector: ConnectionSelector
+    health_check: bool
+    health_check_timeout: float
+    randomize_hosts: bool
+    circuit_breakers: Optional[Dict[Connection, CircuitBreaker]]
+    circuit_breaker_class: Optional[Type[CircuitBreaker]]
     def __init__(
         self,
         connections: Sequence[Tuple[Connection, Any]],
@@ -51,12 +103,30 @@ class ConnectionPool(object):
         timeout_cutoff: int = ...,
         selector_class: Type[ConnectionSelector] = ...,
         randomize_hosts: bool = ...,
+        health_check: bool = ...,
+        health_check_timeout: float = ...,
+        circuit_breaker_class: Optional[Type[CircuitBreaker]] = ...,
+        selector_kwargs: Optional[Mapping[str, Any]] = ...,
         **kwargs: Any
     ) -> None: ...
+    def set_connections(
+        self, connections: Sequence[Tuple[Connection, Any]]
+    ) -> List[Connection]: ...
     def mark_dead(self, connection: Connection, now: Optional[float] = ...) -> None: ...
     def mark_live(self, connection: Connection) -> None: ...
     def resurrect(self, force: bool = ...) -> Optional[Connection]: ...
+    def get_dead_connections_to_check(
+        self, now: Optional[float] = ...
+    ) -> List[Connection]: ...
+    def next_check_time(self) -> Optional[float]: ...
+    def mark_checked(
+        self, connection: Connection, alive: bool, now: Optional[float] = ...
+    ) -> None: ...
     def get_connection(self) -> Connection: ...
+    def mark_request_start(self, connection: Connection) -> None: ...
+    def mark_request_end(
+        self, connection: Connection, duration: float, failed: bool = ...
+    ) -> bool: ...
     def close(self) -> None: ...
     def __repr__(self) -> str: ...
 
@@ -68,9 +138,11 @@ class DummyConnectionPool(ConnectionPool):
     def close(self) -> None: ...
     def _noop(self, *args: Any, **kwargs: Any) -> Any: ...
     mark_dead = mark_live = resurrect = _noop
+    mark_request_start = mark_request_end = _noop
 
 class EmptyConnectionPool(ConnectionPool):
     def __init__(self, *_: Any, **__: Any) -> None: ...
     def get_connection(self) -> Connection: ...
     def _noop(self, *args: Any, **kwargs: Any) -> Any: ...
     close = mark_dead = mark_live = resurrect = _noop
+    mark_request_start = mark_request_end = _noop
@@ -26,6 +26,7 @@ __all__ = [
     "ConnectionError",
     "SSLError",
     "ConnectionTimeout",
+    "PoolTimeout",
     "AuthenticationException",
     "AuthorizationException",
 ]
@@ -133,6 +134,20 @@ class ConnectionTimeout(ConnectionError):
         )
 
 
+class PoolTimeout(TransportError):
+    """
+    Timed out waiting for a free connection of the pool of a
+    :class:`~elasticsearch.Connection`. The node wasn't reached so it isn't
+    marked as failed and the request isn't retried on another node.
+    """
+
+    def __str__(self):
+        return "PoolTimeout caused by - %s(%s)" % (
+            self.info.__class__.__name__,
+            self.info,
+        )
+
+
 class NotFoundError(TransportError):
     """Exception representing a 404 status code."""
 
@@ -38,6 +38,9 @@ class SSLError(ConnectionError): ...
 class ConnectionTimeout(ConnectionError):
     def __str__(self) -> str: ...
 
+class PoolTimeout(TransportError):
+    def __str__(self) -> str: ...
+
 class NotFoundError(TransportError): ...
 class ConflictError(TransportError): ...
 class RequestError(TransportError): ...
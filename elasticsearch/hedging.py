@@ -0,0 +1,137 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""
+Hedged requests: when a read doesn't get an answer within a delay, the
+:class:`~elasticsearch.Transport` sends a duplicate to another node and uses
+whichever response comes first.
+"""
+
+import threading
+from collections import deque
+
+from .routing import is_read_request
+
+
+class Hedging(object):
+    """
+    Policy deciding which requests are hedged and when.
+
+    Only reads are hedged: ``search``, ``count``, ``mget`` and the single
+    document ``get`` (including ``get_source`` and ``exists``). Scroll requests
+    are never hedged as every duplicate would open a search context.
+
+    The delay is either fixed or a percentile of the latency observed for the
+    hedged requests (over the last ``window`` requests), the fixed delay is then
+    used until enough requests have been observed.
+
+    The extra load is capped by a token bucket: every eligible request adds
+    ``max_ratio`` tokens, up to ``burst``, and a hedge takes one, so that at
+    most ``max_ratio`` of the requests get hedged over time.
+
+    :arg delay: number of seconds to wait before hedging a request
+    :arg percentile: hedge after the given percentile (``0-100``) of the
+        observed latency
+    :arg max_ratio: maximum ratio of hedged requests, defaults to 0.1
+    :arg window: number of recent latencies the percentile is computed from
+    """
+
+    endpoints = ("_search", "_count", "_mget")
+    #: number of observed requests needed before using the percentile
+    min_samples = 20
+    #: maximum number of hedges available at once
+    burst = 10
+
+    def __init__(self, delay=None, percentile=None, max_ratio=0.1, window=1000):
+        if delay is None and percentile is None:
+            raise ValueError("Hedging requires a delay or a percentile.")
+        self.delay = delay
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._samples = deque(maxlen=window)
+        # percentile is recomputed every `_refresh_every` samples
+        self._refresh_every = max(window // 10, 1)
+        self._until_refresh = 0
+        self._percentile_delay = None
+
+        #: number of eligible requests
+        self.requests = 0
+        #: number of hedges sent
+        self.hedged = 0
+        #: number of hedges which answered first
+        self.wins = 0
+        #: number of hedges not sent because of ``max_ratio``
+        self.denied = 0
+
+    def is_hedgeable(self, method, url, params=None):
+        """
+        Returns ``True`` if the request is a read which can be safely sent
+        twice.
+        """
+        return is_read_request(method, url, params, self.endpoints)
+
+    def get_delay(self):
+        """
+        Returns the number of seconds to wait before hedging, ``None`` if the
+        request shouldn't be hedged at all because there is no delay known yet
+        or the budget for extra load has run out.
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self._tokens + self.max_ratio, self.burst)
+            if self._tokens < 1:
+                return None
+            if self._percentile_delay is not None:
+                return self._percentile_delay
+            return self.delay
+
+    def acquire(self):
+        """
+        Take a token to send a hedge, returns ``False`` if none is left.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                self.denied += 1
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    def record_win(self):
+        """Record that a hedge answered before the original request."""
+        with self._lock:
+            self.wins += 1
+
+    def record(self, duration):
+        """
+        Record the latency of a successful request.
+
+        :arg duration: number of seconds the request took
+        """
+        if self.percentile is None:
+            return
+        with self._lock:
+            self._samples.append(duration)
+            self._until_refresh -= 1
+            if self._until_refresh > 0 or len(self._samples) < self.min_samples:
+                return
+            self._until_refresh = self._refresh_every
+            samples = sorted(self._samples)
+        index = int(round(self.percentile / 100.0 * (len(samples) - 1)))
+        self._percentile_delay = samples[index]
@@ -0,0 +1,44 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from typing import Any, Mapping, Optional, Tuple
+
+class Hedging(object):
+    endpoints: Tuple[str, ...]
+    min_samples: int
+    burst: float
+    delay: Optional[float]
+    percentile: Optional[float]
+    max_ratio: float
+    requests: int
+    hedged: int
+    wins: int
+    denied: int
+    def __init__(
+        self,
+        delay: Optional[float] = ...,
+        percentile: Optional[float] = ...,
+        max_ratio: float = ...,
+        window: int = ...,
+    ) -> None: ...
+    def is_hedgeable(
+        self, method: str, url: str, params: Optional[Mapping[str, Any]] = ...
+    ) -> bool: ...
+    def get_delay(self) -> Optional[float]: ...
+    def acquire(self) -> bool: ...
+    def record_win(self) -> None: ...
+    def record(self, duration: float) -> None: ...
@@ -0,0 +1,180 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""
+Client-side DNS resolution, used by the ``resolve_dns`` option of
+:class:`~elasticsearch.Transport` to open one connection per address of the
+configured hostnames.
+"""
+
+import logging
+import socket
+import threading
+import time
+
+logger = logging.getLogger("elasticsearch")
+
+
+def is_ip_address(host):
+    """Returns ``True`` if ``host`` is an IPv4 or IPv6 address."""
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, host)
+        except (socket.error, ValueError):
+            continue
+        return True
+    return False
+
+
+def get_addresses(addrinfo):
+    """
+    Distinct IP addresses of the result of :func:`socket.getaddrinfo`, in the
+    order they were returned.
+    """
+    addresses = []
+    for _, _, _, _, sockaddr in addrinfo:
+        if sockaddr[0] not in addresses:
+            addresses.append(sockaddr[0])
+    return addresses
+
+
+class DNSResolver(object):
+    """
+    Expands the hosts given by hostname into one host per address the name
+    resolves to (its A and AAAA records), so that the requests are spread
+    over all of them and a failing address is marked dead on its own, the way
+    sniffed nodes are.
+
+    The expanded hosts connect to the address and keep the hostname as
+    ``server_hostname``, used to verify the TLS certificate, and in the
+    ``Host`` header of their requests, used by virtual hosts and proxies.
+
+    The hostnames are resolved again every ``ttl`` seconds (the TTL of the
+    records isn't exposed by the system resolver). When a lookup fails the
+    previous addresses are kept, a hostname which never resolved is kept as is
+    and left to the connection.
+
+    :arg ttl: number of seconds between resolutions, defaults to 60
+    :arg family: only use the addresses of the given family
+        (``socket.AF_INET`` or ``socket.AF_INET6``), both by default
+    """
+
+    def __init__(self, ttl=60, family=socket.AF_UNSPEC):
+        self.ttl = ttl
+        self.family = family
+        self._lock = threading.Lock()
+        # hostname -> list of addresses
+        self._addresses = {}
+        self._next_refresh = time.time() + ttl
+
+        #: number of lookups
+        self.lookups = 0
+        #: number of lookups which failed
+        self.failures = 0
+
+    def get_hostnames(self, hosts, unknown_only=False):
+        """
+        Returns the hostnames of ``hosts`` which need resolving, only those
+        which weren't looked up yet if ``unknown_only`` is set.
+        """
+        names = []
+        for host in hosts:
+            name = self._get_hostname(host)
+            if name is None or name in names:
+                continue
+            if unknown_only and name in self._addresses:
+                continue
+            names.append(name)
+        return names
+
+    def _get_hostname(self, host):
+        name = host.get("host")
+        if not name or host.get("unix_socket") or is_ip_address(name):
+            return None
+        return name
+
+    def refresh_due(self, now=None):
+        """
+        Returns ``True`` when the hostnames should be resolved again, only to
+        the first caller so that a single one does it.
+        """
+        now = time.time() if now is None else now
+        if now < self._next_refresh:
+            return False
+        with self._lock:
+            if now < self._next_refresh:
+                return False
+            self._next_refresh = now + self.ttl
+            return True
+
+    def resolve(self, hostname):
+        """
+        Look ``hostname`` up with :func:`socket.getaddrinfo` (blocking) and
+        returns its addresses.
+        """
+        try:
+            addrinfo = socket.getaddrinfo(
+                hostname, None, self.family, socket.SOCK_STREAM
+            )
+        except socket.error as e:
+            return self.fail(hostname, e)
+        return self.update(hostname, addrinfo)
+
+    def update(self, hostname, addrinfo):
+        """
+        Store the result of a lookup of ``hostname`` and returns its
+        addresses.
+        """
+        addresses = get_addresses(addrinfo)
+        with self._lock:
+            self.lookups += 1
+            if not addresses:
+                return self._addresses.setdefault(hostname, [])
+            self._addresses[hostname] = addresses
+        return addresses
+
+    def fail(self, hostname, error):
+        """
+        Record a failed lookup of ``hostname``, returns the addresses kept for
+        it.
+        """
+        logger.warning("Failed to resolve %s: %s", hostname, error)
+        with self._lock:
+            self.lookups += 1
+            self.failures += 1
+            return self._addresses.setdefault(hostname, [])
+
+    def expand(self, hosts):
+        """
+        Returns ``hosts`` with every host given by hostname replaced by one
+        host per known address.
+        """
+        out = []
+        for host in hosts:
+            name = self._get_hostname(host)
+            addresses = self._addresses.get(name) if name is not None else None
+            if not addresses:
+                out.append(host)
+                continue
+            port = host.get("port")
+            headers = {"host": name if port is None else "%s:%d" % (name, port)}
+            headers.update(host.get("headers") or ())
+            for address in addresses:
+                expanded = dict(host, host=address, headers=headers)
+                expanded.setdefault("server_hostname", name)
+                out.append(expanded)
+        return out
@@ -0,0 +1,41 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import logging
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
+
+logger: logging.Logger
+
+def is_ip_address(host: str) -> bool: ...
+def get_addresses(addrinfo: Sequence[Tuple[Any, ...]]) -> List[str]: ...
+
+class DNSResolver(object):
+    ttl: float
+    family: int
+    lookups: int
+    failures: int
+    def __init__(self, ttl: float = ..., family: int = ...) -> None: ...
+    def get_hostnames(
+        self, hosts: Sequence[Mapping[str, Any]], unknown_only: bool = ...
+    ) -> List[str]: ...
+    def refresh_due(self, now: Optional[float] = ...) -> bool: ...
+    def resolve(self, hostname: str) -> List[str]: ...
+    def update(
+        self, hostname: str, addrinfo: Sequence[Tuple[Any, ...]]
+    ) -> List[str]: ...
+    def fail(self, hostname: str, error: Exception) -> List[str]: ...
+    def expand(self, hosts: Sequence[Mapping[str, Any]]) -> List[Mapping[str, Any]]: ...
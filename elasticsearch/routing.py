@@ -0,0 +1,304 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""
+Client-side document routing, used by the ``shard_aware_routing`` option of
+:class:`~elasticsearch.Transport` to send single-document requests straight
+to a node holding the document's shard.
+"""
+
+from .compat import unquote
+
+# shard copies able to serve requests
+_ACTIVE_STATES = ("STARTED", "RELOCATING")
+
+_READ_ENDPOINTS = ("_doc", "_source")
+_WRITE_ENDPOINTS = {
+    "PUT": ("_doc", "_create"),
+    "POST": ("_doc", "_create", "_update"),
+    "DELETE": ("_doc",),
+}
+
+
+def _to_int32(value):
+    value &= 0xFFFFFFFF
+    return value - 0x100000000 if value & 0x80000000 else value
+
+
+def murmur3_32(data, seed=0):
+    """
+    MurmurHash3 (x86, 32-bit) of ``data``, returned as a signed integer like
+    Java's ``int``.
+    """
+    data = bytearray(data)
+    length = len(data)
+    h = seed & 0xFFFFFFFF
+    c1, c2 = 0xCC9E2D51, 0x1B873593
+
+    rounded_end = length & ~3
+    for i in range(0, rounded_end, 4):
+        k = data[i] | data[i + 1] << 8 | data[i + 2] << 16 | data[i + 3] << 24
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+        h = ((h << 13) | (h >> 19)) & 0xFFFFFFFF
+        h = (h * 5 + 0xE6546B64) & 0xFFFFFFFF
+
+    k = 0
+    tail = length & 3
+    if tail == 3:
+        k ^= data[rounded_end + 2] << 16
+    if tail >= 2:
+        k ^= data[rounded_end + 1] << 8
+    if tail >= 1:
+        k ^= data[rounded_end]
+        k = (k * c1) & 0xFFFFFFFF
+        k = ((k << 15) | (k >> 17)) & 0xFFFFFFFF
+        k = (k * c2) & 0xFFFFFFFF
+        h ^= k
+
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85EBCA6B) & 0xFFFFFFFF
+    h ^= h >> 13
+    h = (h * 0xC2B2AE35) & 0xFFFFFFFF
+    h ^= h >> 16
+    return _to_int32(h)
+
+
+def routing_hash(routing):
+    """
+    Hash of a ``_routing`` (or ``_id``) value, computed the same way as
+    Elasticsearch's ``Murmur3HashFunction``: over the UTF-16 code units of the
+    string.
+    """
+    if isinstance(routing, bytes):
+        routing = routing.decode("utf-8")
+    return murmur3_32(routing.encode("utf-16-le"))
+
+
+class IndexRouting(object):
+    """
+    Routing information of a concrete index: its sharding settings and which
+    nodes hold a copy of each shard.
+
+    :arg number_of_shards: number of primary shards of the index
+    :arg routing_num_shards: number of shards used for hashing documents
+        (``routing_num_shards`` of the index metadata), differs from
+        ``number_of_shards`` for indices created by a split or a shrink
+    :arg routing_partition_size: the ``index.routing_partition_size`` setting
+    :arg shards: dict mapping each shard number to a list of ``(node_id,
+        primary)`` tuples, one per active copy
+    """
+
+    def __init__(
+        self,
+        number_of_shards,
+        routing_num_shards=None,
+        routing_partition_size=1,
+        shards=None,
+    ):
+        self.number_of_shards = number_of_shards
+        self.routing_num_shards = routing_num_shards or number_of_shards
+        self.routing_factor = self.routing_num_shards // number_of_shards
+        self.routing_partition_size = routing_partition_size
+        self.shards = shards or {}
+
+    def shard_id(self, doc_id, routing=None):
+        """
+        Returns the number of the shard holding the document, ``None`` if it
+        can't be computed on the client.
+        """
+        offset = 0
+        if routing is None:
+            if self.routing_partition_size > 1:
+                # partitioned indices require a routing value
+                return None
+            routing = doc_id
+        elif self.routing_partition_size > 1:
+            offset = routing_hash(doc_id) % self.routing_partition_size
+
+        hash = _to_int32(routing_hash(routing) + offset)
+        # Python's modulo of a negative number has the same semantics as Java's
+        # Math.floorMod() used by Elasticsearch.
+        return (hash % self.routing_num_shards) // self.routing_factor
+
+    def get_node_ids(self, shard, primary=False):
+        """
+        Returns the ids of the nodes holding an active copy of ``shard``, only
+        the one holding the primary if ``primary`` is set.
+        """
+        return [
+            node_id
+            for node_id, is_primary in self.shards.get(shard, ())
+            if is_primary or not primary
+        ]
+
+    @classmethod
+    def from_cluster_state(cls, metadata, routing_table):
+        """
+        Build from the ``metadata`` and ``routing_table`` sections of the
+        cluster state of a single index.
+        """
+        settings = metadata.get("settings", {}).get("index", {})
+        shards = {}
+        for shard, copies in routing_table.get("shards", {}).items():
+            shards[int(shard)] = [
+                (copy["node"], copy.get("primary", False))
+                for copy in copies
+                if copy.get("node") and copy.get("state") in _ACTIVE_STATES
+            ]
+        return cls(
+            int(settings["number_of_shards"]),
+            routing_num_shards=metadata.get("routing_num_shards"),
+            routing_partition_size=int(settings.get("routing_partition_size", 1)),
+            shards=shards,
+        )
+
+
+def get_document_target(method, url, params=None):
+    """
+    Recognize single-document requests (get, index, create, update and
+    delete by ``_id``). Returns a ``(index, doc_id, routing, write)`` tuple, or
+    ``None`` if the request doesn't target a single document.
+    """
+    parts = url.split("?", 1)[0].strip("/").split("/")
+    if len(parts) != 3:
+        return None
+    index, endpoint, doc_id = parts
+
+    if method in ("GET", "HEAD"):
+        if endpoint not in _READ_ENDPOINTS:
+            return None
+        write = False
+    elif endpoint in _WRITE_ENDPOINTS.get(method, ()):
+        write = True
+    else:
+        return None
+
+    routing = params.get("routing") if params else None
+    if isinstance(routing, bytes):
+        routing = routing.decode("utf-8")
+    index, doc_id = unquote(index), unquote(doc_id)
+    if not index or not doc_id or "," in index or "*" in index:
+        return None
+    return index, doc_id, routing, write
+
+
+def is_read_request(method, url, params=None, endpoints=()):
+    """
+    Returns ``True`` for the reads which can safely be sent more than once or
+    answered for several callers: requests to one of ``endpoints`` (e.g.
+    ``_search``) and single-document gets. Scroll requests are excluded as
+    they open a search context.
+    """
+    if params and "scroll" in params:
+        return False
+    if method in ("GET", "POST"):
+        endpoint = url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+        if endpoint in endpoints:
+            return True
+    if method in ("GET", "HEAD"):
+        target = get_document_target(method, url, params)
+        return target is not None and not target[3]
+    return False
+
+
+class ShardRouter(object):
+    """
+    Table of the shard copies of the indices the client sends single-document
+    requests to. Indices are looked up by the name used in the requests (an
+    index or an alias pointing to a single index).
+
+    The table itself doesn't perform any requests. Names it doesn't know yet
+    are collected in ``pending`` and the
+    :class:`~elasticsearch.Transport` refreshes the table from the cluster
+    state in the background via `update`.
+    """
+
+    def __init__(self):
+        # name used in requests -> IndexRouting, None if not routable
+        self.indices = {}
+        # node id -> (host, port)
+        self.nodes = {}
+        self.pending = set()
+
+    def request_index(self, name):
+        """
+        Remember to fetch the routing information for ``name`` on the next
+        refresh. Returns ``True`` if it wasn't known yet.
+        """
+        if name in self.indices or name in self.pending:
+            return False
+        self.pending.add(name)
+        return True
+
+    def get_node_addresses(self, index, doc_id, routing=None, write=False):
+        """
+        Returns the ``(host, port)`` addresses of the nodes which can serve a
+        request for the document directly (only the primary for writes),
+        ``None`` if unknown.
+        """
+        index_routing = self.indices.get(index)
+        if index_routing is None:
+            return None
+        shard = index_routing.shard_id(doc_id, routing)
+        if shard is None:
+            return None
+        nodes = self.nodes
+        return [
+            nodes[node_id]
+            for node_id in index_routing.get_node_ids(shard, primary=write)
+            if node_id in nodes
+        ]
+
+    def names(self):
+        """All the index names to fetch the routing information for."""
+        return sorted(set(self.indices) | self.pending)
+
+    def update(self, names, cluster_state, nodes):
+        """
+        Replace the routing table.
+
+        :arg names: the index names the cluster state was requested for
+        :arg cluster_state: response of
+            ``GET /_cluster/state/metadata,routing_table/<names>``
+        :arg nodes: dict mapping node ids to their ``(host, port)`` address
+        """
+        metadata = (cluster_state.get("metadata") or {}).get("indices") or {}
+        routing_table = (cluster_state.get("routing_table") or {}).get("indices") or {}
+
+        indices = {}
+        for name in names:
+            concrete = [
+                index
+                for index, index_metadata in metadata.items()
+                if index == name or name in (index_metadata.get("aliases") or ())
+            ]
+            # unknown indices and aliases pointing to several indices aren't
+            # routed, this is retried on the next refresh
+            if len(concrete) != 1 or concrete[0] not in routing_table:
+                indices[name] = None
+                continue
+            indices[name] = IndexRouting.from_cluster_state(
+                metadata[concrete[0]], routing_table[concrete[0]]
+            )
+
+        self.nodes = dict(nodes)
+        self.indices = indices
+        self.pending.difference_update(names)
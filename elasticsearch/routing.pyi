@@ -0,0 +1,82 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+def murmur3_32(data: Union[bytes, bytearray], seed: int = ...) -> int: ...
+def routing_hash(routing: Union[str, bytes]) -> int: ...
+
+class IndexRouting(object):
+    number_of_shards: int
+    routing_num_shards: int
+    routing_factor: int
+    routing_partition_size: int
+    shards: Dict[int, List[Tuple[str, bool]]]
+    def __init__(
+        self,
+        number_of_shards: int,
+        routing_num_shards: Optional[int] = ...,
+        routing_partition_size: int = ...,
+        shards: Optional[Dict[int, List[Tuple[str, bool]]]] = ...,
+    ) -> None: ...
+    def shard_id(self, doc_id: str, routing: Optional[str] = ...) -> Optional[int]: ...
+    def get_node_ids(self, shard: int, primary: bool = ...) -> List[str]: ...
+    @classmethod
+    def from_cluster_state(
+        cls, metadata: Mapping[str, Any], routing_table: Mapping[str, Any]
+    ) -> "IndexRouting": ...
+
+def get_document_target(
+    method: str, url: str, params: Optional[Mapping[str, Any]] = ...
+) -> Optional[Tuple[str, str, Optional[str], bool]]: ...
+def is_read_request(
+    method: str,
+    url: str,
+    params: Optional[Mapping[str, Any]] = ...,
+    endpoints: Collection[str] = ...,
+) -> bool: ...
+
+class ShardRouter(object):
+    indices: Dict[str, Optional[IndexRouting]]
+    nodes: Dict[str, Tuple[str, int]]
+    pending: Set[str]
+    def __init__(self) -> None: ...
+    def request_index(self, name: str) -> bool: ...
+    def get_node_addresses(
+        self,
+        index: str,
+        doc_id: str,
+        routing: Optional[str] = ...,
+        write: bool = ...,
+    ) -> Optional[List[Tuple[str, int]]]: ...
+    def names(self) -> List[str]: ...
+    def update(
+        self,
+        names: List[str],
+        cluster_state: Mapping[str, Any],
+        nodes: Mapping[str, Tuple[str, int]],
+    ) -> None: ...
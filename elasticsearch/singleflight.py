@@ -0,0 +1,148 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""
+Single-flight requests: identical reads issued concurrently are sent once and
+every caller gets the response.
+"""
+
+import copy
+import threading
+
+from .routing import is_read_request
+
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight(object):
+    """
+    Coalesces identical reads in flight: while a request is waiting for its
+    response, the same request (same method, url, params, headers and body)
+    issued from another thread waits for that response instead of being sent
+    again. Errors are raised in every caller.
+
+    Only reads are coalesced: ``search``, ``count``, ``mget``, ``msearch`` and
+    the single document ``get`` (including ``get_source`` and ``exists``).
+    Scroll requests are never coalesced.
+
+    When a response was shared every caller gets its own deep copy of it, so
+    that callers modifying their response don't affect each other. Pass
+    ``copy_results=False`` to skip the copies if the responses are only read,
+    the callers then get the same object.
+
+    :arg copy_results: give every caller its own copy of a shared response,
+        defaults to ``True``
+    """
+
+    endpoints = ("_search", "_count", "_mget", "_msearch")
+
+    def __init__(self, copy_results=True):
+        self.copy_results = copy_results
+        self._calls = {}
+        self._lock = threading.Lock()
+
+        #: number of eligible requests
+        self.requests = 0
+        #: number of requests answered by another request in flight
+        self.coalesced = 0
+
+    def get_key(
+        self,
+        method,
+        url,
+        headers,
+        params,
+        body,
+        ignore,
+        timeout,
+        total_timeout=None,
+        priority=None,
+    ):
+        """
+        Returns the key identifying the request, ``None`` if it can't be
+        coalesced.
+        """
+        if not is_read_request(method, url, params, self.endpoints):
+            return None
+        try:
+            key = (
+                method,
+                url,
+                tuple(sorted(params.items())) if params else (),
+                tuple(sorted(headers.items())) if headers else (),
+                body,
+                tuple(ignore),
+                timeout,
+                total_timeout,
+                priority,
+            )
+            hash(key)
+        except TypeError:
+            # unhashable parameter values
+            return None
+        return key
+
+    def _copy(self, result):
+        return copy.deepcopy(result) if self.copy_results else result
+
+    def do(self, key, func, *args):
+        """
+        Call ``func(*args)`` unless a call for ``key`` is already in flight,
+        in which case wait for its result.
+        """
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return self._copy(call.result)
+
+        try:
+            call.result = func(*args)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.waiters > 0
+            call.event.set()
+        return self._copy(call.result) if shared else call.result
+
+    def stats(self):
+        """Returns the counters as a dict."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
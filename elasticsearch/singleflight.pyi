@@ -0,0 +1,39 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from typing import Any, Callable, Collection, Dict, Hashable, Mapping, Optional, Tuple
+
+class SingleFlight(object):
+    endpoints: Tuple[str, ...]
+    copy_results: bool
+    requests: int
+    coalesced: int
+    def __init__(self, copy_results: bool = ...) -> None: ...
+    def get_key(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]],
+        params: Optional[Mapping[str, Any]],
+        body: Optional[bytes],
+        ignore: Collection[int],
+        timeout: Optional[float],
+        total_timeout: Optional[float] = ...,
+        priority: Optional[str] = ...,
+    ) -> Optional[Hashable]: ...
+    def do(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Any: ...
+    def stats(self) -> Dict[str, int]: ...
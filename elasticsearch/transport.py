@@ -15,21 +15,60 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import logging
+import threading
 import time
+import warnings
 from itertools import chain
 from platform import python_version
 
+import urllib3  # type: ignore
+
 from ._version import __versionstr__
-from .connection import Urllib3HttpConnection
+from .budget import RetryBudget
+from .compat import Empty, Queue, monotonic, quote
+from .connection import RequestsHttpConnection, Urllib3HttpConnection
+from .connection.base import CA_CERTS, RawResponse
+from .connection.tls import create_client_ssl_context
 from .connection_pool import ConnectionPool, DummyConnectionPool, EmptyConnectionPool
 from .exceptions import (
     ConnectionError,
     ConnectionTimeout,
+    ImproperlyConfigured,
+    PoolTimeout,
     SerializationError,
     TransportError,
 )
+from .hedging import Hedging
+from .resolver import DNSResolver
+from .routing import ShardRouter, get_document_target
 from .serializer import DEFAULT_SERIALIZERS, Deserializer, JSONSerializer
-from .utils import _client_meta_version
+from .singleflight import SingleFlight
+from .utils import _client_meta_version, _Workers
+
+logger = logging.getLogger("elasticsearch")
+
+# minimum number of seconds between two sniffs in the background
+_MIN_SNIFF_INTERVAL = 1.0
+# timeout of the last attempt when the total timeout is (almost) over
+_MIN_ATTEMPT_TIMEOUT = 0.001
+
+# parts of the cluster state needed to build the shard routing table
+_SHARD_ROUTING_PARAMS = {
+    "ignore_unavailable": "true",
+    "allow_no_indices": "true",
+    "filter_path": ",".join(
+        (
+            "metadata.indices.*.settings.index.number_of_shards",
+            "metadata.indices.*.settings.index.routing_partition_size",
+            "metadata.indices.*.routing_num_shards",
+            "metadata.indices.*.aliases",
+            "routing_table.indices.*.shards.*.state",
+            "routing_table.indices.*.shards.*.primary",
+            "routing_table.indices.*.shards.*.node",
+        )
+    ),
+}
 
 
 def get_host_info(node_info, host):
@@ -52,6 +91,120 @@ def get_host_info(node_info, host):
     return host
 
 
+def _is_node_failure(error):
+    """
+    Returns ``True`` if the error means the node failed to serve the request,
+    as opposed to the request itself being invalid (4xx) or having waited too
+    long for a free connection of the client (:class:`PoolTimeout`).
+    """
+    if isinstance(error, PoolTimeout):
+        return False
+    if isinstance(error, ConnectionError):
+        return True
+    status = error.status_code
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+def _is_streamed_body(body):
+    """
+    Returns ``True`` if ``body`` is a file object or an iterator of bytes,
+    which is passed as-is to the connection to be streamed to the node.
+    """
+    return (
+        hasattr(body, "read")
+        or hasattr(body, "__next__")
+        or hasattr(body, "next")
+        or hasattr(body, "__aiter__")
+    )
+
+
+def _body_position(body):
+    """
+    Returns the position to rewind the streamed ``body`` to before it's sent
+    again, ``None`` if it isn't a seekable file object and can be sent only
+    once.
+    """
+    try:
+        if body.seekable():
+            return body.tell()
+    except (AttributeError, IOError, OSError, ValueError):
+        pass
+    return None
+
+
+def _within_deadline(request, connection, remaining):
+    """
+    Returns the ``request`` arguments of `_perform_on_connection` with the
+    timeout capped to the ``remaining`` seconds of the total timeout.
+    """
+    timeout = request[6]
+    if timeout is None:
+        timeout = getattr(connection, "timeout", None)
+    # the connections reject a timeout of 0
+    remaining = max(remaining, _MIN_ATTEMPT_TIMEOUT)
+    if timeout is None or timeout > remaining:
+        timeout = remaining
+    return request[:6] + (timeout,) + request[7:]
+
+
+# options replaced by the SSL context with ``shared_ssl_context``
+_SSL_OPTIONS = (
+    "verify_certs",
+    "ssl_show_warn",
+    "ca_certs",
+    "client_cert",
+    "client_key",
+    "ssl_version",
+)
+
+
+def _with_shared_ssl_context(kwargs):
+    """
+    Returns the connection options with the SSL options replaced by a single
+    SSL context built from them.
+    """
+    kwargs = dict(kwargs)
+    options = dict((key, kwargs.pop(key)) for key in _SSL_OPTIONS if key in kwargs)
+    verify_certs = options.get("verify_certs", True)
+    if not verify_certs and options.get("ssl_show_warn", True):
+        warnings.warn("Connecting using SSL with verify_certs=False is insecure.")
+    if not options.get("ssl_show_warn", True):
+        urllib3.disable_warnings()
+    kwargs["ssl_context"] = create_client_ssl_context(
+        verify_certs=verify_certs,
+        ca_certs=options.get("ca_certs") or (CA_CERTS if verify_certs else None),
+        client_cert=options.get("client_cert"),
+        client_key=options.get("client_key"),
+        ssl_version=options.get("ssl_version"),
+    )
+    return kwargs
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# keys of the host dicts which are read by the selectors, not connection options
+_HOST_METADATA = ("attributes",)
+
+
+def _host_key(host):
+    """
+    Hashable equivalent of a host dict, ``None`` if it contains unhashable
+    values.
+    """
+    key = _freeze(host)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 class Transport(object):
     """
     Encapsulation of transport-related to logic. Handles instantiation of the
@@ -80,6 +233,17 @@ class Transport(object):
         retry_on_timeout=False,
         send_get_body_as="GET",
         meta_header=True,
+        shard_aware_routing=False,
+        shard_routing_refresh_interval=60,
+        hedge_delay=None,
+        hedge_percentile=None,
+        hedge_max_ratio=0.1,
+        retry_budget=None,
+        single_flight=False,
+        background_sniffing=False,
+        resolve_dns=False,
+        shared_ssl_context=False,
+        warm_up_on_sniff=0,
         **kwargs
     ):
         """
@@ -116,6 +280,55 @@ class Transport(object):
             will be serialized and passed as a query parameter `source`.
         :arg meta_header: If True will send the 'X-Elastic-Client-Meta' HTTP header containing
             simple client metadata. Setting to False will disable the header. Defaults to True.
+        :arg shard_aware_routing: send single-document requests (get, index,
+            update, delete) directly to a node holding the document's shard
+            instead of letting a random node forward them. The shard routing
+            table is fetched from the cluster state in the background.
+        :arg shard_routing_refresh_interval: number of seconds between
+            refreshes of the shard routing table, defaults to 60
+        :arg hedge_delay: number of seconds after which a read (search, count,
+            mget, get) still waiting for its response is sent to a second
+            node as well, the first response is used
+        :arg hedge_percentile: hedge reads after the given percentile of their
+            observed latency instead (``hedge_delay`` is used until enough
+            requests have been observed)
+        :arg hedge_max_ratio: maximum ratio of the reads which get hedged,
+            defaults to 0.1
+        :arg retry_budget: limit the retries to a ratio of the requests, either
+            the ratio (``0.1`` allows retrying 10% of the requests) or a
+            :class:`~elasticsearch.budget.RetryBudget` instance, which can be
+            shared between clients. Not limited by default.
+        :arg single_flight: send identical reads (search, count, mget,
+            msearch, get) issued concurrently only once and hand the response
+            to every caller. Either ``True`` or a
+            :class:`~elasticsearch.singleflight.SingleFlight` instance, pass
+            ``SingleFlight(copy_results=False)`` to share the responses without
+            copying them. Disabled by default.
+        :arg background_sniffing: sniff from a background thread instead of
+            on the thread of the request which triggered it (because
+            ``sniffer_timeout`` elapsed or with ``sniff_on_connection_fail``),
+            querying all the nodes in parallel. Requests keep using the current
+            connections meanwhile and a failed sniff is only logged.
+        :arg resolve_dns: open one connection per address (A and AAAA records)
+            of the hosts given by hostname instead of a single one, resolving
+            the hostnames again every minute to follow the changes. Either
+            ``True`` or a :class:`~elasticsearch.resolver.DNSResolver`
+            instance, pass ``DNSResolver(ttl=...)`` to change the interval.
+            Disabled by default.
+        :arg shared_ssl_context: build a single :class:`ssl.SSLContext` from
+            the SSL options (``verify_certs``, ``ca_certs``, ``client_cert``,
+            ``client_key``, ``ssl_version``, ``ssl_show_warn``) and pass it to
+            every connection as ``ssl_context``, instead of each connection
+            loading the certificates again. New connections to a node resume
+            the TLS session of the previous ones. Requires a connection class
+            taking an ``ssl_context``, raises
+            :class:`~elasticsearch.exceptions.ImproperlyConfigured` with
+            :class:`~elasticsearch.RequestsHttpConnection`. An
+            ``ssl_context`` passed in is always shared.
+        :arg warm_up_on_sniff: number of connections per node to open in the
+            background after each sniff (see :meth:`warm_up`), so that the
+            requests to new nodes don't pay for the TCP and TLS handshakes.
+            Disabled by default.
 
         Any extra keyword arguments will be passed to the `connection_class`
         when creating and instance unless overridden by that connection's
@@ -137,6 +350,9 @@ class Transport(object):
         self.deserializer = Deserializer(_serializers, default_mimetype)
 
         self.max_retries = max_retries
+        if retry_budget is not None and not isinstance(retry_budget, RetryBudget):
+            retry_budget = RetryBudget(ratio=retry_budget)
+        self.retry_budget = retry_budget
         self.retry_on_timeout = retry_on_timeout
         self.retry_on_status = retry_on_status
         self.send_get_body_as = send_get_body_as
@@ -150,9 +366,76 @@ class Transport(object):
         self.connection_class = connection_class
 
         # ...save kwargs to be passed to the connections
+        if shared_ssl_context and issubclass(connection_class, RequestsHttpConnection):
+            # it would drop the context, and the SSL options it replaces
+            raise ImproperlyConfigured(
+                "%s doesn't support ssl_context, shared_ssl_context can't be "
+                "used with it." % connection_class.__name__
+            )
+        if shared_ssl_context and kwargs.get("ssl_context") is None:
+            kwargs = _with_shared_ssl_context(kwargs)
         self.kwargs = kwargs
         self.hosts = hosts
 
+        # number of requests in flight per connection, connections removed
+        # from the pool are only closed once they are done
+        self._in_flight = {}
+        self._draining = set()
+        self._in_flight_lock = threading.Lock()
+
+        # background health checks of dead connections, see mark_dead()
+        self._health_check_thread = None
+        self._health_check_lock = threading.Lock()
+        self._health_check_event = threading.Event()
+        self._closed = False
+        # set by close(), interrupts the waits of the background threads
+        self._stop_event = threading.Event()
+
+        # background sniffing, see _sniffer_loop()
+        self.background_sniffing = background_sniffing
+        self._sniffer_thread = None
+        self._sniffer_lock = threading.Lock()
+        self._sniffer_event = threading.Event()
+        if background_sniffing:
+            self._sniff_workers = _Workers(name="elasticsearch-sniff-request")
+
+        # shard aware routing, see _get_routed_connection()
+        self.shard_router = ShardRouter() if shard_aware_routing else None
+        self.shard_routing_refresh_interval = shard_routing_refresh_interval
+        self._routing_thread = None
+        self._routing_lock = threading.Lock()
+        self._routing_event = threading.Event()
+        # (live connections, {(host, port): connection}) of the current pool
+        self._routing_connections = (None, {})
+
+        # hedged requests, see _perform_hedged()
+        self.hedging = None
+        if hedge_delay is not None or hedge_percentile is not None:
+            self.hedging = Hedging(
+                delay=hedge_delay,
+                percentile=hedge_percentile,
+                max_ratio=hedge_max_ratio,
+            )
+            self._hedge_workers = _Workers(name="elasticsearch-hedged-request")
+
+        # coalescing of identical reads, see SingleFlight
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight or None
+
+        # one connection per address of the hosts, see DNSResolver
+        if resolve_dns is True:
+            resolve_dns = DNSResolver()
+        self.resolver = resolve_dns or None
+        # hosts passed to set_connections(), before their expansion
+        self._unresolved_hosts = []
+        if self.resolver is not None:
+            self._resolve_workers = _Workers(name="elasticsearch-resolve-hosts")
+
+        # connections opened ahead of the requests, see warm_up()
+        self.warm_up_on_sniff = warm_up_on_sniff
+        self._warm_up_workers = _Workers(name="elasticsearch-warm-up")
+
         # Start with an empty pool specifically for `AsyncTransport`.
         # It should never be used, will be replaced on first call to
         # .set_connections()
@@ -213,33 +496,100 @@ class Transport(object):
         Tries to identify unchanged hosts and re-use existing
         :class:`~elasticsearch.Connection` instances.
 
+        When the pool is kept (still more than one host) it's updated in
+        place, so the nodes which are still part of the cluster keep their
+        dead timeout and fail count. The connections to the removed hosts are
+        closed once their requests in flight are done.
+
+        With ``resolve_dns`` the hosts given by hostname are replaced by one
+        host per address, hostnames which weren't resolved yet are resolved
+        first.
+
         :arg hosts: same as `__init__`
         """
+        if self.resolver is not None:
+            self._unresolved_hosts = hosts
+            for name in self.resolver.get_hostnames(hosts, unknown_only=True):
+                self.resolver.resolve(name)
+            hosts = self.resolver.expand(hosts)
+
+        pool = self.connection_pool
+        # if this is not the initial setup look at the existing connection
+        # options and identify connections that haven't changed and can be
+        # kept around.
+        existing = {}
+        unhashable = []
+        for connection, old_host in pool.connection_opts:
+            key = _host_key(old_host)
+            if key is None:
+                unhashable.append((connection, old_host))
+            else:
+                existing.setdefault(key, connection)
+
         # construct the connections
         def _create_connection(host):
-            # if this is not the initial setup look at the existing connection
-            # options and identify connections that haven't changed and can be
-            # kept around.
-            if hasattr(self, "connection_pool"):
-                for (connection, old_host) in self.connection_pool.connection_opts:
+            key = _host_key(host)
+            if key is not None:
+                if key in existing:
+                    return existing[key]
+            else:
+                for (connection, old_host) in unhashable:
                     if old_host == host:
                         return connection
 
             # previously unseen params, create new connection
             kwargs = self.kwargs.copy()
-            kwargs.update(host)
+            kwargs.update(
+                (key, value) for key, value in host.items() if key not in _HOST_METADATA
+            )
+            if host.get("headers"):
+                # the headers of a host add to those of the client, copied as
+                # the connection may update them
+                headers = dict(self.kwargs.get("headers") or ())
+                headers.update(host["headers"])
+                kwargs["headers"] = headers
             return self.connection_class(**kwargs)
 
-        connections = map(_create_connection, hosts)
-
-        connections = list(zip(connections, hosts))
-        if len(connections) == 1:
-            self.connection_pool = DummyConnectionPool(connections)
+        connections = list(zip(map(_create_connection, hosts), hosts))
+        if len(connections) > 1 and type(pool) is self.connection_pool_class:
+            removed = pool.set_connections(connections)
         else:
-            # pass the hosts dicts to the connection pool to optionally extract parameters from
-            self.connection_pool = self.connection_pool_class(
-                connections, **self.kwargs
-            )
+            kept = set(c for c, _ in connections)
+            removed = [c for c, _ in pool.connection_opts if c not in kept]
+            if len(connections) == 1:
+                self.connection_pool = DummyConnectionPool(connections)
+            else:
+                # pass the hosts dicts to the connection pool to optionally extract parameters from
+                self.connection_pool = self.connection_pool_class(
+                    connections, **self.kwargs
+                )
+
+        # the seed connections are kept around for sniffing
+        seeds = getattr(self, "seed_connections", ())
+        removed = [c for c in removed if c not in seeds]
+        if removed:
+            self._drain_connections(removed)
+
+    def _drain_connections(self, connections):
+        """
+        Close the connections removed from the pool, waiting for the requests
+        in flight on them to finish first.
+        """
+        with self._in_flight_lock:
+            idle = []
+            for connection in connections:
+                if self._in_flight.get(connection):
+                    self._draining.add(connection)
+                else:
+                    idle.append(connection)
+        for connection in idle:
+            self._close_removed(connection)
+
+    def _close_removed(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.warning("Failed to close %r", connection, exc_info=True)
 
     def get_connection(self):
         """
@@ -247,10 +597,77 @@ class Transport(object):
         :class:`~elasticsearch.ConnectionPool` instance.
         """
         if self.sniffer_timeout:
-            if time.time() >= self.last_sniff + self.sniffer_timeout:
+            if self.background_sniffing:
+                if self._sniffer_thread is None:
+                    self._start_sniffer()
+            elif time.time() >= self.last_sniff + self.sniffer_timeout:
                 self.sniff_hosts()
+        if self.resolver is not None and self.resolver.refresh_due():
+            # the current connections keep serving the requests meanwhile
+            self._resolve_workers.submit(self._resolve_hosts_in_background)
         return self.connection_pool.get_connection()
 
+    def resolve_hosts(self):
+        """
+        Resolve the hostnames of the hosts again and update the connections
+        to their current addresses. Called in the background every ``ttl``
+        seconds of the resolver when ``resolve_dns`` is enabled.
+        """
+        hosts = self._unresolved_hosts
+        for name in self.resolver.get_hostnames(hosts):
+            self.resolver.resolve(name)
+        self.set_connections(hosts)
+
+    def _resolve_hosts_in_background(self):
+        if self._closed:
+            return
+        try:
+            self.resolve_hosts()
+        except Exception as e:
+            logger.warning("Resolving the hostnames in the background failed: %s", e)
+
+    def _get_node_info(self, connection, initial):
+        # use small timeout for the sniffing request, should be a fast api call
+        _, headers, node_info = connection.perform_request(
+            "GET",
+            "/_nodes/_all/http",
+            timeout=self.sniff_timeout if not initial else None,
+        )
+
+        # Lowercase all the header names for consistency in accessing them.
+        headers = {header.lower(): value for header, value in headers.items()}
+
+        return self.deserializer.loads(node_info, headers.get("content-type"))
+
+    def _get_node_info_parallel(self, connections, initial):
+        """
+        Query all the connections at once, returns the first node info
+        received.
+        """
+        results = Queue()
+
+        def sniff(connection):
+            try:
+                results.put((self._get_node_info(connection, initial), None))
+            except Exception as e:
+                results.put((None, e))
+
+        for connection in connections:
+            self._sniff_workers.submit(sniff, connection)
+
+        error = None
+        for _ in connections:
+            node_info, e = results.get()
+            if e is None:
+                return node_info
+            if error is None and not isinstance(
+                e, (ConnectionError, SerializationError)
+            ):
+                error = e
+        if error is not None:
+            raise error
+        raise TransportError("N/A", "Unable to sniff hosts.")
+
     def _get_sniff_data(self, initial=False):
         """
         Perform the request to get sniffing information. Returns a list of
@@ -270,28 +687,21 @@ class Transport(object):
             self.last_sniff = time.time()
             # go through all current connections as well as the
             # seed_connections for good measure
-            for c in chain(self.connection_pool.connections, self.seed_connections):
-                try:
-                    # use small timeout for the sniffing request, should be a fast api call
-                    _, headers, node_info = c.perform_request(
-                        "GET",
-                        "/_nodes/_all/http",
-                        timeout=self.sniff_timeout if not initial else None,
-                    )
-
-                    # Lowercase all the header names for consistency in accessing them.
-                    headers = {
-                        header.lower(): value for header, value in headers.items()
-                    }
-
-                    node_info = self.deserializer.loads(
-                        node_info, headers.get("content-type")
-                    )
-                    break
-                except (ConnectionError, SerializationError):
-                    pass
+            if self.background_sniffing:
+                connections = list(self.connection_pool.connections)
+                connections.extend(
+                    c for c in self.seed_connections if c not in connections
+                )
+                node_info = self._get_node_info_parallel(connections, initial)
             else:
-                raise TransportError("N/A", "Unable to sniff hosts.")
+                for c in chain(self.connection_pool.connections, self.seed_connections):
+                    try:
+                        node_info = self._get_node_info(c, initial)
+                        break
+                    except (ConnectionError, SerializationError):
+                        pass
+                else:
+                    raise TransportError("N/A", "Unable to sniff hosts.")
         except Exception:
             # keep the previous value on error
             self.last_sniff = previous_sniff
@@ -318,6 +728,10 @@ class Transport(object):
             host["host"], host["port"] = address.rsplit(":", 1)
             host["port"] = int(host["port"])
 
+        # keep the node attributes (zone, rack, ...) around for the selector
+        if host_info.get("attributes"):
+            host["attributes"] = host_info["attributes"]
+
         return self.host_info_callback(host_info, host)
 
     def sniff_hosts(self, initial=False):
@@ -342,6 +756,47 @@ class Transport(object):
             )
 
         self.set_connections(hosts)
+        if self.warm_up_on_sniff:
+            # the requests don't wait for the connections to be opened
+            self._start_warm_up(self.warm_up_on_sniff)
+
+    def warm_up(self, connections_per_node=1):
+        """
+        Open connections to all the live nodes ahead of the requests, the
+        nodes in parallel. Connections which are already open count towards
+        ``connections_per_node``, nodes which can't be reached are only logged
+        (the requests will mark them as dead).
+
+        Returns the number of connections opened.
+
+        :arg connections_per_node: number of idle connections to keep open to
+            each node, at most the size of its connection pool
+        """
+        results = Queue()
+        count = self._start_warm_up(connections_per_node, results)
+        return sum(results.get() for _ in range(count))
+
+    def _start_warm_up(self, connections_per_node, results=None):
+        """
+        Warm the connections to all the live nodes up in the background,
+        putting the number of connections opened to each node in ``results``.
+        Returns the number of nodes.
+        """
+        connections = list(self.connection_pool.connections)
+
+        def warm_up(connection):
+            opened = 0
+            try:
+                opened = connection.warm_up(connections_per_node)
+            except Exception as e:
+                logger.warning("Warming up %r failed: %s", connection, e)
+            finally:
+                if results is not None:
+                    results.put(opened)
+
+        for connection in connections:
+            self._warm_up_workers.submit(warm_up, connection)
+        return len(connections)
 
     def mark_dead(self, connection):
         """
@@ -352,8 +807,361 @@ class Transport(object):
         """
         # mark as dead even when sniffing to avoid hitting this host during the sniff process
         self.connection_pool.mark_dead(connection)
+        if getattr(self.connection_pool, "health_check", False):
+            self._start_health_checks()
         if self.sniff_on_connection_fail:
-            self.sniff_hosts()
+            if self.background_sniffing:
+                self._start_sniffer()
+            else:
+                self.sniff_hosts()
+
+    def _start_sniffer(self):
+        """
+        Wake up the thread sniffing in the background, starting it first if
+        needed.
+        """
+        with self._sniffer_lock:
+            thread = self._sniffer_thread
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(
+                    target=self._sniffer_loop, name="elasticsearch-sniffer"
+                )
+                thread.daemon = True
+                self._sniffer_thread = thread
+                thread.start()
+        self._sniffer_event.set()
+
+    def _sniffer_loop(self):
+        while not self._closed:
+            # sniff every sniffer_timeout seconds or when woken up by
+            # mark_dead(), whichever comes first
+            timeout = None
+            if self.sniffer_timeout:
+                timeout = max(self.last_sniff + self.sniffer_timeout - time.time(), 0)
+            self._sniffer_event.wait(timeout)
+            if self._closed:
+                break
+            self._sniffer_event.clear()
+            try:
+                self.sniff_hosts()
+            except Exception as e:
+                logger.warning("Sniffing in the background failed: %s", e)
+            # failed sniffs and bursts of connection failures must not turn
+            # into a stream of sniffing requests
+            if self._stop_event.wait(_MIN_SNIFF_INTERVAL):
+                break
+
+    def _start_health_checks(self):
+        """
+        Wake up the thread health checking dead connections in the background,
+        starting it first if needed.
+        """
+        with self._health_check_lock:
+            thread = self._health_check_thread
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(
+                    target=self._health_check_loop, name="elasticsearch-health-check"
+                )
+                thread.daemon = True
+                self._health_check_thread = thread
+                thread.start()
+        self._health_check_event.set()
+
+    def _health_check_loop(self):
+        while not self._closed:
+            self._health_check_event.clear()
+            # the pool can be replaced by sniffing at any time
+            pool = self.connection_pool
+            try:
+                for connection in pool.get_dead_connections_to_check():
+                    alive = self._check_health(connection, pool.health_check_timeout)
+                    pool.mark_checked(connection, alive)
+                next_check = pool.next_check_time()
+            except Exception:
+                logger.exception("Health checking dead connections failed")
+                next_check = time.time() + 1
+
+            # sleep until the next connection becomes eligible or until woken
+            # up by mark_dead()
+            if next_check is None:
+                self._health_check_event.wait()
+            else:
+                self._health_check_event.wait(max(next_check - time.time(), 0))
+
+    def _check_health(self, connection, timeout):
+        """
+        Returns ``True`` if the node behind ``connection`` answers a cheap
+        ``HEAD /`` request.
+        """
+        try:
+            connection.perform_request("HEAD", "/", timeout=timeout)
+        except Exception as e:
+            logger.debug("Health check of %r failed: %s", connection, e)
+            return False
+        return True
+
+    def _get_routed_connection(self, method, url, params):
+        """
+        Returns a live connection to a node holding the shard targeted by a
+        single-document request, ``None`` if the request can't be routed.
+        """
+        target = get_document_target(method, url, params)
+        if target is None:
+            return None
+        index, doc_id, routing, write = target
+
+        router = self.shard_router
+        if router.request_index(index):
+            self._start_routing_refresh()
+        addresses = router.get_node_addresses(index, doc_id, routing, write)
+        if not addresses:
+            return None
+
+        pool = self.connection_pool
+        connections = pool.connections
+        if len(connections) < 2:
+            return None
+        live, by_address = self._routing_connections
+        if live is not connections:
+            live = set(connections)
+            by_address = dict(
+                ((opts.get("host"), opts.get("port")), connection)
+                for connection, opts in pool.connection_opts
+                if connection in live
+            )
+            self._routing_connections = (connections, by_address)
+
+        candidates = [by_address[a] for a in addresses if a in by_address]
+        if not candidates:
+            return None
+        # make the node serve reads from its own copy of the shard
+        if not write and params is not None:
+            params.setdefault("preference", "_local")
+        if len(candidates) == 1:
+            return candidates[0]
+        selector = getattr(pool, "selector", None)
+        return selector.select(candidates) if selector else candidates[0]
+
+    def _start_routing_refresh(self):
+        """
+        Wake up the thread refreshing the shard routing table in the
+        background, starting it first if needed.
+        """
+        with self._routing_lock:
+            thread = self._routing_thread
+            if thread is None or not thread.is_alive():
+                thread = threading.Thread(
+                    target=self._routing_refresh_loop,
+                    name="elasticsearch-shard-routing",
+                )
+                thread.daemon = True
+                self._routing_thread = thread
+                thread.start()
+        self._routing_event.set()
+
+    def _routing_refresh_loop(self):
+        while not self._closed:
+            self._routing_event.clear()
+            try:
+                self.refresh_shard_routing()
+            except Exception as e:
+                logger.warning("Refreshing the shard routing table failed: %s", e)
+            self._routing_event.wait(self.shard_routing_refresh_interval)
+
+    def _shard_routing_url(self, names):
+        return "/_cluster/state/metadata,routing_table/%s" % ",".join(
+            quote(name, safe="") for name in names
+        )
+
+    def _update_shard_routing(self, names, node_info, cluster_state):
+        nodes = {}
+        for node_id, info in node_info.get("nodes", {}).items():
+            host = self._get_host_info(info)
+            if host:
+                nodes[node_id] = (host["host"], host["port"])
+        self.shard_router.update(names, cluster_state, nodes)
+
+    def refresh_shard_routing(self):
+        """
+        Fetch the shard routing table of all the indices targeted so far by
+        single-document requests. Called periodically in the background when
+        ``shard_aware_routing`` is enabled.
+        """
+        if self.shard_router is None:
+            return
+        names = self.shard_router.names()
+        if not names:
+            return
+        node_info = self.perform_request("GET", "/_nodes/_all/http")
+        cluster_state = self.perform_request(
+            "GET", self._shard_routing_url(names), params=dict(_SHARD_ROUTING_PARAMS)
+        )
+        self._update_shard_routing(names, node_info, cluster_state)
+
+    def _perform_on_connection(
+        self,
+        connection,
+        method,
+        url,
+        params,
+        body,
+        headers,
+        ignore,
+        timeout,
+        priority=None,
+        stream=False,
+    ):
+        """
+        Send the request over ``connection``, reporting its duration and
+        outcome to the connection pool.
+        """
+        # only transport errors tell about the health of the node, anything
+        # else is a problem with the request itself
+        failed = False
+        # whether the request only ends once the streamed body is released
+        deferred = False
+        in_flight = self._in_flight
+        with self._in_flight_lock:
+            in_flight[connection] = in_flight.get(connection, 0) + 1
+        pool = self.connection_pool
+        start = monotonic()
+        pool.mark_request_start(connection)
+
+        def end():
+            tripped = pool.mark_request_end(connection, monotonic() - start, failed)
+            # the pool marked the connection as dead itself
+            if tripped and getattr(pool, "health_check", False):
+                self._start_health_checks()
+            with self._in_flight_lock:
+                count = in_flight.pop(connection) - 1
+                if count:
+                    in_flight[connection] = count
+                    drained = False
+                else:
+                    drained = connection in self._draining
+                    self._draining.discard(connection)
+            if drained:
+                self._close_removed(connection)
+
+        try:
+            kwargs = {"headers": headers, "ignore": ignore, "timeout": timeout}
+            if priority is not None:
+                # only passed when set to support custom connection classes
+                kwargs["priority"] = priority
+            if stream:
+                kwargs["stream"] = True
+            result = connection.perform_request(method, url, params, body, **kwargs)
+            if stream and isinstance(result[2], RawResponse):
+                result[2]._add_close_callback(end)
+                deferred = True
+            return result
+        except TransportError as e:
+            failed = _is_node_failure(e)
+            raise
+        finally:
+            if not deferred:
+                end()
+
+    def _should_retry(self, error):
+        """
+        Returns ``True`` if a request which failed with ``error`` should be
+        retried on another node.
+        """
+        if isinstance(error, PoolTimeout):
+            # the other nodes are behind the same saturated client
+            return False
+        if isinstance(error, ConnectionTimeout):
+            return self.retry_on_timeout
+        if isinstance(error, ConnectionError):
+            return True
+        return error.status_code in self.retry_on_status
+
+    def _get_hedge_connection(self, connection):
+        """
+        Returns a live connection other than ``connection``, ``None`` if there
+        isn't any.
+        """
+        for _ in range(3):
+            hedge = self.connection_pool.get_connection()
+            if hedge is not connection:
+                return hedge
+        return None
+
+    def _settle_hedge_leg(self, connection, result, error):
+        """
+        Update the connection pool with the outcome of a leg of a hedged
+        request which didn't provide the response.
+        """
+        if error is None:
+            self.connection_pool.mark_live(connection)
+        elif isinstance(error, TransportError) and self._should_retry(error):
+            try:
+                self.mark_dead(connection)
+            except TransportError:
+                pass
+
+    def _perform_hedged(self, connection, delay, request):
+        """
+        Send the request over ``connection`` and, if it didn't answer within
+        ``delay`` seconds, over another connection as well.
+
+        Returns a ``(connection, result, error)`` tuple with the first
+        successful response, or the last error if all the attempts failed.
+        """
+        hedging = self.hedging
+        outcomes = Queue()
+        lock = threading.Lock()
+        # set once the outcome is decided, the remaining legs settle themselves
+        decided = []
+
+        def leg(conn):
+            start = monotonic()
+            try:
+                result = self._perform_on_connection(conn, *request)
+            except Exception as e:
+                outcome = (conn, None, e)
+            else:
+                hedging.record(monotonic() - start)
+                outcome = (conn, result, None)
+            with lock:
+                if not decided:
+                    outcomes.put(outcome)
+                    return
+            self._settle_hedge_leg(*outcome)
+
+        self._hedge_workers.submit(leg, connection)
+        legs = 1
+        try:
+            outcome = outcomes.get(timeout=delay)
+        except Empty:
+            hedge = self._get_hedge_connection(connection)
+            if hedge is not None and hedging.acquire():
+                self._hedge_workers.submit(leg, hedge)
+                legs += 1
+            outcome = outcomes.get()
+        legs -= 1
+
+        # a node failure doesn't decide the outcome while another leg is running
+        while (
+            legs
+            and isinstance(outcome[2], TransportError)
+            and _is_node_failure(outcome[2])
+        ):
+            self._settle_hedge_leg(*outcome)
+            outcome = outcomes.get()
+            legs -= 1
+
+        with lock:
+            decided.append(True)
+        while True:
+            try:
+                self._settle_hedge_leg(*outcomes.get_nowait())
+            except Empty:
+                break
+
+        if outcome[2] is None and outcome[0] is not connection:
+            hedging.record_win()
+        return outcome
 
     def perform_request(self, method, url, headers=None, params=None, body=None):
         """
@@ -367,6 +1175,10 @@ class Transport(object):
         If the operation was successful and the connection used was previously
         marked as dead, mark it as live, resetting it's failure count.
 
+        With ``request_stream=True`` in ``params`` the response isn't
+        deserialized, a :class:`~elasticsearch.RawResponse` reading its body
+        is returned instead.
+
         :arg method: HTTP method to use
         :arg url: absolute url (without host) to target
         :arg headers: dictionary of headers, will be handed over to the
@@ -376,23 +1188,100 @@ class Transport(object):
         :arg body: body of the request, will be serialized using serializer and
             passed to the connection
         """
-        method, headers, params, body, ignore, timeout = self._resolve_request_args(
-            method, headers, params, body
+        (
+            method,
+            headers,
+            params,
+            body,
+            ignore,
+            timeout,
+            total_timeout,
+            priority,
+            stream,
+        ) = self._resolve_request_args(method, headers, params, body)
+        request = (
+            method,
+            url,
+            params,
+            body,
+            headers,
+            ignore,
+            timeout,
+            priority,
+            stream,
         )
 
+        # a streamed response can only be read once
+        if self.single_flight is not None and not stream:
+            key = self.single_flight.get_key(
+                method,
+                url,
+                headers,
+                params,
+                body,
+                ignore,
+                timeout,
+                total_timeout,
+                priority,
+            )
+            if key is not None:
+                return self.single_flight.do(
+                    key, self._perform_request, request, total_timeout
+                )
+        return self._perform_request(request, total_timeout)
+
+    def _perform_request(self, request, total_timeout=None):
+        method, url, params = request[:3]
+        body, stream = request[3], request[8]
+        # a streamed body is consumed by sending it, it's never sent to two
+        # nodes at once and only sent again when it can be rewound
+        streamed = body is not None and _is_streamed_body(body)
+        position = _body_position(body) if streamed else None
+        hedging = self.hedging
+        hedgeable = (
+            hedging is not None
+            and not stream
+            and not streamed
+            and hedging.is_hedgeable(method, url, params)
+        )
+        budget = self.retry_budget
+        if budget is not None:
+            budget.deposit()
+        deadline = None
+        if total_timeout is not None:
+            deadline = monotonic() + total_timeout
+
         for attempt in range(self.max_retries + 1):
-            connection = self.get_connection()
+            connection = None
+            # retries go through the connection pool as usual
+            if attempt == 0 and self.shard_router is not None:
+                connection = self._get_routed_connection(method, url, params)
+            if connection is None:
+                connection = self.get_connection()
+            if attempt and position is not None:
+                body.seek(position)
+            attempt_request = request
+            if deadline is not None:
+                attempt_request = _within_deadline(
+                    request, connection, deadline - monotonic()
+                )
 
             try:
-                status, headers_response, data = connection.perform_request(
-                    method,
-                    url,
-                    params,
-                    body,
-                    headers=headers,
-                    ignore=ignore,
-                    timeout=timeout,
-                )
+                delay = hedging.get_delay() if hedgeable else None
+                if delay is None:
+                    start = monotonic()
+                    status, headers_response, data = self._perform_on_connection(
+                        connection, *attempt_request
+                    )
+                    if hedgeable:
+                        hedging.record(monotonic() - start)
+                else:
+                    connection, result, error = self._perform_hedged(
+                        connection, delay, attempt_request
+                    )
+                    if error is not None:
+                        raise error
+                    status, headers_response, data = result
 
                 # Lowercase all the header names for consistency in accessing them.
                 headers_response = {
@@ -403,15 +1292,7 @@ class Transport(object):
                 if method == "HEAD" and e.status_code == 404:
                     return False
 
-                retry = False
-                if isinstance(e, ConnectionTimeout):
-                    retry = self.retry_on_timeout
-                elif isinstance(e, ConnectionError):
-                    retry = True
-                elif e.status_code in self.retry_on_status:
-                    retry = True
-
-                if retry:
+                if self._should_retry(e):
                     try:
                         # only mark as dead if we are retrying
                         self.mark_dead(connection)
@@ -422,6 +1303,15 @@ class Transport(object):
                     # raise exception on last retry
                     if attempt == self.max_retries:
                         raise e
+                    # or when the streamed body can't be sent again
+                    if streamed and position is None:
+                        raise e
+                    # or once the total timeout is over
+                    if deadline is not None and monotonic() >= deadline:
+                        raise e
+                    # or when the retry budget is exhausted
+                    if budget is not None and not budget.withdraw():
+                        raise e
                 else:
                     raise e
 
@@ -432,6 +1322,8 @@ class Transport(object):
                 if method == "HEAD":
                     return 200 <= status < 300
 
+                if stream:
+                    return data
                 if data:
                     data = self.deserializer.loads(
                         data, headers_response.get("content-type")
@@ -442,17 +1334,31 @@ class Transport(object):
         """
         Explicitly closes connections
         """
+        self._closed = True
+        self._stop_event.set()
+        self._health_check_event.set()
+        self._routing_event.set()
+        self._sniffer_event.set()
         self.connection_pool.close()
 
+        # connections removed from the pool while requests were in flight
+        with self._in_flight_lock:
+            draining, self._draining = self._draining, set()
+        for connection in draining:
+            self._close_removed(connection)
+
     def _resolve_request_args(self, method, headers, params, body):
         """Resolves parameters for .perform_request()"""
         if body is not None:
-            body = self.serializer.dumps(body)
+            streamed = _is_streamed_body(body)
+            if not streamed:
+                body = self.serializer.dumps(body)
 
             # some clients or environments don't support sending GET with body
             if method in ("HEAD", "GET") and self.send_get_body_as != "GET":
-                # send it as post instead
-                if self.send_get_body_as == "POST":
+                # send it as post instead, a streamed body can't be passed as
+                # the source parameter either
+                if self.send_get_body_as == "POST" or streamed:
                     method = "POST"
 
                 # or as source parameter
@@ -470,9 +1376,14 @@ class Transport(object):
                 pass
 
         ignore = ()
-        timeout = None
+        timeout = total_timeout = priority = None
+        stream = False
         if params:
             timeout = params.pop("request_timeout", None)
+            total_timeout = params.pop("total_timeout", None)
+            priority = params.pop("request_priority", None)
+            # HEAD requests only return a boolean
+            stream = bool(params.pop("request_stream", False)) and method != "HEAD"
             ignore = params.pop("ignore", ())
             if isinstance(ignore, int):
                 ignore = (ignore,)
@@ -487,4 +1398,14 @@ class Transport(object):
                 "%s=%s" % (k, v) for k, v in client_meta
             )
 
-        return method, headers, params, body, ignore, timeout
+        return (
+            method,
+            headers,
+            params,
+            body,
+            ignore,
+            timeout,
+            total_timeout,
+            priority,
+            stream,
+        )
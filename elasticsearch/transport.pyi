@@ -17,9 +17,14 @@
 
 from typing import Any, Callable, Collection, Dict, List, Mapping, Optional, Type, Union
 
+from .budget import RetryBudget
 from .connection import Connection
 from .connection_pool import ConnectionPool
+from .hedging import Hedging
+from .resolver import DNSResolver
+from .routing import ShardRouter
 from .serializer import Deserializer, Serializer
+from .singleflight import SingleFlight
 
 def get_host_info(
     node_info: Dict[str, Any], host: Optional[Dict[str, Any]]
@@ -31,6 +36,8 @@ class Transport(object):
     deserializer: Deserializer
 
     max_retries: int
+    retry_budget: Optional[RetryBudget]
+    single_flight: Optional[SingleFlight]
     retry_on_timeout: bool
     retry_on_status: Collection[int]
     send_get_body_as: str
@@ -45,6 +52,11 @@ class Transport(object):
     sniff_on_connection_fail: bool
     last_sniff: float
     sniff_timeout: Optional[float]
+    background_sniffing: bool
+    shard_router: Optional[ShardRouter]
+    shard_routing_refresh_interval: float
+    hedging: Optional[Hedging]
+    resolver: Optional[DNSResolver]
     host_info_callback: Callable[
         [Dict[str, Any], Optional[Dict[str, Any]]], Optional[Dict[str, Any]]
     ]
@@ -68,13 +80,27 @@ class Transport(object):
         retry_on_timeout: bool = ...,
         send_get_body_as: str = ...,
         meta_header: bool = ...,
+        shard_aware_routing: bool = ...,
+        shard_routing_refresh_interval: float = ...,
+        hedge_delay: Optional[float] = ...,
+        hedge_percentile: Optional[float] = ...,
+        hedge_max_ratio: float = ...,
+        retry_budget: Optional[Union[float, RetryBudget]] = ...,
+        single_flight: Union[bool, SingleFlight, None] = ...,
+        background_sniffing: bool = ...,
+        resolve_dns: Union[bool, DNSResolver, None] = ...,
+        shared_ssl_context: bool = ...,
+        warm_up_on_sniff: int = ...,
         **kwargs: Any
     ) -> None: ...
     def add_connection(self, host: Any) -> None: ...
     def set_connections(self, hosts: Collection[Any]) -> None: ...
     def get_connection(self) -> Connection: ...
+    def resolve_hosts(self) -> None: ...
     def sniff_hosts(self, initial: bool = ...) -> None: ...
+    def warm_up(self, connections_per_node: int = ...) -> int: ...
     def mark_dead(self, connection: Connection) -> None: ...
+    def refresh_shard_routing(self) -> None: ...
     def perform_request(
         self,
         method: str,
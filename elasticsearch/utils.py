@@ -16,6 +16,10 @@
 #  under the License.
 
 import re
+import socket
+import threading
+
+from .compat import Empty, Queue
 
 
 def _client_meta_version(version):
@@ -29,3 +33,112 @@ def _client_meta_version(version):
     if version_pre:
         version += "p"
     return version
+
+
+def _connect_unix_socket(path, timeout=None):
+    """Returns a socket connected to the Unix domain socket at ``path``."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        if isinstance(timeout, (int, float)):
+            sock.settimeout(timeout)
+        sock.connect(path)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+def _socket_options(tcp_nodelay=True, tcp_keepalive=None):
+    """
+    Returns the ``(level, option, value)`` socket options of the
+    ``tcp_nodelay`` and ``tcp_keepalive`` connection options.
+
+    ``tcp_keepalive`` is either ``True`` (the system's probe settings), the
+    number of idle seconds before the first probe (and between the probes)
+    or an ``(idle, interval, count)`` tuple.
+    """
+    options = []
+    if tcp_nodelay:
+        options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1))
+    if not tcp_keepalive:
+        return options
+
+    options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+    if tcp_keepalive is True:
+        return options
+    if isinstance(tcp_keepalive, (tuple, list)):
+        idle, interval, count = tcp_keepalive
+    else:
+        idle, interval, count = tcp_keepalive, tcp_keepalive, None
+    # TCP_KEEPALIVE is the name of TCP_KEEPIDLE on macOS
+    idle_option = getattr(
+        socket, "TCP_KEEPIDLE", getattr(socket, "TCP_KEEPALIVE", None)
+    )
+    for option, value in (
+        (idle_option, idle),
+        (getattr(socket, "TCP_KEEPINTVL", None), interval),
+        (getattr(socket, "TCP_KEEPCNT", None), count),
+    ):
+        if option is not None and value is not None:
+            options.append((socket.IPPROTO_TCP, option, max(int(value), 1)))
+    return options
+
+
+def _connection_expired(
+    now, connected_at, released_at, idle_timeout=None, max_age=None, jitter=0.0
+):
+    """
+    Whether a pooled connection has to be closed instead of being reused:
+    idle for more than ``idle_timeout`` seconds or open for more than
+    ``max_age`` seconds, shortened by up to 10% (``jitter`` between 0 and 1)
+    so that the connections opened together don't all expire together.
+    """
+    if idle_timeout is not None and released_at is not None:
+        if now - released_at > idle_timeout:
+            return True
+    if max_age is not None and connected_at is not None:
+        return now - connected_at > max_age * (1 - 0.1 * jitter)
+    return False
+
+
+class _Workers(object):
+    """
+    Minimal pool of daemon threads running the background jobs of the
+    :class:`~elasticsearch.Transport` (legs of hedged requests, parallel
+    sniffing requests, warm-ups, DNS refreshes). Threads are started when no worker is idle
+    and exit after ``idle_timeout`` seconds without work.
+    """
+
+    def __init__(self, name="elasticsearch-worker", idle_timeout=60):
+        self.name = name
+        self.idle_timeout = idle_timeout
+        self._jobs = Queue()
+        self._lock = threading.Lock()
+        self._idle = 0
+
+    def submit(self, func, *args):
+        with self._lock:
+            spawn = not self._idle
+            if not spawn:
+                # reserve an idle worker
+                self._idle -= 1
+        self._jobs.put((func, args))
+        if spawn:
+            thread = threading.Thread(target=self._run, name=self.name)
+            thread.daemon = True
+            thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                func, args = self._jobs.get(timeout=self.idle_timeout)
+            except Empty:
+                with self._lock:
+                    if self._idle:
+                        self._idle -= 1
+                        return
+                # a job was submitted for this worker in the meantime
+                continue
+            func(*args)
+            with self._lock:
+                self._idle += 1
@@ -15,4 +15,28 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import socket
+from typing import Any, Callable, List, Optional, Tuple, Union
+
 def _client_meta_version(version: str) -> str: ...
+def _connect_unix_socket(
+    path: str, timeout: Optional[Union[float, int]] = ...
+) -> socket.socket: ...
+def _socket_options(
+    tcp_nodelay: bool = ...,
+    tcp_keepalive: Optional[Union[bool, int, Tuple[int, int, int]]] = ...,
+) -> List[Tuple[int, int, int]]: ...
+def _connection_expired(
+    now: float,
+    connected_at: Optional[float],
+    released_at: Optional[float],
+    idle_timeout: Optional[float] = ...,
+    max_age: Optional[float] = ...,
+    jitter: float = ...,
+) -> bool: ...
+
+class _Workers(object):
+    name: str
+    idle_timeout: float
+    def __init__(self, name: str = ..., idle_timeout: float = ...) -> None: ...
+    def submit(self, func: Callable[..., Any], *args: Any) -> None: ...
@@ -103,5 +103,6 @@ setup(
         "docs": docs_require,
         "requests": ["requests>=2.4.0, <3.0.0"],
         "async": async_require,
+        "httpx": ["httpx[http2]>=0.23; python_version>='3.6'"],
     },
 )
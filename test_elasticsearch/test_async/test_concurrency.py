@@ -0,0 +1,133 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import asyncio
+
+import pytest
+
+from elasticsearch import AsyncTransport
+from elasticsearch._async.concurrency import AdaptiveConcurrencyLimiter
+from elasticsearch.exceptions import PoolTimeout
+
+from .test_transport import DummyConnection
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestAdaptiveConcurrencyLimiter:
+    async def test_limit_increases_while_in_use(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        limiter.release(0.01)
+        assert 2.5 == limiter.limit
+
+        # only one request in flight out of 2.5, no need for more
+        limiter.release(0.01)
+        assert 2.5 == limiter.limit
+        assert 0 == limiter.in_flight
+
+    async def test_limit_increases_by_one_per_round_trip(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=20)
+        for _ in range(20):
+            await limiter.acquire()
+        for _ in range(3):
+            # each response is replaced by a new request, the window is full
+            for _ in range(int(limiter.limit)):
+                limiter.release(0.01)
+                await limiter.acquire()
+        assert 22 <= limiter.limit < 23.5
+
+    async def test_limit_decreases_on_rejections(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, min_limit=8)
+        for _ in range(3):
+            await limiter.acquire()
+            limiter.release(0.01, overloaded=True)
+            limiter._last_decrease = 0
+        assert 8 == limiter.limit
+
+    async def test_limit_decreases_once_per_round_trip(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10)
+        await limiter.acquire()
+        limiter.release(10)
+        for _ in range(3):
+            await limiter.acquire()
+            limiter.release(0.01, overloaded=True)
+        assert 9 == int(limiter.limit)
+
+    async def test_limit_decreases_when_latency_grows(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10)
+        for duration in (0.01, 0.01, 0.5):
+            await limiter.acquire()
+            limiter.release(duration)
+        assert 9 == limiter.limit
+
+    async def test_requests_over_the_limit_wait(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiting.done()
+
+        limiter.release()
+        await waiting
+        assert 1 == limiter.in_flight
+        assert {
+            "limit": 1,
+            "in_flight": 1,
+            "waiting": 0,
+            "queued": 1,
+            "rejected": 0,
+        } == (limiter.stats())
+
+    async def test_wait_for_a_slot_is_bounded(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_queue_wait=0.01)
+        await limiter.acquire()
+        with pytest.raises(PoolTimeout):
+            await limiter.acquire()
+        assert 1 == limiter.rejected
+
+        limiter.release()
+        await limiter.acquire()
+        assert 1 == limiter.in_flight
+
+    async def test_cancelled_waiter_doesnt_keep_a_slot(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        await limiter.acquire()
+        waiting = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        # the slot is handed over and the waiter cancelled at the same time
+        limiter.release()
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert 0 == limiter.in_flight
+        await limiter.acquire()
+
+    async def test_transport_limits_requests_in_flight(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        t = AsyncTransport(
+            [{"delay": 0.01}],
+            connection_class=DummyConnection,
+            concurrency_limiter=limiter,
+        )
+        await asyncio.gather(*[t.perform_request("GET", "/") for _ in range(3)])
+
+        assert 2 == limiter.queued
+        assert 0 == limiter.in_flight
+        assert 3 == len(t.get_connection().calls)
@@ -16,24 +16,49 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import asyncio
 import gzip
 import io
 import json
+import os
+import re
+import shutil
+import socket
 import ssl
+import tempfile
 import warnings
 from platform import python_version
 
 import aiohttp
 import pytest
-from mock import patch
+from mock import Mock, patch
 from multidict import CIMultiDict
 
-from elasticsearch import AIOHttpConnection, __versionstr__
+from elasticsearch import (
+    AIOHttpConnection,
+    AsyncHttpxHttpConnection,
+    AsyncRawResponse,
+    AsyncStdlibHttpConnection,
+    AsyncTransport,
+    __versionstr__,
+)
+from elasticsearch._async.http_stdlib import _read_chunked
 from elasticsearch.compat import reraise_exceptions
-from elasticsearch.exceptions import ConnectionError
+from elasticsearch.exceptions import (
+    ConnectionError,
+    ConnectionTimeout,
+    ImproperlyConfigured,
+    NotFoundError,
+    PoolTimeout,
+)
 
 pytestmark = pytest.mark.asyncio
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 
 def gzip_decompress(data):
     buf = gzip.GzipFile(fileobj=io.BytesIO(data), mode="rb")
@@ -81,6 +106,63 @@ class TestAIOHttpConnection:
         assert con.use_ssl
         assert con.session.connector._ssl == context
 
+    async def test_server_hostname(self):
+        con = await self._get_mock_connection(
+            connection_params={
+                "host": "10.0.0.1",
+                "use_ssl": True,
+                "server_hostname": "es.local",
+            }
+        )
+        await con.perform_request("GET", "/")
+
+        assert "es.local" == con.session.request.call_args[1]["server_hostname"]
+        assert {} == AIOHttpConnection("10.0.0.1")._request_kwargs
+
+    async def test_idle_timeout_and_tcp_keepalive(self):
+        con = AIOHttpConnection(idle_timeout=5, tcp_keepalive=True)
+        await con._create_aiohttp_session()
+        connector = con.session.connector
+        assert 5 == connector._keepalive_timeout
+
+        addr_info = (socket.AF_INET, socket.SOCK_STREAM, 0, "", ("127.0.0.1", 0))
+        sock = con._connector_kwargs["socket_factory"](addr_info)
+        try:
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+        finally:
+            sock.close()
+        await con.close()
+
+        assert {} == AIOHttpConnection()._connector_kwargs
+
+    async def test_stream_returns_the_undecoded_body(self):
+        server = _RawServer()
+        port = await server.start()
+        body = b'{"hits": "' + b"x" * 200000 + b'"}'
+        server.response = (
+            b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+            b"content-length: %d\r\n\r\n%s" % (len(body), body)
+        )
+        con = AIOHttpConnection("127.0.0.1", port)
+        try:
+            status, _, raw = await con.perform_request("GET", "/", stream=True)
+            assert 200 == status
+            assert isinstance(raw, AsyncRawResponse)
+            assert "application/json" == raw.content_type
+            assert body == b"".join([chunk async for chunk in raw])
+            assert raw.closed
+
+            async with (await con.perform_request("GET", "/", stream=True))[2] as raw:
+                assert b'{"hits": "x' == await raw.read(11)
+            assert body.decode() == (await con.perform_request("GET", "/"))[2]
+
+            server.response = b"HTTP/1.1 404 Not Found\r\ncontent-length: 2\r\n\r\n{}"
+            with pytest.raises(NotFoundError):
+                await con.perform_request("GET", "/", stream=True)
+        finally:
+            await con.close()
+            await server.stop()
+
     def test_opaque_id(self):
         con = AIOHttpConnection(opaque_id="app-1")
         assert con.headers["x-opaque-id"] == "app-1"
@@ -145,6 +227,25 @@ class TestAIOHttpConnection:
         assert "accept-encoding" not in kwargs["headers"]
         assert "content-encoding" not in kwargs["headers"]
 
+    async def test_priority_lanes_use_separate_sessions(self):
+        con = await self._get_mock_connection({"priority_maxsize": {"background": 2}})
+        lane = con.priority_sessions["background"]
+        assert lane.connector.limit == 2
+        assert con.session.connector.limit == 10
+
+        main_request = con.session.request
+        lane.request = Mock(side_effect=main_request)
+        await con.perform_request("GET", "/", priority="background")
+        assert lane.request.call_count == 1
+
+        # unknown priorities use the main session
+        await con.perform_request("GET", "/", priority="interactive")
+        await con.perform_request("GET", "/")
+        assert lane.request.call_count == 1
+
+        await con.close()
+        assert lane.closed
+
     async def test_http_compression(self):
         con = await self._get_mock_connection({"http_compress": True})
         assert con.http_compress
@@ -335,6 +436,488 @@ class TestAIOHttpConnection:
         assert str(e.value) == "Wasn't modified!"
 
 
+@pytest.mark.skipif(httpx is None, reason="httpx isn't installed")
+class TestAsyncHttpxConnection:
+    def _get_mock_connection(self, status_code=200, response_body=b"{}", **kwargs):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if isinstance(response_body, Exception):
+                raise response_body
+            return httpx.Response(status_code, content=response_body)
+
+        class MockConnection(AsyncHttpxHttpConnection):
+            def _create_client(self, **kwargs):
+                kwargs["transport"] = httpx.MockTransport(handler)
+                return super()._create_client(**kwargs)
+
+        con = MockConnection(**kwargs)
+        con.requests = requests
+        return con
+
+    async def test_perform_request(self):
+        con = self._get_mock_connection()
+        assert isinstance(con.client, httpx.AsyncClient)
+
+        status, _, data = await con.perform_request(
+            "GET", "/_search", params={"q": "x"}, body=b"{}"
+        )
+        assert (200, "{}") == (status, data)
+        assert "http://localhost:9200/_search?q=x" == str(con.requests[0].url)
+        assert b"{}" == con.requests[0].content
+        # the async client waits for a free connection of the pool itself
+        assert con._slots is None
+
+        await con.close()
+        assert con.client.is_closed
+
+    async def test_priority_is_accepted(self):
+        con = self._get_mock_connection()
+        status, _, _ = await con.perform_request("GET", "/", priority="background")
+        assert 200 == status
+        assert 1 == len(con.requests)
+        await con.close()
+
+    async def test_stream_is_rejected(self):
+        con = self._get_mock_connection()
+        with pytest.raises(ImproperlyConfigured):
+            await con.perform_request("GET", "/", stream=True)
+        assert [] == con.requests
+        await con.close()
+
+    async def test_streamed_body(self):
+        con = self._get_mock_connection()
+
+        async def chunks():
+            yield b"{}\n"
+            yield b"{}\n"
+
+        await con.perform_request("POST", "/_bulk", body=chunks())
+        await con.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n"))
+        assert b"{}\n{}\n" == con.requests[0].content
+        assert b"{}\n" == con.requests[1].content
+
+    async def test_streamed_body_through_the_transport(self):
+        con = self._get_mock_connection()
+        t = AsyncTransport([{}], connection_class=type(con), meta_header=False)
+
+        async def chunks():
+            yield b"{}\n"
+            yield b"{}\n"
+
+        await t.perform_request("POST", "/_bulk", body=chunks())
+        await t.close()
+        assert b"{}\n{}\n" == con.requests[0].content
+
+    async def test_streamed_body_is_compressed(self):
+        con = self._get_mock_connection(http_compress=True)
+
+        async def chunks():
+            for _ in range(3):
+                yield b"{}\n"
+
+        await con.perform_request("POST", "/_bulk", body=chunks())
+        await con.perform_request("POST", "/_bulk", body=iter([b"{}\n"]))
+        assert b"{}\n" * 3 == gzip.decompress(con.requests[0].content)
+        assert b"{}\n" == gzip.decompress(con.requests[1].content)
+
+    async def test_errors_are_converted(self):
+        con = self._get_mock_connection(status_code=404)
+        with pytest.raises(NotFoundError):
+            await con.perform_request("GET", "/")
+
+        con = self._get_mock_connection(response_body=httpx.ReadTimeout("timed out"))
+        with pytest.raises(ConnectionTimeout):
+            await con.perform_request("GET", "/")
+
+        con = self._get_mock_connection(response_body=httpx.ConnectError("refused"))
+        with pytest.raises(ConnectionError):
+            await con.perform_request("GET", "/")
+
+    async def test_other_errors_are_not_converted(self):
+        con = self._get_mock_connection()
+        with pytest.raises(TypeError):
+            await con.perform_request("POST", "/", body=42)
+        assert [] == con.requests
+        await con.close()
+
+
+class _RawServer:
+    """Records the requests and answers with ``response`` (raw bytes)."""
+
+    def __init__(self):
+        self.requests = []
+        self.peers = []
+        self.response = b"HTTP/1.1 200 OK\r\ncontent-length: 2\r\n\r\n{}"
+        self.delay = 0
+        self.drop = False
+        self.tasks = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start_unix(self, path):
+        self.server = await asyncio.start_unix_server(self.handle, path)
+
+    async def handle(self, reader, writer):
+        task = asyncio.ensure_future(self.serve(reader, writer))
+        self.tasks.append(task)
+        await task
+
+    async def serve(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = re.search(rb"content-length: (\d+)", head, re.I)
+                if re.search(rb"transfer-encoding: chunked", head, re.I):
+                    body = await _read_chunked(reader)
+                else:
+                    body = await reader.readexactly(
+                        int(length.group(1)) if length else 0
+                    )
+                self.requests.append((head.decode("latin-1"), body))
+                self.peers.append(peer)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(self.response)
+                if self.drop:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            # also when the server is stopped with idle connections
+            writer.close()
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class TestAsyncStdlibConnection:
+    async def _get_connection(self, **kwargs):
+        self.server = _RawServer()
+        port = await self.server.start()
+        return AsyncStdlibHttpConnection("127.0.0.1", port, **kwargs)
+
+    async def _close(self, con):
+        await con.close()
+        await self.server.stop()
+
+    async def test_perform_request(self):
+        con = await self._get_connection(
+            url_prefix="prefix", headers={"x-app": "test"}, http_auth=("user", "pw")
+        )
+        self.server.response = (
+            b"HTTP/1.1 200 OK\r\nX-Response: 1\r\ncontent-length: 10\r\n\r\n"
+            b'{"took":1}'
+        )
+        status, headers, data = await con.perform_request(
+            "POST",
+            "/_search",
+            params={"q": "x"},
+            body=b'{"size":0}',
+            headers={"x-request": "1"},
+        )
+        assert (200, '{"took":1}') == (status, data)
+        assert "1" == headers["x-response"]
+
+        head, body = self.server.requests[0]
+        assert head.startswith("POST /prefix/_search?q=x HTTP/1.1\r\n")
+        assert "host: 127.0.0.1:%d\r\n" % con.port in head
+        assert "x-app: test\r\n" in head
+        assert "x-request: 1\r\n" in head
+        assert "authorization: Basic dXNlcjpwdw==\r\n" in head
+        assert "content-length: 10\r\n" in head
+        assert b'{"size":0}' == body
+        await self._close(con)
+
+    async def test_priority_is_accepted(self):
+        con = await self._get_connection()
+        status, _, _ = await con.perform_request("GET", "/", priority="background")
+        assert 200 == status
+        assert 1 == len(self.server.requests)
+        await self._close(con)
+
+    async def test_stream_is_rejected(self):
+        con = await self._get_connection()
+        with pytest.raises(ImproperlyConfigured):
+            await con.perform_request("GET", "/", stream=True)
+        assert [] == self.server.requests
+        await self._close(con)
+
+    async def test_streamed_body(self):
+        con = await self._get_connection()
+
+        async def chunks():
+            yield b"{}\n"
+            yield b"{}\n"
+
+        await con.perform_request("POST", "/_bulk", body=chunks())
+        await con.perform_request("POST", "/_bulk", body=iter([b"{}\n", b"{}\n"]))
+        await con.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n" * 3))
+
+        for head, _ in self.server.requests:
+            assert "transfer-encoding: chunked\r\n" in head
+            assert "content-length" not in head
+        assert [b"{}\n{}\n", b"{}\n{}\n", b"{}\n{}\n{}\n"] == [
+            body for _, body in self.server.requests
+        ]
+        # the connection is reused after a streamed request
+        assert 1 == len(set(self.server.peers))
+        await self._close(con)
+
+    async def test_streamed_body_through_the_transport(self):
+        con = await self._get_connection()
+        t = AsyncTransport(
+            [{"port": con.port}],
+            connection_class=AsyncStdlibHttpConnection,
+            meta_header=False,
+        )
+
+        async def chunks():
+            yield b"{}\n"
+            yield b"{}\n"
+
+        await t.perform_request("POST", "/_bulk", body=chunks())
+        await t.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n"))
+        await t.close()
+        assert [b"{}\n{}\n", b"{}\n"] == [body for _, body in self.server.requests]
+        await self._close(con)
+
+    async def test_streamed_body_is_compressed(self):
+        con = await self._get_connection(http_compress=True)
+
+        async def chunks():
+            for _ in range(3):
+                yield b"{}\n"
+
+        await con.perform_request("POST", "/_bulk", body=chunks())
+        await con.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n"))
+
+        head, body = self.server.requests[0]
+        assert "content-encoding: gzip\r\n" in head
+        assert b"{}\n" * 3 == gzip.decompress(body)
+        assert b"{}\n" == gzip.decompress(self.server.requests[1][1])
+        await self._close(con)
+
+    async def test_request_headers_override_the_defaults(self):
+        con = await self._get_connection()
+        await con.perform_request("GET", "/", headers={"Content-Type": "text/plain"})
+
+        head, _ = self.server.requests[0]
+        assert "content-type: text/plain\r\n" in head
+        assert "application/json" not in head
+        await self._close(con)
+
+    async def test_keep_alive_connection_is_reused(self):
+        con = await self._get_connection()
+        await con.perform_request("GET", "/")
+        await con.perform_request("HEAD", "/")
+        await con.perform_request("GET", "/")
+
+        assert 1 == len(set(self.server.peers))
+        await self._close(con)
+
+    async def test_dropped_connection_is_reopened(self):
+        con = await self._get_connection()
+        self.server.drop = True
+        await con.perform_request("GET", "/")
+        # let the server close the socket
+        await asyncio.sleep(0.05)
+        status, _, _ = await con.perform_request("GET", "/")
+
+        assert 200 == status
+        assert 2 == len(set(self.server.peers))
+        await self._close(con)
+
+    async def test_maxsize_limits_the_connections(self):
+        con = await self._get_connection(maxsize=2)
+        self.server.delay = 0.01
+        await asyncio.gather(*(con.perform_request("GET", "/") for _ in range(10)))
+
+        assert 10 == len(self.server.requests)
+        assert 2 == len(set(self.server.peers))
+        assert 2 == len(con._idle)
+        await self._close(con)
+
+    async def test_warm_up_opens_idle_connections(self):
+        con = await self._get_connection(maxsize=2)
+        assert 2 == await con.warm_up(3)
+        assert 0 == await con.warm_up(2)
+        assert 2 == len(con._idle)
+
+        await con.perform_request("GET", "/")
+        await con.perform_request("GET", "/")
+        assert 1 == len(set(self.server.peers))
+        assert 2 == len(con._idle)
+        await self._close(con)
+
+    async def test_warm_up_connection_refused_raises_connection_error(self):
+        con = AsyncStdlibHttpConnection("127.0.0.1", 1)
+        with pytest.raises(ConnectionError):
+            await con.warm_up()
+        assert con.maxsize == con._slots._value
+
+    async def test_chunked_and_compressed_response(self):
+        con = await self._get_connection(http_compress=True)
+        data = gzip.compress(b'{"took":1}')
+        self.server.response = (
+            b"HTTP/1.1 200 OK\r\ntransfer-encoding: chunked\r\n"
+            b"content-encoding: gzip\r\n\r\n"
+            b"%x\r\n%s\r\n%x\r\n%s\r\n0\r\n\r\n"
+            % (5, data[:5], len(data) - 5, data[5:])
+        )
+        _, _, raw_data = await con.perform_request("POST", "/", body=b"{}")
+        assert '{"took":1}' == raw_data
+
+        head, body = self.server.requests[0]
+        assert "content-encoding: gzip\r\n" in head
+        assert "accept-encoding: gzip,deflate\r\n" in head
+        assert b"{}" == gzip.decompress(body)
+
+        # the connection is reused after a chunked response
+        await con.perform_request("GET", "/")
+        assert 1 == len(set(self.server.peers))
+        await self._close(con)
+
+    async def test_response_until_connection_close(self):
+        con = await self._get_connection()
+        self.server.drop = True
+        self.server.response = b"HTTP/1.1 200 OK\r\nconnection: close\r\n\r\n{}"
+        _, _, data = await con.perform_request("GET", "/")
+
+        assert "{}" == data
+        assert 0 == len(con._idle)
+        await self._close(con)
+
+    async def test_errors_and_warnings(self):
+        con = await self._get_connection()
+        self.server.response = (
+            b"HTTP/1.1 404 Not Found\r\ncontent-length: 2\r\n"
+            b'warning: 299 Elasticsearch-7.10.0 "this is deprecated"\r\n\r\n{}'
+        )
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            with pytest.raises(NotFoundError):
+                await con.perform_request("GET", "/")
+            status, _, _ = await con.perform_request("GET", "/", ignore=(404,))
+
+        assert 404 == status
+        assert ["this is deprecated"] * 2 == [str(x.message) for x in w]
+        await self._close(con)
+
+    async def test_timeout_closes_the_connection(self):
+        con = await self._get_connection()
+        self.server.delay = 0.5
+        with pytest.raises(ConnectionTimeout):
+            await con.perform_request("GET", "/", timeout=0.05)
+
+        assert 0 == len(con._idle)
+        assert con.maxsize == con._slots._value
+        await self._close(con)
+
+    async def test_pool_timeout_waiting_for_a_connection(self):
+        con = await self._get_connection(maxsize=1)
+        self.server.delay = 0.2
+        busy = asyncio.ensure_future(con.perform_request("GET", "/"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(PoolTimeout):
+            await con.perform_request("GET", "/", timeout=0.05)
+        status, _, _ = await busy
+        assert 200 == status
+        assert 1 == len(self.server.requests)
+        assert con.maxsize == con._slots._value
+        await self._close(con)
+
+    async def test_pool_timeout_doesnt_mark_the_node_dead(self):
+        con = await self._get_connection(maxsize=1)
+        self.server.delay = 0.2
+        t = AsyncTransport(
+            [{"port": con.port}],
+            connection_class=AsyncStdlibHttpConnection,
+            maxsize=1,
+            meta_header=False,
+        )
+        await t._async_call()
+        t.connection_pool.mark_dead = Mock()
+        busy = asyncio.ensure_future(t.perform_request("GET", "/"))
+        await asyncio.sleep(0.05)
+
+        with pytest.raises(PoolTimeout):
+            await t.perform_request("GET", "/", params={"request_timeout": 0.05})
+        await busy
+        t.connection_pool.mark_dead.assert_not_called()
+        assert 1 == len(self.server.requests)
+        await t.close()
+        await self._close(con)
+
+    async def test_connection_refused_raises_connection_error(self):
+        con = AsyncStdlibHttpConnection("127.0.0.1", 1)
+        with pytest.raises(ConnectionError):
+            await con.perform_request("GET", "/")
+
+
+class TestAsyncUnixSocketConnection:
+    async def _assert_requests(self, con_class, **kwargs):
+        tmpdir = tempfile.mkdtemp()
+        path = os.path.join(tmpdir, "es.sock")
+        server = _RawServer()
+        await server.start_unix(path)
+        server.response = (
+            b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+            b'content-length: 8\r\n\r\n{"a": 1}'
+        )
+        con = con_class(unix_socket=path, **kwargs)
+        try:
+            for _ in range(3):
+                status, _, data = await con.perform_request(
+                    "POST", "/_search", params={"q": "x"}, body=b'{"query": {}}'
+                )
+                assert 200 == status
+                assert '{"a": 1}' == data
+        finally:
+            await con.close()
+            await server.stop()
+            shutil.rmtree(tmpdir)
+
+        assert 3 == len(server.requests)
+        head, body = server.requests[0]
+        assert head.startswith("POST /_search?q=x HTTP/1.1\r\n")
+        assert re.search(r"(?im)^host: localhost", head)
+        assert b'{"query": {}}' == body
+        # the connection is kept alive between requests
+        assert 1 == len(server.tasks)
+
+    async def test_stdlib(self):
+        await self._assert_requests(AsyncStdlibHttpConnection)
+
+    async def test_aiohttp(self):
+        await self._assert_requests(AIOHttpConnection)
+
+    async def test_httpx(self):
+        if httpx is None:
+            pytest.skip("httpx isn't installed")
+        await self._assert_requests(AsyncHttpxHttpConnection)
+
+    async def test_connection_error(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            for con_class in (AsyncStdlibHttpConnection, AIOHttpConnection):
+                con = con_class(unix_socket=os.path.join(tmpdir, "missing.sock"))
+                with pytest.raises(ConnectionError):
+                    await con.perform_request("GET", "/")
+                await con.close()
+        finally:
+            shutil.rmtree(tmpdir)
+
+
 class TestConnectionHttpbin:
     """Tests the HTTP connection implementations against a live server E2E"""
 
@@ -19,16 +19,20 @@
 from __future__ import unicode_literals
 
 import asyncio
+import io
 import json
 import re
+import socket
 
 import pytest
 from mock import patch
 
-from elasticsearch import AsyncTransport
+from elasticsearch import AsyncRawResponse, AsyncTransport
+from elasticsearch.budget import RetryBudget
 from elasticsearch.connection import Connection
-from elasticsearch.connection_pool import DummyConnectionPool
+from elasticsearch.connection_pool import CircuitBreaker, DummyConnectionPool
 from elasticsearch.exceptions import ConnectionError, TransportError
+from elasticsearch.resolver import DNSResolver
 
 pytestmark = pytest.mark.asyncio
 
@@ -40,6 +44,7 @@ class DummyConnection(Connection):
         self.headers = kwargs.pop("headers", {})
         self.delay = kwargs.pop("delay", 0)
         self.calls = []
+        self.warm_ups = []
         self.closed = False
         super(DummyConnection, self).__init__(**kwargs)
 
@@ -53,12 +58,29 @@ class DummyConnection(Connection):
             raise self.exception
         return self.status, self.headers, self.data
 
+    async def warm_up(self, count=1):
+        self.warm_ups.append(count)
+        if self.exception:
+            raise self.exception
+        return count
+
     async def close(self):
         if self.closed:
             raise RuntimeError("This connection is already closed")
         self.closed = True
 
 
+class BodyReadingConnection(DummyConnection):
+    """Consumes a streamed body as it's sent and records the bytes read."""
+
+    async def perform_request(self, method, url, params=None, body=None, **kwargs):
+        if hasattr(body, "read"):
+            body = body.read()
+        elif body is not None and not isinstance(body, bytes):
+            body = b"".join(body)
+        return await super().perform_request(method, url, params, body, **kwargs)
+
+
 CLUSTER_NODES = """{
   "_nodes" : {
     "total" : 1,
@@ -131,6 +153,79 @@ class TestTransport:
             "headers": None,
         } == t.get_connection().calls[0][1]
 
+    async def test_request_priority_extracted_from_params_and_passed(self):
+        t = AsyncTransport([{}], connection_class=DummyConnection, meta_header=False)
+
+        await t.perform_request("GET", "/", params={"request_priority": "background"})
+        assert ("GET", "/", {}, None) == t.get_connection().calls[0][0]
+        assert {
+            "timeout": None,
+            "ignore": (),
+            "headers": None,
+            "priority": "background",
+        } == t.get_connection().calls[0][1]
+
+    async def test_errors_other_than_transport_errors_are_not_node_failures(self):
+        t = AsyncTransport(
+            [{"exception": TypeError("unexpected argument")}],
+            connection_class=DummyConnection,
+        )
+        await t._async_call()
+        conn = t.get_connection()
+
+        with patch.object(t.connection_pool, "mark_request_end") as end:
+            with pytest.raises(TypeError):
+                await t.perform_request("GET", "/")
+        assert end.call_args[0][2] is False
+        assert conn in t.connection_pool.connections
+
+    async def test_streamed_request_is_in_flight_until_the_body_is_released(self):
+        async def read(amt):
+            return b""
+
+        async def release():
+            pass
+
+        raw = AsyncRawResponse(200, {}, read, release)
+        t = AsyncTransport(
+            [{"data": raw}], connection_class=DummyConnection, meta_header=False
+        )
+        await t._async_call()
+        conn = t.get_connection()
+
+        with patch.object(t.connection_pool, "mark_request_end") as end:
+            await t.perform_request("GET", "/", params={"request_stream": True})
+            assert not end.called
+            assert 1 == t._in_flight[conn]
+
+            # removed from the pool while the body is being read
+            t._drain_connections([conn])
+            await asyncio.sleep(0)
+            assert not conn.closed
+
+            await raw.close()
+        end.assert_called_once()
+        assert conn not in t._in_flight
+        await asyncio.sleep(0)
+        assert conn.closed
+
+    async def test_request_stream_returns_the_response_as_is(self):
+        raw = object()
+        t = AsyncTransport(
+            [{"data": raw}], connection_class=DummyConnection, meta_header=False
+        )
+
+        assert raw is await t.perform_request(
+            "GET", "/", params={"request_stream": True}
+        )
+        assert ("GET", "/", {}, None) == t.get_connection().calls[0][0]
+        assert {
+            "timeout": None,
+            "ignore": (),
+            "headers": None,
+            "stream": True,
+        } == t.get_connection().calls[0][1]
+
     async def test_opaque_id(self):
         t = AsyncTransport(
             [{}], opaque_id="app-1", connection_class=DummyConnection, meta_header=False
@@ -295,6 +390,127 @@ class TestTransport:
         assert connection_error
         assert 4 == len(t.get_connection().calls)
 
+    async def _failing_over_transport(self):
+        t = AsyncTransport(
+            [{"exception": ConnectionError("abandon ship")}, {}],
+            meta_header=False,
+            connection_class=BodyReadingConnection,
+            randomize_hosts=False,
+        )
+        await t._async_call()
+        return t, t.connection_pool.connections
+
+    async def test_seekable_streamed_body_is_rewound_before_retry(self):
+        t, (failing, live) = await self._failing_over_transport()
+
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[failing, live]
+        ):
+            await t.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n"))
+        assert b"{}\n" == failing.calls[0][0][3]
+        assert b"{}\n" == live.calls[0][0][3]
+
+    async def test_streamed_iterator_is_not_retried(self):
+        t, (failing, live) = await self._failing_over_transport()
+        chunks = (chunk for chunk in [b"{}\n", b"{}\n"])
+
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[failing, live]
+        ):
+            with pytest.raises(ConnectionError):
+                await t.perform_request("POST", "/_bulk", body=chunks)
+        assert b"{}\n{}\n" == failing.calls[0][0][3]
+        assert [] == live.calls
+
+    async def test_retries_are_limited_by_retry_budget(self):
+        t = AsyncTransport(
+            [{"exception": ConnectionError("abandon ship")}] * 2,
+            connection_class=DummyConnection,
+            retry_budget=RetryBudget(ratio=0.5, burst=1),
+        )
+
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await t.perform_request("GET", "/")
+        assert 3 == sum(len(c.calls) for c, _ in t.connection_pool.connection_opts)
+        assert 2 == t.retry_budget.denied
+
+    async def test_identical_concurrent_reads_are_coalesced(self):
+        t = AsyncTransport(
+            [{"delay": 0.1, "data": '{"hits": {"total": 1}}'}],
+            connection_class=DummyConnection,
+            single_flight=True,
+        )
+
+        results = await asyncio.gather(
+            *[t.perform_request("POST", "/i/_search", body={}) for _ in range(3)]
+        )
+        assert 1 == len(t.get_connection().calls)
+        assert [{"hits": {"total": 1}}] * 3 == results
+        assert 3 == len(set(map(id, results)))
+        assert 2 == t.single_flight.coalesced
+
+        await t.perform_request("POST", "/i/_search", body={})
+        assert 2 == len(t.get_connection().calls)
+
+    async def test_coalesced_read_survives_cancelled_caller(self):
+        t = AsyncTransport(
+            [{"delay": 0.1}], connection_class=DummyConnection, single_flight=True
+        )
+
+        first = asyncio.ensure_future(t.perform_request("GET", "/i/_doc/1"))
+        second = asyncio.ensure_future(t.perform_request("GET", "/i/_doc/1"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        assert {} == await second
+        assert first.cancelled()
+        assert 1 == len(t.get_connection().calls)
+
+    async def test_removed_connection_is_closed_once_requests_are_done(self):
+        t = AsyncTransport(
+            [{"host": "a"}, {"host": "b"}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+        )
+        await t._async_call()
+        t.set_connections([{"host": "a"}, {"host": "b"}, {"host": "c", "delay": 0.1}])
+        a, b, c = t.connection_pool.connections
+
+        request = asyncio.ensure_future(
+            t._perform_on_connection(c, "GET", "/", None, None, {}, (), None)
+        )
+        await asyncio.sleep(0.01)
+        t.set_connections([{"host": "a"}, {"host": "b"}])
+        assert [a, b] == t.connection_pool.connections
+        assert not c.closed
+
+        await request
+        await asyncio.sleep(0)
+        assert c.closed
+        assert {} == t._in_flight
+
+        t.set_connections([{"host": "b"}, {"host": "d"}])
+        # seed connections are kept for sniffing, closed with the transport
+        assert not a.closed
+        await t.close()
+        assert a.closed
+
+    async def test_retries_stop_once_total_timeout_is_over(self):
+        t = AsyncTransport(
+            [{"exception": ConnectionError("abandon ship"), "delay": 0.1}] * 4,
+            connection_class=DummyConnection,
+            max_retries=3,
+        )
+
+        with pytest.raises(ConnectionError):
+            await t.perform_request("GET", "/", params={"total_timeout": 0.15})
+        calls = [c.calls for c, _ in t.connection_pool.connection_opts]
+        assert 2 == sum(map(len, calls))
+        timeouts = sorted(kwargs["timeout"] for c in calls for _, kwargs in c)
+        assert 0 < timeouts[0] <= 0.05
+        assert 0.1 < timeouts[1] <= 0.15
+
     async def test_failed_connection_will_be_marked_as_dead(self):
         t = AsyncTransport(
             [{"exception": ConnectionError("abandon ship")}] * 2,
@@ -323,6 +539,145 @@ class TestTransport:
             assert 1 == len(t.connection_pool.connections)
             assert 1 == len(t.connection_pool.dead_count)
 
+    async def test_request_durations_are_reported_to_connection_pool(self):
+        t = AsyncTransport(
+            [{"delay": 0.01}, {"exception": TransportError(503, "unavailable")}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            max_retries=0,
+        )
+        await t._async_call()
+        ok, failing = t.connection_pool.connections
+        with patch.object(t.connection_pool, "mark_request_end") as mark_request_end:
+            await t.perform_request("GET", "/")
+            with pytest.raises(TransportError):
+                await t.perform_request("GET", "/")
+
+        assert 2 == mark_request_end.call_count
+        (conn, duration, failed), _ = mark_request_end.call_args_list[0]
+        assert conn is ok and not failed and duration >= 0.01
+        (conn, _, failed), _ = mark_request_end.call_args_list[1]
+        assert conn is failing and failed
+
+    async def test_dead_connection_is_resurrected_after_health_check(self):
+        t = AsyncTransport(
+            [{}, {"exception": ConnectionError("abandon ship")}],
+            connection_class=DummyConnection,
+            health_check=True,
+            dead_timeout=0.01,
+            randomize_hosts=False,
+        )
+        await t._async_call()
+        alive, dead = t.connection_pool.connections
+        t.mark_dead(alive)
+        t.mark_dead(dead)
+
+        for _ in range(100):
+            if alive in t.connection_pool.connections:
+                break
+            await asyncio.sleep(0.01)
+        await t.close()
+
+        assert [alive] == t.connection_pool.connections
+        assert alive not in t.connection_pool.dead_count
+        assert (("HEAD", "/"), {"timeout": 1}) == alive.calls[-1]
+        assert t.connection_pool.dead_count[dead] >= 2
+        assert t.health_check_task is None
+
+    async def test_circuit_breaker_trip_starts_health_checks(self):
+        class Breaker(CircuitBreaker):
+            window_size = min_requests = 2
+            slow_call_duration = 0.01
+
+        t = AsyncTransport(
+            [{"delay": 0.02}, {}],
+            connection_class=DummyConnection,
+            health_check=True,
+            dead_timeout=0,
+            circuit_breaker_class=Breaker,
+            randomize_hosts=False,
+        )
+        await t._async_call()
+        slow = t.connection_pool.connections[0]
+        with patch.object(t.connection_pool, "get_connection", return_value=slow):
+            await t.perform_request("GET", "/")
+            assert t.health_check_task is None
+            await t.perform_request("GET", "/")
+        assert slow not in t.connection_pool.connections
+        assert t.health_check_task is not None
+
+        for _ in range(100):
+            if slow in t.connection_pool.connections:
+                break
+            await asyncio.sleep(0.01)
+        await t.close()
+
+        assert slow in t.connection_pool.connections
+        assert (("HEAD", "/"), {"timeout": 1}) == slow.calls[-1]
+
+    async def test_slow_read_is_hedged(self):
+        t = AsyncTransport(
+            [{"delay": 1, "data": '{"node": 1}'}, {"data": '{"node": 2}'}],
+            connection_class=DummyConnection,
+            hedge_delay=0.05,
+            hedge_max_ratio=1,
+            randomize_hosts=False,
+        )
+        await t._async_call()
+        slow, fast = t.connection_pool.connections
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[slow, fast]
+        ):
+            start = t.loop.time()
+            assert {"node": 2} == await t.perform_request("POST", "/_search")
+        assert t.loop.time() - start < 0.5
+        # the slow request got cancelled
+        assert [] == slow.calls
+        assert (1, 1) == (t.hedging.hedged, t.hedging.wins)
+        assert [slow, fast] == t.connection_pool.connections
+
+    async def test_shard_aware_routing(self):
+        state = {
+            "nodes": {
+                "a": {"http": {"publish_address": "10.0.0.1:9200"}},
+                "b": {"http": {"publish_address": "10.0.0.2:9200"}},
+            },
+            "metadata": {
+                "indices": {"test": {"settings": {"index": {"number_of_shards": "1"}}}}
+            },
+            "routing_table": {
+                "indices": {
+                    "test": {
+                        "shards": {
+                            "0": [{"state": "STARTED", "primary": True, "node": "b"}]
+                        }
+                    }
+                }
+            },
+        }
+        t = AsyncTransport(
+            [{"host": "10.0.0.1", "port": 9200}, {"host": "10.0.0.2", "port": 9200}],
+            connection_class=DummyConnection,
+            shard_aware_routing=True,
+            randomize_hosts=False,
+            data=json.dumps(state),
+        )
+        await t.perform_request("GET", "/test/_doc/1", params={})
+        for _ in range(100):
+            if t.shard_router.indices.get("test"):
+                break
+            await asyncio.sleep(0.01)
+
+        a, b = t.connection_pool.connections
+        a.calls, b.calls = [], []
+        for _ in range(3):
+            await t.perform_request("GET", "/test/_doc/1", params={})
+        await t.close()
+
+        assert [] == a.calls
+        assert 3 == len(b.calls)
+        assert t.routing_task is None
+
     async def test_sniff_will_use_seed_connections(self):
         t = AsyncTransport([{"data": CLUSTER_NODES}], connection_class=DummyConnection)
         await t._async_call()
@@ -574,3 +929,61 @@ class TestTransport:
 
         # A lot quicker than 10 seconds defined in 'delay'
         assert duration < 1
+
+    async def test_resolve_dns_uses_the_loop_resolver(self, event_loop):
+        addresses = ["10.0.0.1", "10.0.0.2"]
+        lookups = []
+
+        async def getaddrinfo(host, port, family=0, type=0):
+            lookups.append((host, family, type))
+            return [
+                (socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 0))
+                for address in addresses
+            ]
+
+        t = AsyncTransport(
+            [{"host": "es.local"}],
+            connection_class=DummyConnection,
+            resolve_dns=DNSResolver(ttl=0),
+            randomize_hosts=False,
+        )
+        with patch.object(event_loop, "getaddrinfo", getaddrinfo), patch(
+            "elasticsearch.resolver.socket.getaddrinfo", side_effect=AssertionError
+        ):
+            await t._async_call()
+            pool = t.connection_pool
+            a, b = pool.connections
+            assert ["http://10.0.0.1:9200", "http://10.0.0.2:9200"] == [
+                c.host for c in pool.connections
+            ]
+
+            addresses[:] = ["10.0.0.2", "10.0.0.3"]
+            await t.perform_request("GET", "/")
+            await t.resolve_task
+
+        assert pool is t.connection_pool
+        assert b is pool.connections[0]
+        assert ["http://10.0.0.2:9200", "http://10.0.0.3:9200"] == [
+            c.host for c in pool.connections
+        ]
+        assert [("es.local", socket.AF_UNSPEC, socket.SOCK_STREAM)] * 2 == lookups
+        await t.close()
+
+    async def test_warm_up_on_sniff_on_start(self, event_loop):
+        t = AsyncTransport(
+            [{"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            sniff_on_start=True,
+            warm_up_on_sniff=2,
+        )
+        await t._async_call()
+
+        # the warm-up isn't awaited by the sniff
+        assert [] == t.get_connection().warm_ups
+        assert 1 == len(t._warm_up_tasks)
+        await asyncio.gather(*t._warm_up_tasks)
+        assert [2] == t.get_connection().warm_ups
+        # unreachable nodes are skipped
+        t.get_connection().exception = ConnectionError("N/A", "refused", None)
+        assert 0 == await t.warm_up(4)
+        await t.close()
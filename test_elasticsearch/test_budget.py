@@ -0,0 +1,42 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+from elasticsearch.budget import RetryBudget
+
+
+def test_budget_starts_full():
+    budget = RetryBudget(ratio=0.1, burst=3)
+    assert [True, True, True, False] == [budget.withdraw() for _ in range(4)]
+    assert {"requests": 0, "retries": 3, "denied": 1, "tokens": 0} == budget.stats()
+
+
+def test_requests_refill_budget():
+    budget = RetryBudget(ratio=0.25, burst=2)
+    budget.withdraw()
+    budget.withdraw()
+    for _ in range(3):
+        budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_budget_is_capped_by_burst():
+    budget = RetryBudget(ratio=1, burst=2)
+    for _ in range(10):
+        budget.deposit()
+    assert 2 == sum(budget.withdraw() for _ in range(5))
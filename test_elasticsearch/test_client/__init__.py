@@ -55,6 +55,25 @@ class TestNormalizeHosts(TestCase):
             ),
         )
 
+    def test_unix_socket_urls(self):
+        self.assertEqual(
+            [
+                {"host": "localhost", "unix_socket": "/run/Proxy.sock"},
+                {
+                    "host": "localhost",
+                    "unix_socket": "/run/proxy.sock",
+                    "http_auth": "user:secret",
+                    "url_prefix": "/prefix",
+                },
+            ],
+            _normalize_hosts(
+                [
+                    "http+unix://%2Frun%2FProxy.sock",
+                    "http+unix://user:secret@%2Frun%2Fproxy.sock/prefix",
+                ]
+            ),
+        )
+
     def test_dicts_are_left_unchanged(self):
         self.assertEqual(
             [{"host": "local", "extra": 123}],
@@ -71,6 +90,11 @@ class TestClient(ElasticsearchTestCase):
         calls = self.assert_url_called("HEAD", "/")
         self.assertEqual([({"request_timeout": 0.1}, {}, None)], calls)
 
+    def test_total_timeout_is_passed_through_unescaped(self):
+        self.client.ping(total_timeout=0.5)
+        calls = self.assert_url_called("HEAD", "/")
+        self.assertEqual([({"total_timeout": 0.5}, {}, None)], calls)
+
     def test_params_is_copied_when(self):
         rt = object()
         params = dict(request_timeout=rt)
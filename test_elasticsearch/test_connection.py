@@ -21,7 +21,12 @@ import io
 import json
 import os
 import re
+import shutil
+import socket
 import ssl
+import tempfile
+import threading
+import time
 import warnings
 from platform import python_version
 
@@ -35,30 +40,120 @@ from elasticsearch import __versionstr__
 from elasticsearch.compat import reraise_exceptions
 from elasticsearch.connection import (
     Connection,
+    HttpxHttpConnection,
+    RawResponse,
     RequestsHttpConnection,
+    StdlibHttpConnection,
     Urllib3HttpConnection,
 )
 from elasticsearch.exceptions import (
     ConflictError,
     ConnectionError,
+    ConnectionTimeout,
+    ImproperlyConfigured,
     NotFoundError,
+    PoolTimeout,
     RequestError,
     TransportError,
 )
+from elasticsearch.transport import Transport
 
 from .test_cases import SkipTest, TestCase
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import TCPServer, ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import TCPServer, ThreadingMixIn
+
 CLOUD_ID_PORT_443 = "cluster:d2VzdGV1cm9wZS5henVyZS5lbGFzdGljLWNsb3VkLmNvbTo0NDMkZTdkZTlmMTM0NWU0NDkwMjgzZDkwM2JlNWI2ZjkxOWUk"
 CLOUD_ID_KIBANA = "cluster:d2VzdGV1cm9wZS5henVyZS5lbGFzdGljLWNsb3VkLmNvbSQ4YWY3ZWUzNTQyMGY0NThlOTAzMDI2YjQwNjQwODFmMiQyMDA2MTU1NmM1NDA0OTg2YmZmOTU3ZDg0YTZlYjUxZg=="
 CLOUD_ID_PORT_AND_KIBANA = "cluster:d2VzdGV1cm9wZS5henVyZS5lbGFzdGljLWNsb3VkLmNvbTo5MjQzJGM2NjM3ZjMxMmM1MjQzY2RhN2RlZDZlOTllM2QyYzE5JA=="
 CLOUD_ID_NO_PORT_OR_KIBANA = "cluster:d2VzdGV1cm9wZS5henVyZS5lbGFzdGljLWNsb3VkLmNvbSRlN2RlOWYxMzQ1ZTQ0OTAyODNkOTAzYmU1YjZmOTE5ZSQ="
 
 
+def gzip_compress(data):
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb") as f:
+        f.write(data)
+    return buf.getvalue()
+
+
 def gzip_decompress(data):
     buf = gzip.GzipFile(fileobj=io.BytesIO(data), mode="rb")
     return buf.read()
 
 
+class _RecordingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        body = self.rfile.read(int(self.headers.get("content-length") or 0))
+        self.server.requests.append(
+            (self.command, self.path, self.headers, body, self.client_address)
+        )
+        status, headers, data = self.server.response
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+        # closes the connection without telling the client
+        self.close_connection = self.server.drop
+
+    do_GET = do_POST = do_PUT = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class _RecordingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), _RecordingHandler)
+        self.requests = []
+        self.response = (200, (), b"{}")
+        self.delay = 0
+        self.drop = False
+
+    def handle_error(self, request, client_address):
+        # clients giving up on purpose (timeouts)
+        pass
+
+
+class _UnixRecordingHandler(_RecordingHandler):
+    def setup(self):
+        _RecordingHandler.setup(self)
+        self.server.connections += 1
+
+
+class _UnixRecordingServer(_RecordingServer):
+    address_family = getattr(socket, "AF_UNIX", None)
+
+    def __init__(self, path):
+        HTTPServer.__init__(self, path, _UnixRecordingHandler)
+        self.requests = []
+        self.response = (200, (), b"{}")
+        self.delay = 0
+        self.drop = False
+        self.connections = 0
+
+    def server_bind(self):
+        # HTTPServer.server_bind() expects a (host, port) address
+        TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
 class TestBaseConnection(TestCase):
     def test_parse_cloud_id(self):
         # Embedded port in cloud_id
@@ -227,6 +322,16 @@ class TestUrllib3Connection(TestCase):
         self.assertIsInstance(con.pool.conn_kw["ssl_context"], ssl.SSLContext)
         self.assertTrue(con.use_ssl)
 
+    def test_server_hostname(self):
+        con = Urllib3HttpConnection(
+            "10.0.0.1", use_ssl=True, server_hostname="es.local"
+        )
+        self.assertEqual("10.0.0.1", con.pool.host)
+        self.assertEqual("es.local", con.pool.conn_kw["server_hostname"])
+
+        con = Urllib3HttpConnection("10.0.0.1", server_hostname="es.local")
+        self.assertNotIn("server_hostname", con.pool.conn_kw)
+
     def test_opaque_id(self):
         con = Urllib3HttpConnection(opaque_id="app-1")
         self.assertEqual(con.headers["x-opaque-id"], "app-1")
@@ -296,6 +401,179 @@ class TestUrllib3Connection(TestCase):
         self.assertNotIn("accept-encoding", kwargs["headers"])
         self.assertNotIn("content-encoding", kwargs["headers"])
 
+    def test_priority_lanes_use_separate_pools(self):
+        con = self._get_mock_connection({"priority_maxsize": {"background": 2}})
+        lane = con.priority_pools["background"]
+        self.assertEqual(2, lane.pool.maxsize)
+        self.assertEqual(10, con.pool.pool.maxsize)
+
+        lane.urlopen = Mock(side_effect=con.pool.urlopen)
+        con.perform_request("GET", "/", priority="background")
+        self.assertEqual(1, lane.urlopen.call_count)
+
+        # unknown priorities use the main pool
+        con.perform_request("GET", "/", priority="interactive")
+        con.perform_request("GET", "/")
+        self.assertEqual(1, lane.urlopen.call_count)
+
+        con.close()
+        self.assertIsNone(lane.pool)
+
+    def test_blocking_pool_times_out_waiting_for_a_connection(self):
+        con = Urllib3HttpConnection(maxsize=1, pool_block=True, pool_timeout=0.01)
+        self.assertTrue(con.pool.block)
+
+        held = con.pool._get_conn()
+        with self.assertRaises(PoolTimeout):
+            con.perform_request("GET", "/")
+        con.pool._put_conn(held)
+
+        stats = con.pool_stats()
+        self.assertEqual(1, stats["maxsize"])
+        self.assertEqual(2, stats["requests"])
+        self.assertEqual(1, stats["exhausted"])
+        self.assertEqual(1, stats["timeouts"])
+        self.assertGreater(stats["max_wait"], 0)
+
+    def test_auto_sized_pool_grows_with_the_threads(self):
+        con = Urllib3HttpConnection(maxsize="auto", pool_block=True)
+        queue = con.pool.pool
+        size = queue.maxsize
+        held = [con.pool._get_conn(timeout=0.01) for _ in range(size)]
+
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait)
+        thread.start()
+        try:
+            held.append(con.pool._get_conn(timeout=0.01))
+        finally:
+            stop.set()
+            thread.join()
+
+        self.assertEqual(size + 1, queue.maxsize)
+        self.assertEqual(0, con.pool_stats()["exhausted"])
+
+    def test_warm_up_opens_idle_connections(self):
+        server = _RecordingServer()
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        con = Urllib3HttpConnection("127.0.0.1", server.server_address[1], maxsize=3)
+        self.addCleanup(con.close)
+        self.assertEqual(2, con.warm_up(2))
+        self.assertEqual(1, con.warm_up(5))
+        self.assertEqual(0, con.warm_up(3))
+
+        socks = [conn.sock for conn in con.pool.pool.queue]
+        self.assertEqual(3, len(socks))
+        self.assertNotIn(None, socks)
+        self.assertEqual(0, con.pool_stats()["requests"])
+
+        # the request uses one of the open connections
+        con.perform_request("GET", "/")
+        self.assertEqual(3, con.pool_stats()["connections"])
+
+    def _start_recording_server(self):
+        server = _RecordingServer()
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_socket_options(self):
+        con = Urllib3HttpConnection()
+        self.assertNotIn("socket_options", con.pool.conn_kw)
+
+        con = Urllib3HttpConnection(tcp_keepalive=True)
+        self.assertEqual(
+            [
+                (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ],
+            con.pool.conn_kw["socket_options"],
+        )
+
+        con = Urllib3HttpConnection(tcp_nodelay=False)
+        self.assertEqual([], con.pool.conn_kw["socket_options"])
+
+    def test_idle_timeout_closes_idle_connections(self):
+        server = self._start_recording_server()
+        con = Urllib3HttpConnection(
+            "127.0.0.1", server.server_address[1], idle_timeout=0.2
+        )
+        self.addCleanup(con.close)
+
+        con.perform_request("GET", "/")
+        con.perform_request("GET", "/")
+        time.sleep(0.3)
+        con.perform_request("GET", "/")
+
+        addresses = [request[4] for request in server.requests]
+        self.assertEqual(addresses[0], addresses[1])
+        self.assertNotEqual(addresses[1], addresses[2])
+
+    def test_max_connection_age_closes_old_connections(self):
+        server = self._start_recording_server()
+        con = Urllib3HttpConnection(
+            "127.0.0.1", server.server_address[1], max_connection_age=0.3
+        )
+        self.addCleanup(con.close)
+
+        con.perform_request("GET", "/")
+        time.sleep(0.15)
+        con.perform_request("GET", "/")
+        time.sleep(0.2)
+        con.perform_request("GET", "/")
+
+        addresses = [request[4] for request in server.requests]
+        self.assertEqual(addresses[0], addresses[1])
+        self.assertNotEqual(addresses[1], addresses[2])
+
+    def test_stream_returns_the_undecoded_body(self):
+        server = self._start_recording_server()
+        body = b'{"hits": "' + b"x" * 200000 + b'"}'
+        server.response = (200, (("Content-Type", "application/json"),), body)
+        con = Urllib3HttpConnection("127.0.0.1", server.server_address[1])
+        self.addCleanup(con.close)
+
+        status, _, raw = con.perform_request("GET", "/", stream=True)
+        self.assertEqual(200, status)
+        self.assertIsInstance(raw, RawResponse)
+        self.assertEqual("application/json", raw.content_type)
+        self.assertEqual(body, b"".join(raw))
+        self.assertTrue(raw.closed)
+
+        # a partially read response closes its connection
+        with con.perform_request("GET", "/", stream=True)[2] as raw:
+            self.assertEqual(b'{"hits": "x', raw.read(11))
+        self.assertEqual(body, con.perform_request("GET", "/")[2].encode())
+
+        addresses = [request[4] for request in server.requests]
+        self.assertEqual(addresses[0], addresses[1])
+        self.assertNotEqual(addresses[1], addresses[2])
+
+    def test_stream_errors_are_raised(self):
+        server = self._start_recording_server()
+        server.response = (404, (), b'{"error": "index_not_found_exception"}')
+        con = Urllib3HttpConnection("127.0.0.1", server.server_address[1])
+        self.addCleanup(con.close)
+
+        self.assertRaises(NotFoundError, con.perform_request, "GET", "/", stream=True)
+        _, _, raw = con.perform_request("GET", "/", ignore=(404,), stream=True)
+        self.assertEqual(b'{"error": "index_not_found_exception"}', raw.read())
+        self.assertTrue(raw.closed)
+        self.assertEqual(1, con.pool_stats()["connections"])
+
+    def test_warm_up_connection_refused_raises_connection_error(self):
+        con = Urllib3HttpConnection("127.0.0.1", 1)
+        self.assertRaises(ConnectionError, con.warm_up)
+        self.assertEqual(con.pool.pool.maxsize, con.pool.pool.qsize())
+
     def test_http_compression(self):
         con = self._get_mock_connection({"http_compress": True})
         self.assertTrue(con.http_compress)
@@ -517,6 +795,78 @@ class TestRequestsConnection(TestCase):
         self.assertEqual(1, len(args))
         return args[0]
 
+    def test_server_hostname(self):
+        con = RequestsHttpConnection(
+            "10.0.0.1", use_ssl=True, server_hostname="es.local"
+        )
+        adapter = con.session.get_adapter(con.base_url)
+        self.assertEqual(
+            "es.local", adapter.poolmanager.connection_pool_kw["server_hostname"]
+        )
+
+    def test_priority_is_accepted(self):
+        con = self._get_mock_connection()
+        request = self._get_request(con, "GET", "/", priority="background")
+        self.assertEqual("http://localhost:9200/", request.url)
+
+    def test_socket_options_and_idle_timeout(self):
+        con = RequestsHttpConnection()
+        adapter = con.session.get_adapter(con.base_url)
+        self.assertNotIn("socket_options", adapter.poolmanager.connection_pool_kw)
+
+        con = RequestsHttpConnection(tcp_keepalive=True, idle_timeout=30)
+        adapter = con.session.get_adapter(con.base_url)
+        self.assertEqual(
+            [
+                (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ],
+            adapter.poolmanager.connection_pool_kw["socket_options"],
+        )
+        pool = adapter.poolmanager.connection_from_url(con.base_url)
+        self.assertEqual(30, pool.idle_timeout)
+        self.assertIsNone(pool.max_connection_age)
+
+    def test_stream_returns_the_undecoded_body(self):
+        server = _RecordingServer()
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        body = b'{"hits": "' + b"x" * 200000 + b'"}'
+        server.response = (200, (("Content-Type", "application/json"),), body)
+        con = RequestsHttpConnection("127.0.0.1", server.server_address[1])
+        self.addCleanup(con.close)
+
+        status, _, raw = con.perform_request("GET", "/", stream=True)
+        self.assertEqual(200, status)
+        self.assertIsInstance(raw, RawResponse)
+        self.assertEqual("application/json", raw.content_type)
+        self.assertEqual(body, b"".join(raw))
+        self.assertTrue(raw.closed)
+        con.perform_request("GET", "/")
+
+        server.response = (404, (), b"{}")
+        self.assertRaises(NotFoundError, con.perform_request, "GET", "/", stream=True)
+
+        addresses = [request[4] for request in server.requests]
+        self.assertEqual(1, len(set(addresses)))
+
+    def test_ssl_context_is_ignored_with_a_warning(self):
+        # accepted silently before, it keeps working but now warns
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            con = RequestsHttpConnection(
+                use_ssl=True,
+                ca_certs=__file__,
+                ssl_context=ssl.create_default_context(),
+            )
+
+        self.assertEqual(1, len(w))
+        self.assertIn("doesn't support ssl_context", str(w[0].message))
+        self.assertEqual(__file__, con.session.verify)
+
     def test_custom_http_auth_is_allowed(self):
         auth = AuthBase()
         c = RequestsHttpConnection(http_auth=auth)
@@ -901,6 +1251,496 @@ class TestRequestsConnection(TestCase):
         assert str(e.value) == "Wasn't modified!"
 
 
+class TestStdlibConnection(TestCase):
+    def setUp(self):
+        super(TestStdlibConnection, self).setUp()
+        self.server = _RecordingServer()
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.01,))
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super(TestStdlibConnection, self).tearDown()
+
+    def _get_connection(self, **kwargs):
+        con = StdlibHttpConnection("127.0.0.1", self.server.server_address[1], **kwargs)
+        self.addCleanup(con.close)
+        return con
+
+    def test_perform_request(self):
+        con = self._get_connection(
+            url_prefix="prefix", headers={"x-app": "test"}, http_auth=("user", "pw")
+        )
+        self.server.response = (200, [("x-response", "1")], b'{"took":1}')
+        status, headers, data = con.perform_request(
+            "POST",
+            "/_search",
+            params={"q": "x"},
+            body=b'{"size":0}',
+            headers={"x-request": "1"},
+        )
+        self.assertEqual((200, '{"took":1}'), (status, data))
+        self.assertEqual("1", headers["X-Response"])
+
+        method, path, request_headers, body, _ = self.server.requests[0]
+        self.assertEqual(("POST", "/prefix/_search?q=x"), (method, path))
+        self.assertEqual(b'{"size":0}', body)
+        self.assertEqual("test", request_headers["x-app"])
+        self.assertEqual("1", request_headers["x-request"])
+        self.assertEqual("Basic dXNlcjpwdw==", request_headers["authorization"])
+        self.assertEqual("application/json", request_headers["content-type"])
+        self.assertNotIn("x-request", con.headers)
+
+    def test_priority_is_accepted(self):
+        con = self._get_connection()
+        status, _, _ = con.perform_request("GET", "/", priority="background")
+        self.assertEqual(200, status)
+        self.assertEqual(1, len(self.server.requests))
+
+    def test_stream_is_rejected(self):
+        con = self._get_connection()
+        self.assertRaises(
+            ImproperlyConfigured, con.perform_request, "GET", "/", stream=True
+        )
+        self.assertEqual([], self.server.requests)
+
+    def test_keep_alive_connection_is_reused(self):
+        con = self._get_connection()
+        con.perform_request("GET", "/")
+        con.perform_request("GET", "/")
+
+        first, second = [r[4] for r in self.server.requests]
+        self.assertEqual(first, second)
+
+    def test_dropped_connection_is_reopened(self):
+        self.server.drop = True
+        con = self._get_connection()
+        con.perform_request("GET", "/")
+        # let the server close the socket
+        time.sleep(0.05)
+        status, _, _ = con.perform_request("GET", "/")
+
+        self.assertEqual(200, status)
+        first, second = [r[4] for r in self.server.requests]
+        self.assertNotEqual(first, second)
+
+    def test_idle_connections_are_limited_to_maxsize(self):
+        con = self._get_connection(maxsize=1)
+        first, second = con._get_connection(), con._get_connection()
+        first.connect()
+        second.connect()
+        con._release_connection(first)
+        con._release_connection(second)
+
+        self.assertEqual(1, con._free_connections.qsize())
+        self.assertIsNone(second.sock)
+        con.close()
+        self.assertIsNone(first.sock)
+
+    def test_warm_up_opens_idle_connections(self):
+        con = self._get_connection(maxsize=2)
+        self.assertEqual(2, con.warm_up(3))
+        self.assertEqual(0, con.warm_up(2))
+
+        addresses = set(c.sock.getsockname() for c in con._free_connections.queue)
+        self.assertEqual(2, len(addresses))
+        con.perform_request("GET", "/")
+        con.perform_request("GET", "/")
+        self.assertEqual(addresses, set(r[4] for r in self.server.requests))
+
+    def test_http_compression(self):
+        con = self._get_connection(http_compress=True)
+        self.server.response = (
+            200,
+            [("content-encoding", "gzip")],
+            gzip_compress(b'{"took":1}'),
+        )
+        _, _, data = con.perform_request("POST", "/", body=b"{}")
+
+        _, _, request_headers, body, _ = self.server.requests[0]
+        self.assertEqual('{"took":1}', data)
+        self.assertEqual("gzip", request_headers["content-encoding"])
+        self.assertEqual(b"{}", gzip_decompress(body))
+
+    def test_error_status_raises(self):
+        con = self._get_connection()
+        self.server.response = (404, [], b'{"error":"missing"}')
+        self.assertRaises(NotFoundError, con.perform_request, "GET", "/")
+        status, _, data = con.perform_request("GET", "/", ignore=(404,))
+        self.assertEqual((404, '{"error":"missing"}'), (status, data))
+
+    def test_warning_headers_are_raised(self):
+        con = self._get_connection()
+        self.server.response = (
+            200,
+            [("warning", '299 Elasticsearch-7.10.0 "this is deprecated"')],
+            b"{}",
+        )
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            con.perform_request("GET", "/")
+
+        self.assertEqual(["this is deprecated"], [str(x.message) for x in w])
+
+    def test_timeout_raises_connection_timeout(self):
+        self.server.delay = 0.5
+        con = self._get_connection()
+        self.assertRaises(
+            ConnectionTimeout, con.perform_request, "GET", "/", timeout=0.05
+        )
+        # the connection was closed instead of being put back in the pool
+        self.assertEqual(0, con._free_connections.qsize())
+
+    def test_connection_refused_raises_connection_error(self):
+        con = StdlibHttpConnection("127.0.0.1", 1)
+        self.assertRaises(ConnectionError, con.perform_request, "GET", "/")
+
+    def test_uses_ssl_context(self):
+        ctx = ssl.create_default_context()
+        con = StdlibHttpConnection(use_ssl=True, ssl_context=ctx)
+        self.assertIs(ctx, con._make_connection()._context)
+
+    @patch("elasticsearch.connection.http_stdlib.HTTPConnection.connect")
+    def test_server_hostname(self, connect):
+        ctx = Mock()
+        con = StdlibHttpConnection(
+            "10.0.0.1", use_ssl=True, ssl_context=ctx, server_hostname="es.local"
+        )
+        http_con = con._make_connection()
+        http_con.connect()
+
+        self.assertEqual("10.0.0.1", http_con.host)
+        ctx.wrap_socket.assert_called_once_with(None, server_hostname="es.local")
+
+
+class TestHttpxConnection(TestCase):
+    def setUp(self):
+        if httpx is None:
+            raise SkipTest("httpx isn't installed")
+        super(TestHttpxConnection, self).setUp()
+
+    def _get_mock_connection(
+        self, connection_params={}, status_code=200, response_body=b"{}"
+    ):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            if isinstance(response_body, Exception):
+                raise response_body
+            return httpx.Response(status_code, content=response_body)
+
+        class MockConnection(HttpxHttpConnection):
+            def _create_client(self, **kwargs):
+                kwargs["transport"] = httpx.MockTransport(handler)
+                return super(MockConnection, self)._create_client(**kwargs)
+
+        params = {"http2": False}
+        params.update(connection_params)
+        con = MockConnection(**params)
+        con.requests = requests
+        return con
+
+    def test_perform_request(self):
+        con = self._get_mock_connection(
+            {"url_prefix": "prefix", "headers": {"x-app": "test"}}
+        )
+        status, headers, data = con.perform_request(
+            "POST",
+            "/_search",
+            params={"q": "x"},
+            body=b'{"size": 0}',
+            headers={"x-request": "1"},
+        )
+        self.assertEqual((200, "{}"), (status, data))
+
+        request = con.requests[0]
+        self.assertEqual("http://localhost:9200/prefix/_search?q=x", str(request.url))
+        self.assertEqual(b'{"size": 0}', request.content)
+        self.assertEqual("test", request.headers["x-app"])
+        self.assertEqual("1", request.headers["x-request"])
+        self.assertNotIn("accept-encoding", request.headers)
+
+    def test_priority_is_accepted(self):
+        con = self._get_mock_connection()
+        status, _, _ = con.perform_request("GET", "/", priority="background")
+        self.assertEqual(200, status)
+        self.assertEqual(1, len(con.requests))
+
+    def test_stream_is_rejected(self):
+        con = self._get_mock_connection()
+        self.assertRaises(
+            ImproperlyConfigured, con.perform_request, "GET", "/", stream=True
+        )
+        self.assertEqual([], con.requests)
+
+    def test_http_compression(self):
+        con = self._get_mock_connection({"http_compress": True})
+        con.perform_request("GET", "/", body=b"{}")
+
+        request = con.requests[0]
+        self.assertEqual("gzip", request.headers["content-encoding"])
+        self.assertEqual(b"{}", gzip_decompress(request.content))
+        self.assertEqual("gzip,deflate", request.headers["accept-encoding"])
+
+    def test_streamed_body(self):
+        con = self._get_mock_connection()
+        con.perform_request("POST", "/_bulk", body=iter([b"{}\n", b"{}\n"]))
+        con.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n" * 3))
+
+        self.assertEqual(b"{}\n{}\n", con.requests[0].content)
+        self.assertEqual("chunked", con.requests[0].headers["transfer-encoding"])
+        self.assertEqual(b"{}\n{}\n{}\n", con.requests[1].content)
+
+    def test_streamed_body_through_the_transport(self):
+        con = self._get_mock_connection()
+        t = Transport([{}], connection_class=type(con), meta_header=False)
+        t.perform_request("POST", "/_bulk", body=(c for c in [b"{}\n", b"{}\n"]))
+        t.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n" * 3))
+        t.close()
+
+        self.assertEqual(b"{}\n{}\n", con.requests[0].content)
+        self.assertEqual(b"{}\n{}\n{}\n", con.requests[1].content)
+
+    def test_streamed_body_over_http2(self):
+        con = self._get_mock_connection({"http2": True})
+        self.assertIsNone(con._slots)
+        con.perform_request("POST", "/_bulk", body=iter([b"{}\n", b"{}\n"]))
+        con.close()
+
+        self.assertEqual(b"{}\n{}\n", con.requests[0].content)
+
+    def test_streamed_body_is_compressed(self):
+        con = self._get_mock_connection({"http_compress": True})
+        con.perform_request("POST", "/_bulk", body=io.BytesIO(b"{}\n" * 100000))
+
+        request = con.requests[0]
+        self.assertEqual("gzip", request.headers["content-encoding"])
+        self.assertEqual(b"{}\n" * 100000, gzip_decompress(request.content))
+
+    def test_server_hostname(self):
+        con = self._get_mock_connection(
+            {"host": "10.0.0.1", "use_ssl": True, "server_hostname": "es.local"}
+        )
+        con.perform_request("GET", "/")
+        con.close()
+
+        self.assertEqual("10.0.0.1", con.requests[0].url.host)
+        self.assertEqual("es.local", con.requests[0].extensions["sni_hostname"])
+
+    def test_pool_limits(self):
+        con = self._get_mock_connection(
+            {
+                "maxsize": 4,
+                "keepalive_maxsize": 2,
+                "keepalive_expiry": 1,
+                "pool_timeout": 0.5,
+            }
+        )
+        self.assertEqual(0.5, con.client.timeout.pool)
+        self.assertEqual(10, con.client.timeout.read)
+
+        con.perform_request("GET", "/", timeout=3)
+        self.assertEqual(
+            {"connect": 3, "read": 3, "write": 3, "pool": 0.5},
+            con.requests[0].extensions["timeout"],
+        )
+
+    def test_pool_timeout_waiting_for_a_connection(self):
+        con = self._get_mock_connection({"maxsize": 1, "pool_timeout": 0.01})
+        con._slots.acquire()
+        self.assertRaises(PoolTimeout, con.perform_request, "GET", "/")
+
+        con._slots.release()
+        con.perform_request("GET", "/")
+        self.assertEqual(1, len(con.requests))
+
+    def test_waits_for_a_connection_without_timeout(self):
+        con = self._get_mock_connection({"maxsize": 1, "timeout": None})
+        con._slots.acquire()
+        releaser = threading.Timer(0.1, con._slots.release)
+        releaser.start()
+
+        status, _, _ = con.perform_request("GET", "/")
+        releaser.join()
+        self.assertEqual(200, status)
+        self.assertEqual(1, len(con.requests))
+
+    def test_zero_timeout_doesnt_wait_for_a_connection(self):
+        con = self._get_mock_connection({"maxsize": 1})
+        con._slots.acquire()
+        start = time.time()
+        self.assertRaises(PoolTimeout, con.perform_request, "GET", "/", timeout=0)
+        self.assertLess(time.time() - start, 1)
+        self.assertEqual([], con.requests)
+
+    @patch("elasticsearch.connection.http_httpx.httpx.Limits")
+    def test_keepalive_limits(self, limits):
+        self._get_mock_connection({"maxsize": 4})
+        limits.assert_called_once_with(
+            max_connections=4, max_keepalive_connections=4, keepalive_expiry=5.0
+        )
+
+    def test_error_status_raises(self):
+        con = self._get_mock_connection(status_code=404)
+        self.assertRaises(NotFoundError, con.perform_request, "GET", "/")
+        status, _, _ = con.perform_request("GET", "/", ignore=(404,))
+        self.assertEqual(404, status)
+
+    def test_timeout_is_converted(self):
+        con = self._get_mock_connection(response_body=httpx.ReadTimeout("timed out"))
+        self.assertRaises(ConnectionTimeout, con.perform_request, "GET", "/")
+
+    def test_transport_errors_are_converted(self):
+        con = self._get_mock_connection(response_body=httpx.ConnectError("refused"))
+        self.assertRaises(ConnectionError, con.perform_request, "GET", "/")
+
+    def test_other_errors_are_not_converted(self):
+        con = self._get_mock_connection()
+        self.assertRaises(TypeError, con.perform_request, "POST", "/", body=42)
+        self.assertEqual([], con.requests)
+
+    def test_http2_requests_from_several_threads(self):
+        con = self._get_mock_connection({"http2": True})
+        threads = [
+            threading.Thread(target=con.perform_request, args=("GET", "/"))
+            for _ in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(10, len(con.requests))
+
+        thread = con.client._thread
+        con.close()
+        self.assertFalse(thread.is_alive())
+
+    def test_close_lets_the_http2_requests_in_flight_finish(self):
+        import asyncio
+
+        started = threading.Event()
+
+        async def handler(request):
+            started.set()
+            # awaited by the MockTransport, on the loop of the client
+            await asyncio.sleep(0.3)
+            return httpx.Response(200, content=b"{}")
+
+        class SlowConnection(HttpxHttpConnection):
+            def _create_client(self, **kwargs):
+                kwargs["transport"] = httpx.MockTransport(handler)
+                return super(SlowConnection, self)._create_client(**kwargs)
+
+        con = SlowConnection(http2=True)
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(con.perform_request("GET", "/"))
+        )
+        thread.start()
+        self.assertTrue(started.wait(5))
+        loop_thread = con.client._thread
+        con.close()
+
+        # new requests are refused right away
+        self.assertRaises(ConnectionError, con.perform_request, "GET", "/")
+        self.assertTrue(loop_thread.is_alive())
+        thread.join(5)
+        self.assertEqual(200, results[0][0])
+        # closed by the last request in flight
+        loop_thread.join(5)
+        self.assertFalse(loop_thread.is_alive())
+
+    @patch("elasticsearch.connection.http_httpx.HTTPX_AVAILABLE", False)
+    def test_requires_httpx(self):
+        self.assertRaises(ImproperlyConfigured, HttpxHttpConnection)
+
+
+class TestUnixSocketConnection(TestCase):
+    def setUp(self):
+        if not hasattr(socket, "AF_UNIX"):
+            raise SkipTest("Unix domain sockets aren't supported")
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "es.sock")
+        self.server = _UnixRecordingServer(self.path)
+        self.server.response = (
+            200,
+            (("content-type", "application/json"),),
+            b'{"a": 1}',
+        )
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmpdir)
+
+    def _assert_requests(self, con):
+        try:
+            for _ in range(3):
+                status, _, data = con.perform_request(
+                    "POST", "/_search", params={"q": "x"}, body=b'{"query": {}}'
+                )
+                self.assertEqual(200, status)
+                self.assertEqual('{"a": 1}', data)
+        finally:
+            con.close()
+
+        self.assertEqual(3, len(self.server.requests))
+        method, path, headers, body, _ = self.server.requests[0]
+        self.assertEqual("POST", method)
+        self.assertEqual("/_search?q=x", path)
+        self.assertEqual(b'{"query": {}}', body)
+        self.assertEqual("localhost", headers["host"].split(":")[0])
+        # the connection is kept alive between requests
+        self.assertEqual(1, self.server.connections)
+
+    def test_urllib3(self):
+        self._assert_requests(Urllib3HttpConnection(unix_socket=self.path))
+
+    def test_requests(self):
+        self._assert_requests(RequestsHttpConnection(unix_socket=self.path))
+
+    def test_stdlib(self):
+        self._assert_requests(StdlibHttpConnection(unix_socket=self.path))
+
+    def test_httpx(self):
+        if httpx is None:
+            raise SkipTest("httpx isn't installed")
+        self._assert_requests(HttpxHttpConnection(unix_socket=self.path))
+
+    def test_url_prefix(self):
+        con = StdlibHttpConnection(unix_socket=self.path, url_prefix="/es")
+        try:
+            con.perform_request("GET", "/")
+        finally:
+            con.close()
+        self.assertEqual("/es/", self.server.requests[0][1])
+
+    def test_connection_error(self):
+        os.unlink(self.path)
+        for con_class in (
+            Urllib3HttpConnection,
+            RequestsHttpConnection,
+            StdlibHttpConnection,
+        ):
+            con = con_class(unix_socket=self.path)
+            self.assertRaises(ConnectionError, con.perform_request, "GET", "/")
+            con.close()
+
+    def test_ssl_is_rejected(self):
+        self.assertRaises(
+            ImproperlyConfigured,
+            Urllib3HttpConnection,
+            unix_socket=self.path,
+            use_ssl=True,
+        )
+
+
 class TestConnectionHttpbin:
     """Tests the HTTP connection implementations against a live server E2E"""
 
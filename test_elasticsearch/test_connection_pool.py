@@ -19,9 +19,12 @@ import time
 
 from elasticsearch.connection import Connection
 from elasticsearch.connection_pool import (
+    CircuitBreaker,
     ConnectionPool,
     DummyConnectionPool,
+    LatencyAwareSelector,
     RoundRobinSelector,
+    ZoneAwareSelector,
 )
 from elasticsearch.exceptions import ImproperlyConfigured
 
@@ -81,6 +84,70 @@ class TestConnectionPool(TestCase):
         self.assertEqual(1, pool.dead.qsize())
         self.assertEqual((now + 60, 42), pool.dead.get())
 
+    def test_live_connections_are_never_modified_in_place(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)], randomize_hosts=False)
+        snapshot = pool.connections
+
+        pool.mark_dead(1)
+        self.assertEqual([0, 1, 2], snapshot)
+        self.assertEqual([0, 2], pool.connections)
+
+        snapshot = pool.connections
+        pool.resurrect(force=True)
+        self.assertEqual([0, 2], snapshot)
+        self.assertEqual([0, 2, 1], pool.connections)
+
+    def test_get_connection_does_not_copy_live_connections(self):
+        class MySelector(RoundRobinSelector):
+            def select(self, connections):
+                self.seen = connections
+                return connections[0]
+
+        pool = ConnectionPool([(x, {}) for x in range(3)], selector_class=MySelector)
+        pool.get_connection()
+        self.assertIs(pool.connections, pool.selector.seen)
+
+    def test_dead_connection_not_eligible_is_left_in_queue(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)])
+        now = time.time()
+        pool.mark_dead(0, now=now)
+
+        self.assertIsNone(pool.resurrect())
+        self.assertEqual(1, pool.dead.qsize())
+        self.assertEqual((now + 60, 0), pool.dead.queue[0])
+
+    def test_health_check_pool_does_not_resurrect_on_timeout(self):
+        pool = ConnectionPool([(x, {}) for x in range(2)], health_check=True)
+        pool.mark_dead(0, now=time.time() - 61)
+
+        self.assertEqual([1, 1], [pool.get_connection(), pool.get_connection()])
+        self.assertEqual(1, pool.dead.qsize())
+
+    def test_get_dead_connections_to_check_only_returns_expired(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)], health_check=True)
+        now = time.time()
+        pool.mark_dead(0, now=now - 61)
+        pool.mark_dead(1, now=now)
+
+        self.assertEqual([0], pool.get_dead_connections_to_check(now=now))
+        self.assertEqual(now + 60, pool.next_check_time())
+        self.assertEqual([], pool.get_dead_connections_to_check(now=now))
+
+    def test_mark_checked(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)], health_check=True)
+        now = time.time()
+        pool.mark_dead(0, now=now - 61)
+        pool.mark_dead(1, now=now - 61)
+        self.assertEqual([0, 1], sorted(pool.get_dead_connections_to_check()))
+
+        pool.mark_checked(0, True)
+        pool.mark_checked(1, False, now=now)
+        self.assertIn(0, pool.connections)
+        self.assertNotIn(0, pool.dead_count)
+        self.assertNotIn(1, pool.connections)
+        self.assertEqual(2, pool.dead_count[1])
+        self.assertEqual((now + 120, 1), pool.dead.get())
+
     def test_connection_is_skipped_when_dead(self):
         pool = ConnectionPool([(x, {}) for x in range(2)])
         pool.mark_dead(0)
@@ -155,3 +222,233 @@ class TestConnectionPool(TestCase):
         self.assertEqual(3, pool.dead_count[42])
         pool.mark_live(42)
         self.assertNotIn(42, pool.dead_count)
+
+    def test_set_connections_keeps_state_of_remaining_connections(self):
+        pool = ConnectionPool([(x, {}) for x in range(4)], randomize_hosts=False)
+        now = time.time()
+        pool.mark_dead(1, now=now)
+        pool.mark_dead(2, now=now)
+        pool.dead_count[1] = 3
+
+        removed = pool.set_connections([(x, {"id": x}) for x in (0, 1, 4)])
+
+        self.assertEqual([2, 3], removed)
+        self.assertEqual([0, 4], pool.connections)
+        self.assertEqual({1: 3}, pool.dead_count)
+        self.assertEqual([(now + 60, 1)], pool.dead.queue)
+        self.assertEqual((0, 1, 4), pool.orig_connections)
+        self.assertEqual({"id": 4}, pool.selector.connection_opts[4])
+
+    def test_set_connections_requires_connections(self):
+        pool = ConnectionPool([(x, {}) for x in range(2)])
+        self.assertRaises(ImproperlyConfigured, pool.set_connections, [])
+
+    def test_removed_connection_is_not_resurrected(self):
+        pool = ConnectionPool([(x, {}) for x in range(3)], health_check=True)
+        pool.mark_dead(1, now=time.time() - 61)
+        self.assertEqual([1], pool.get_dead_connections_to_check())
+
+        pool.set_connections([(x, {}) for x in (0, 2)])
+        pool.mark_checked(1, True)
+        self.assertNotIn(1, pool.connections)
+        self.assertEqual(0, pool.dead.qsize())
+
+
+class TestLatencyAwareSelector(TestCase):
+    def test_prefers_faster_connection(self):
+        selector = LatencyAwareSelector({})
+        selector.mark_request_start(0)
+        selector.mark_request_end(0, 0.5)
+        selector.mark_request_start(1)
+        selector.mark_request_end(1, 0.01)
+
+        self.assertEqual([1] * 10, [selector.select([0, 1]) for _ in range(10)])
+
+    def test_in_flight_requests_increase_cost(self):
+        selector = LatencyAwareSelector({})
+        for conn in (0, 1):
+            selector.mark_request_start(conn)
+            selector.mark_request_end(conn, 0.1)
+        for _ in range(3):
+            selector.mark_request_start(0)
+
+        self.assertEqual(1, selector.select([0, 1]))
+        self.assertAlmostEqual(0.4, selector.cost(0))
+        self.assertAlmostEqual(0.1, selector.cost(1))
+
+    def test_failures_are_penalized(self):
+        selector = LatencyAwareSelector({})
+        selector.mark_request_start(0)
+        selector.mark_request_end(0, 0.001, failed=True)
+
+        self.assertEqual(selector.failure_penalty, selector.cost(0))
+
+    def test_latency_is_averaged(self):
+        selector = LatencyAwareSelector({})
+        selector.mark_request_start(0)
+        selector.mark_request_end(0, 1.0)
+        selector._stats[0][2] -= selector.decay_time
+        selector.mark_request_start(0)
+        selector.mark_request_end(0, 0.0)
+
+        self.assertTrue(0.3 < selector.cost(0) < 0.4)
+
+    def test_pool_reports_requests_to_selector(self):
+        pool = ConnectionPool(
+            [(x, {}) for x in range(10)], selector_class=LatencyAwareSelector
+        )
+        for conn in range(10):
+            pool.mark_request_start(conn)
+            pool.mark_request_end(conn, 0.5 if conn else 0.001)
+
+        connections = [pool.get_connection() for _ in range(100)]
+        self.assertIn(0, connections)
+        self.assertEqual(0, pool.selector._stats[0][1])
+
+    def test_stats_of_removed_connections_are_dropped(self):
+        pool = ConnectionPool(
+            [(x, {}) for x in range(3)], selector_class=LatencyAwareSelector
+        )
+        for conn in range(3):
+            pool.mark_request_start(conn)
+        pool.mark_request_end(0, 0.1)
+
+        pool.set_connections([(x, {}) for x in (1, 2, 3)])
+        self.assertEqual({1, 2}, set(pool.selector._stats))
+
+        # a request still in flight on a removed connection doesn't add it back
+        pool.mark_request_start(1)
+        pool.mark_request_end(0, 0.1)
+        pool.mark_request_end(1, 0.1)
+        self.assertEqual({1, 2}, set(pool.selector._stats))
+
+
+class TestZoneAwareSelector(TestCase):
+    class Selector(ZoneAwareSelector):
+        zone = "a"
+
+    def get_pool(self):
+        return ConnectionPool(
+            [(x, {"attributes": {"zone": "ab"[x % 2]}}) for x in range(6)],
+            selector_class=self.Selector,
+        )
+
+    def test_prefers_local_zone(self):
+        pool = self.get_pool()
+
+        connections = set(pool.get_connection() for _ in range(30))
+        self.assertEqual({0, 2, 4}, connections)
+
+    def test_falls_back_to_other_zones(self):
+        pool = self.get_pool()
+        for conn in (0, 2, 4):
+            pool.mark_dead(conn)
+
+        connections = set(pool.get_connection() for _ in range(30))
+        self.assertEqual({1, 3, 5}, connections)
+
+    def test_zone_passed_with_selector_kwargs(self):
+        pool = ConnectionPool(
+            [(x, {"attributes": {"rack": "ab"[x % 2]}}) for x in range(6)],
+            selector_class=ZoneAwareSelector,
+            selector_kwargs={"zone": "b", "zone_attribute": "rack"},
+        )
+
+        connections = set(pool.get_connection() for _ in range(30))
+        self.assertEqual({1, 3, 5}, connections)
+        self.assertIsNone(ZoneAwareSelector.zone)
+
+    def test_no_zone_configured_uses_all_connections(self):
+        pool = ConnectionPool(
+            [(x, {"attributes": {"zone": "ab"[x % 2]}}) for x in range(6)],
+            selector_class=ZoneAwareSelector,
+        )
+
+        connections = set(pool.get_connection() for _ in range(30))
+        self.assertEqual(set(range(6)), connections)
+
+
+class TestCircuitBreaker(TestCase):
+    class Breaker(CircuitBreaker):
+        window_size = 10
+        min_requests = 4
+        slow_call_duration = 1.0
+        half_open_requests = 2
+
+    def test_opens_on_error_rate(self):
+        breaker = self.Breaker()
+        results = [breaker.record(0.1, failed) for failed in (True, False, True)]
+        self.assertEqual([None] * 3, results)
+        self.assertEqual(CircuitBreaker.OPEN, breaker.record(0.1, False))
+        self.assertFalse(breaker.allow_request())
+
+    def test_opens_on_slow_requests(self):
+        breaker = self.Breaker()
+        for _ in range(3):
+            breaker.record(2.0)
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.state)
+        self.assertEqual(CircuitBreaker.OPEN, breaker.record(2.0))
+
+    def test_stays_closed_when_healthy(self):
+        breaker = self.Breaker()
+        for i in range(50):
+            self.assertIsNone(breaker.record(0.1, failed=i % 5 == 0))
+        self.assertTrue(breaker.allow_request())
+
+    def test_half_open_lets_trial_requests_through(self):
+        breaker = self.Breaker()
+        breaker.half_open()
+        self.assertEqual([True, True, False], [breaker.allow_request() for _ in "abc"])
+
+        self.assertIsNone(breaker.record(0.1))
+        self.assertEqual(CircuitBreaker.CLOSED, breaker.record(0.1))
+        self.assertTrue(breaker.allow_request())
+
+    def test_half_open_reopens_on_failure(self):
+        breaker = self.Breaker()
+        breaker.half_open()
+        self.assertEqual(CircuitBreaker.OPEN, breaker.record(0.1, failed=True))
+
+        breaker.half_open()
+        self.assertEqual(CircuitBreaker.OPEN, breaker.record(2.0))
+
+    def get_pool(self):
+        return ConnectionPool(
+            [(x, {}) for x in range(3)],
+            circuit_breaker_class=self.Breaker,
+            randomize_hosts=False,
+        )
+
+    def test_pool_retires_connection_when_breaker_opens(self):
+        pool = self.get_pool()
+        for _ in range(4):
+            pool.mark_request_end(1, 5.0)
+        self.assertEqual([0, 2], pool.connections)
+        self.assertEqual(1, pool.dead_count[1])
+        self.assertEqual(CircuitBreaker.OPEN, pool.circuit_breakers[1].state)
+
+    def test_pool_limits_requests_to_half_open_connection(self):
+        pool = self.get_pool()
+        for _ in range(4):
+            pool.mark_request_end(1, 0.1, failed=True)
+        self.assertEqual(1, pool.resurrect(force=True))
+        self.assertEqual(CircuitBreaker.HALF_OPEN, pool.circuit_breakers[1].state)
+
+        connections = [pool.get_connection() for _ in range(30)]
+        self.assertEqual(2, connections.count(1))
+
+        # trial requests succeeded
+        pool.mark_request_end(1, 0.1)
+        pool.mark_request_end(1, 0.1)
+        self.assertEqual(CircuitBreaker.CLOSED, pool.circuit_breakers[1].state)
+        connections = [pool.get_connection() for _ in range(30)]
+        self.assertEqual(10, connections.count(1))
+
+    def test_set_connections_keeps_circuit_breakers(self):
+        pool = self.get_pool()
+        breaker = pool.circuit_breakers[1]
+
+        pool.set_connections([(x, {}) for x in (1, 2, 3)])
+        self.assertIs(breaker, pool.circuit_breakers[1])
+        self.assertIsInstance(pool.circuit_breakers[3], self.Breaker)
+        self.assertNotIn(0, pool.circuit_breakers)
@@ -0,0 +1,84 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import pytest
+
+from elasticsearch.hedging import Hedging
+
+
+@pytest.mark.parametrize(
+    ["method", "url", "params", "expected"],
+    [
+        ("GET", "/test/_search", None, True),
+        ("POST", "/_search", {}, True),
+        ("POST", "/test/_count", None, True),
+        ("POST", "/_mget", None, True),
+        ("GET", "/test/_doc/1", None, True),
+        ("HEAD", "/test/_doc/1", None, True),
+        ("GET", "/test/_source/1", None, True),
+        ("POST", "/test/_search", {"scroll": "1m"}, False),
+        ("PUT", "/test/_doc/1", None, False),
+        ("POST", "/test/_update/1", None, False),
+        ("POST", "/test/_delete_by_query", None, False),
+        ("GET", "/_cluster/health", None, False),
+    ],
+)
+def test_is_hedgeable(method, url, params, expected):
+    assert Hedging(delay=0.1).is_hedgeable(method, url, params) == expected
+
+
+def test_requires_delay_or_percentile():
+    with pytest.raises(ValueError):
+        Hedging()
+
+
+def test_hedges_are_capped_by_max_ratio():
+    hedging = Hedging(delay=0.1, max_ratio=0.25)
+    delays = [hedging.get_delay() for _ in range(8)]
+    assert [None, None, None, 0.1, 0.1, 0.1, 0.1, 0.1] == delays
+
+    assert hedging.acquire()
+    assert hedging.acquire()
+    assert not hedging.acquire()
+    assert (8, 2, 1) == (hedging.requests, hedging.hedged, hedging.denied)
+
+
+def test_tokens_are_capped_by_burst():
+    hedging = Hedging(delay=0.1, max_ratio=1)
+    for _ in range(100):
+        hedging.get_delay()
+    assert sum(hedging.acquire() for _ in range(20)) == hedging.burst
+
+
+def test_percentile_delay():
+    hedging = Hedging(delay=1, percentile=90, max_ratio=1, window=100)
+    # fixed delay until enough requests have been observed
+    for i in range(hedging.min_samples - 1):
+        hedging.record(i / 100.0)
+    assert 1 == hedging.get_delay()
+
+    for i in range(hedging.min_samples - 1, 100):
+        hedging.record(i / 100.0)
+    assert 0.89 == hedging.get_delay()
+
+
+def test_percentile_without_fixed_delay():
+    hedging = Hedging(percentile=50, max_ratio=1)
+    assert hedging.get_delay() is None
+    for _ in range(hedging.min_samples):
+        hedging.record(0.5)
+    assert 0.5 == hedging.get_delay()
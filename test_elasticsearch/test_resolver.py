@@ -0,0 +1,133 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import socket
+
+from mock import patch
+
+from elasticsearch.resolver import DNSResolver, get_addresses, is_ip_address
+
+
+def addrinfo(*addresses):
+    return [
+        (
+            socket.AF_INET6 if ":" in address else socket.AF_INET,
+            socket.SOCK_STREAM,
+            6,
+            "",
+            (address, 0),
+        )
+        for address in addresses
+    ]
+
+
+def test_is_ip_address():
+    assert is_ip_address("10.0.0.1")
+    assert is_ip_address("::1")
+    assert not is_ip_address("es.local")
+    assert not is_ip_address("10.0.0")
+
+
+def test_addresses_are_distinct_and_ordered():
+    infos = addrinfo("10.0.0.2", "10.0.0.1", "10.0.0.2", "::1")
+    assert ["10.0.0.2", "10.0.0.1", "::1"] == get_addresses(infos)
+
+
+def test_hostnames_to_resolve():
+    resolver = DNSResolver()
+    hosts = [
+        {"host": "es.local"},
+        {"host": "10.0.0.1"},
+        {"host": "es.local", "port": 9201},
+        {"host": "other.local"},
+        {"host": "localhost", "unix_socket": "/run/es.sock"},
+        {"port": 9200},
+    ]
+    assert ["es.local", "other.local"] == resolver.get_hostnames(hosts)
+
+    resolver.update("es.local", addrinfo("10.0.0.2"))
+    assert ["other.local"] == resolver.get_hostnames(hosts, unknown_only=True)
+
+
+def test_hosts_are_expanded_per_address():
+    resolver = DNSResolver()
+    resolver.update("es.local", addrinfo("10.0.0.1", "10.0.0.2"))
+    hosts = [
+        {"host": "es.local", "port": 9201, "use_ssl": True},
+        {"host": "unknown.local"},
+        {"host": "10.0.0.3"},
+    ]
+
+    assert [
+        {
+            "host": "10.0.0.1",
+            "port": 9201,
+            "use_ssl": True,
+            "server_hostname": "es.local",
+            "headers": {"host": "es.local:9201"},
+        },
+        {
+            "host": "10.0.0.2",
+            "port": 9201,
+            "use_ssl": True,
+            "server_hostname": "es.local",
+            "headers": {"host": "es.local:9201"},
+        },
+        {"host": "unknown.local"},
+        {"host": "10.0.0.3"},
+    ] == resolver.expand(hosts)
+
+
+def test_host_header_is_added_to_the_headers_of_the_host():
+    resolver = DNSResolver()
+    resolver.update("es.local", addrinfo("10.0.0.1"))
+    hosts = [{"host": "es.local", "headers": {"x-custom": "value"}}]
+
+    assert [
+        {
+            "host": "10.0.0.1",
+            "server_hostname": "es.local",
+            "headers": {"host": "es.local", "x-custom": "value"},
+        }
+    ] == resolver.expand(hosts)
+    assert {"x-custom": "value"} == hosts[0]["headers"]
+
+
+@patch("elasticsearch.resolver.socket.getaddrinfo")
+def test_failed_lookup_keeps_previous_addresses(getaddrinfo):
+    resolver = DNSResolver(family=socket.AF_INET)
+    getaddrinfo.return_value = addrinfo("10.0.0.1")
+    assert ["10.0.0.1"] == resolver.resolve("es.local")
+    getaddrinfo.assert_called_once_with(
+        "es.local", None, socket.AF_INET, socket.SOCK_STREAM
+    )
+
+    getaddrinfo.side_effect = socket.gaierror("temporary failure")
+    assert ["10.0.0.1"] == resolver.resolve("es.local")
+    assert [] == resolver.resolve("other.local")
+    assert 3 == resolver.lookups
+    assert 2 == resolver.failures
+    assert [{"host": "other.local"}] == resolver.expand([{"host": "other.local"}])
+
+
+def test_refresh_is_due_once_per_ttl():
+    resolver = DNSResolver(ttl=10)
+    now = resolver._next_refresh
+    assert not resolver.refresh_due(now - 1)
+    assert resolver.refresh_due(now)
+    assert not resolver.refresh_due(now + 1)
+    assert resolver.refresh_due(now + 10)
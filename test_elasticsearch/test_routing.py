@@ -0,0 +1,175 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import pytest
+
+from elasticsearch.routing import (
+    IndexRouting,
+    ShardRouter,
+    get_document_target,
+    murmur3_32,
+    routing_hash,
+)
+
+
+def test_murmur3_32():
+    assert murmur3_32(b"") == 0
+    assert murmur3_32(b"", seed=1) == 0x514E28B7
+    assert murmur3_32(b"\xff\xff\xff\xff") == 0x76293B50
+    assert murmur3_32(b"The quick brown fox jumps over the lazy dog") == 0x2E4FF723
+    # signed like Java's int
+    assert murmur3_32(b"", seed=0xFFFFFFFF) == -2114883783
+
+
+@pytest.mark.parametrize(
+    ["routing", "expected"],
+    [
+        # test vectors of Elasticsearch's Murmur3HashFunctionTests
+        ("hell", 0x5A0CB7C3),
+        ("hello", 0xD7C31989),
+        (b"hello", 0xD7C31989),
+        ("hello w", 0x22AB2984),
+        ("hello wo", 0xDF0CA123),
+        ("hello wor", 0xE7744D61),
+        ("The quick brown fox jumps over the lazy dog", 0xE07DB09C),
+        ("The quick brown fox jumps over the lazy cog", 0x4E63D2AD),
+    ],
+)
+def test_routing_hash(routing, expected):
+    assert routing_hash(routing) & 0xFFFFFFFF == expected
+
+
+def test_shard_id_uses_routing_over_id():
+    index = IndexRouting(5)
+    assert index.shard_id("1", routing="hello") == index.shard_id("hello")
+    assert index.shard_id("hello") == (routing_hash("hello") % 5)
+
+
+def test_shard_id_with_routing_num_shards():
+    # an index split from 2 to 4 shards, hashed over 8 routing shards
+    index = IndexRouting(4, routing_num_shards=8)
+    for doc_id in ("1", "2", "hello", "The quick brown fox"):
+        assert index.shard_id(doc_id) == (routing_hash(doc_id) % 8) // 2
+
+
+def test_shard_id_of_partitioned_index():
+    index = IndexRouting(8, routing_partition_size=3)
+    assert index.shard_id("1") is None
+
+    offset = routing_hash("1") % 3
+    assert index.shard_id("1", routing="user") == (routing_hash("user") + offset) % 8
+
+
+@pytest.mark.parametrize(
+    ["method", "url", "params", "expected"],
+    [
+        ("GET", "/test/_doc/1", None, ("test", "1", None, False)),
+        ("HEAD", "/test/_source/1", {}, ("test", "1", None, False)),
+        ("GET", "/test/_doc/a%2Fb", {"routing": b"r"}, ("test", "a/b", "r", False)),
+        ("PUT", "/test/_doc/1", None, ("test", "1", None, True)),
+        ("PUT", "/test/_create/1", None, ("test", "1", None, True)),
+        ("POST", "/test/_update/1", None, ("test", "1", None, True)),
+        ("DELETE", "/test/_doc/1", None, ("test", "1", None, True)),
+        ("POST", "/test/_doc", None, None),
+        ("DELETE", "/test/_update/1", None, None),
+        ("GET", "/test/_doc/1/_explain", None, None),
+        ("GET", "/_nodes/_all/http", None, None),
+        ("GET", "/test,other/_doc/1", None, None),
+        ("GET", "/test*/_doc/1", None, None),
+    ],
+)
+def test_get_document_target(method, url, params, expected):
+    assert get_document_target(method, url, params) == expected
+
+
+CLUSTER_STATE = {
+    "metadata": {
+        "indices": {
+            "test-1": {
+                "settings": {"index": {"number_of_shards": "2"}},
+                "routing_num_shards": 1024,
+                "aliases": ["test"],
+            },
+            "other-1": {
+                "settings": {"index": {"number_of_shards": "1"}},
+                "aliases": ["other"],
+            },
+            "other-2": {
+                "settings": {"index": {"number_of_shards": "1"}},
+                "aliases": ["other"],
+            },
+        }
+    },
+    "routing_table": {
+        "indices": {
+            "test-1": {
+                "shards": {
+                    "0": [
+                        {"state": "STARTED", "primary": True, "node": "a"},
+                        {"state": "STARTED", "primary": False, "node": "b"},
+                    ],
+                    "1": [
+                        {"state": "STARTED", "primary": True, "node": "b"},
+                        {"state": "INITIALIZING", "primary": False, "node": "c"},
+                    ],
+                }
+            },
+            "other-1": {"shards": {}},
+            "other-2": {"shards": {}},
+        }
+    },
+}
+
+
+class TestShardRouter:
+    def setup_method(self, _):
+        self.router = ShardRouter()
+        self.router.update(
+            ["test", "other", "missing"],
+            CLUSTER_STATE,
+            {"a": ("10.0.0.1", 9200), "b": ("10.0.0.2", 9200)},
+        )
+
+    def test_aliases_are_resolved(self):
+        index = self.router.indices["test"]
+        assert index.number_of_shards == 2
+        assert index.routing_factor == 512
+        # only active copies are kept
+        assert index.get_node_ids(1) == ["b"]
+        assert index.get_node_ids(0) == ["a", "b"]
+        assert index.get_node_ids(0, primary=True) == ["a"]
+
+    def test_unroutable_names_are_remembered(self):
+        assert self.router.indices["other"] is None
+        assert self.router.indices["missing"] is None
+        assert not self.router.request_index("missing")
+        assert self.router.get_node_addresses("other", "1") is None
+
+    def test_get_node_addresses(self):
+        shard = self.router.indices["test"].shard_id("1")
+        primary = ("10.0.0.1", 9200) if shard == 0 else ("10.0.0.2", 9200)
+        assert self.router.get_node_addresses("test", "1", write=True) == [primary]
+        assert primary in self.router.get_node_addresses("test", "1")
+
+    def test_pending_names(self):
+        assert self.router.request_index("new")
+        assert not self.router.request_index("new")
+        assert self.router.names() == ["missing", "new", "other", "test"]
+
+        self.router.update(["new"], {}, {})
+        assert self.router.pending == set()
+        assert self.router.indices == {"new": None}
@@ -0,0 +1,148 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import threading
+
+import pytest
+
+from elasticsearch.singleflight import SingleFlight
+
+
+def get_key(single_flight, method, url, params=None, body=None):
+    return single_flight.get_key(method, url, {}, params or {}, body, (), None)
+
+
+def test_only_reads_are_coalesced():
+    single_flight = SingleFlight()
+    assert get_key(single_flight, "POST", "/i/_search", body=b"{}") is not None
+    assert get_key(single_flight, "GET", "/i/_count") is not None
+    assert get_key(single_flight, "POST", "/_msearch", body=b"{}") is not None
+    assert get_key(single_flight, "GET", "/i/_doc/1") is not None
+    assert get_key(single_flight, "HEAD", "/i/_doc/1") is not None
+
+    assert get_key(single_flight, "PUT", "/i/_doc/1", body=b"{}") is None
+    assert get_key(single_flight, "POST", "/i/_doc", body=b"{}") is None
+    assert get_key(single_flight, "GET", "/_cluster/health") is None
+    assert get_key(single_flight, "POST", "/i/_search", {"scroll": "1m"}) is None
+
+
+def test_key_covers_the_whole_request():
+    single_flight = SingleFlight()
+    key = get_key(single_flight, "POST", "/i/_search", {"size": "1"}, b"{}")
+    assert key == get_key(single_flight, "POST", "/i/_search", {"size": "1"}, b"{}")
+    assert key != get_key(single_flight, "POST", "/i/_search", {"size": "2"}, b"{}")
+    assert key != get_key(single_flight, "POST", "/i/_search", {"size": "1"}, b"[]")
+    assert key != get_key(single_flight, "POST", "/j/_search", {"size": "1"}, b"{}")
+    assert key != single_flight.get_key(
+        "POST", "/i/_search", {"Authorization": "x"}, {"size": "1"}, b"{}", (), None
+    )
+
+
+def test_unhashable_params_arent_coalesced():
+    assert get_key(SingleFlight(), "GET", "/i/_search", {"a": ["b"]}) is None
+
+
+def run_concurrently(single_flight, func, count):
+    results, errors = [], []
+    started = threading.Event()
+
+    def call(func):
+        try:
+            results.append(single_flight.do("key", func))
+        except Exception as e:
+            errors.append(e)
+
+    def leader_func():
+        started.set()
+        return func()
+
+    threads = [threading.Thread(target=call, args=(func,)) for _ in range(count - 1)]
+    leader = threading.Thread(target=call, args=(leader_func,))
+    leader.start()
+    started.wait()
+    for thread in threads:
+        thread.start()
+    # give the followers the time to join the call in flight
+    while single_flight.stats()["coalesced"] < count - 1:
+        pass
+    return leader, threads, results, errors
+
+
+def test_concurrent_calls_are_coalesced():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait()
+        return {"hits": []}
+
+    leader, threads, results, errors = run_concurrently(single_flight, func, 3)
+    release.set()
+    for thread in [leader] + threads:
+        thread.join()
+
+    assert 1 == len(calls)
+    assert [] == errors
+    assert [{"hits": []}] * 3 == results
+    # every caller got its own copy
+    assert 3 == len(set(map(id, results)))
+    assert {"requests": 3, "coalesced": 2, "in_flight": 0} == single_flight.stats()
+
+
+def test_results_can_be_shared_without_copies():
+    single_flight = SingleFlight(copy_results=False)
+    release = threading.Event()
+
+    def func():
+        release.wait()
+        return {"hits": []}
+
+    leader, threads, results, _ = run_concurrently(single_flight, func, 2)
+    release.set()
+    for thread in [leader] + threads:
+        thread.join()
+
+    assert results[0] is results[1]
+
+
+def test_errors_are_raised_in_every_caller():
+    single_flight = SingleFlight()
+    release = threading.Event()
+    error = ValueError("boom")
+
+    def func():
+        release.wait()
+        raise error
+
+    leader, threads, _, errors = run_concurrently(single_flight, func, 3)
+    release.set()
+    for thread in [leader] + threads:
+        thread.join()
+    assert [error] * 3 == errors
+
+    with pytest.raises(ValueError):
+        single_flight.do("key", func)
+
+
+def test_sequential_calls_arent_coalesced():
+    single_flight = SingleFlight()
+    result = {}
+    assert single_flight.do("key", lambda: result) is result
+    assert single_flight.do("key", lambda: result) is result
+    assert {"requests": 2, "coalesced": 0, "in_flight": 0} == single_flight.stats()
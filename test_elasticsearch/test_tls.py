@@ -0,0 +1,205 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+import os
+import ssl
+import sys
+import threading
+
+import pytest
+
+from elasticsearch.connection import (
+    StdlibHttpConnection,
+    Urllib3HttpConnection,
+    create_ssl_context,
+)
+from elasticsearch.connection.tls import _HAS_SESSIONS, create_client_ssl_context
+from elasticsearch.exceptions import ImproperlyConfigured
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+CERTS_DIR = os.path.join(os.path.dirname(__file__), "..", ".ci", "certs")
+CA_CERT = os.path.join(CERTS_DIR, "ca.crt")
+NODE_CERT = os.path.join(CERTS_DIR, "testnode.crt")
+NODE_KEY = os.path.join(CERTS_DIR, "testnode.key")
+
+requires_certs = pytest.mark.skipif(
+    not os.path.isfile(NODE_CERT), reason="the test certificates are missing"
+)
+requires_sessions = pytest.mark.skipif(
+    not _HAS_SESSIONS, reason="TLS session resumption requires Python 3.6+"
+)
+
+
+class _ClosingHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("content-length", "2")
+        # every request needs a new connection (and TLS handshake)
+        self.send_header("connection", "close")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+class _TLSServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), _ClosingHandler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(NODE_CERT, NODE_KEY)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+@pytest.fixture
+def tls_server():
+    server = _TLSServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _record_resumed(ctx):
+    resumed = []
+    wrap_socket = ctx.wrap_socket
+
+    def wrap_and_record(*args, **kwargs):
+        sock = wrap_socket(*args, **kwargs)
+        resumed.append(sock.session_reused)
+        return sock
+
+    ctx.wrap_socket = wrap_and_record
+    return resumed
+
+
+def test_create_ssl_context_returns_a_default_context():
+    ctx = create_ssl_context()
+    assert type(ctx) is ssl.SSLContext
+    assert ssl.CERT_REQUIRED == ctx.verify_mode
+    assert ctx.check_hostname
+
+
+@requires_sessions
+def test_client_context_verifies_certificates():
+    ctx = create_client_ssl_context()
+    assert type(ctx).__name__ == "SessionResumingSSLContext"
+    assert ssl.CERT_REQUIRED == ctx.verify_mode
+    assert ctx.check_hostname
+
+
+def test_client_context_without_verification():
+    ctx = create_client_ssl_context(verify_certs=False)
+    assert ssl.CERT_NONE == ctx.verify_mode
+    assert not ctx.check_hostname
+
+
+def test_ca_certs_with_verification_off_raises():
+    with pytest.raises(ImproperlyConfigured):
+        create_client_ssl_context(verify_certs=False, ca_certs=CA_CERT)
+
+
+def test_ca_certs_not_a_path_raises():
+    with pytest.raises(ImproperlyConfigured):
+        create_client_ssl_context(ca_certs="/path/to/nowhere")
+
+
+@requires_certs
+def test_ca_certs_and_client_cert_are_loaded():
+    default_cas = create_client_ssl_context().cert_store_stats()["x509_ca"]
+    ctx = create_client_ssl_context(
+        ca_certs=CA_CERT, client_cert=NODE_CERT, client_key=NODE_KEY
+    )
+    assert default_cas + 1 == ctx.cert_store_stats()["x509_ca"]
+
+    # directories are looked up lazily
+    ctx = create_client_ssl_context(ca_certs=CERTS_DIR)
+    assert ssl.CERT_REQUIRED == ctx.verify_mode
+
+
+@requires_certs
+@requires_sessions
+@pytest.mark.parametrize(
+    "connection_class", [Urllib3HttpConnection, StdlibHttpConnection]
+)
+def test_tls_sessions_are_resumed(tls_server, connection_class):
+    ctx = create_client_ssl_context(verify_certs=False)
+    resumed = _record_resumed(ctx)
+    con = connection_class(
+        "127.0.0.1", tls_server.server_port, use_ssl=True, ssl_context=ctx
+    )
+    for _ in range(3):
+        assert 200 == con.perform_request("GET", "/")[0]
+    con.close()
+
+    assert [False, True, True] == resumed
+
+
+@requires_certs
+@pytest.mark.skipif(
+    sys.version_info < (3, 7) or not getattr(ssl, "HAS_TLSv1_3", False),
+    reason="sockets closing save their session from Python 3.7 (sslsocket_class)",
+)
+def test_session_ticket_is_saved_when_the_socket_is_closed(tls_server):
+    ctx = create_client_ssl_context(verify_certs=False)
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_3
+    con = StdlibHttpConnection(
+        "127.0.0.1", tls_server.server_port, use_ssl=True, ssl_context=ctx
+    )
+    con.perform_request("GET", "/")
+    con.close()
+
+    ((session, ref),) = ctx._sessions.values()
+    # the ticket was received after the handshake, from a closed socket
+    assert ref() is None or ref().session is None
+    assert session.has_ticket
+
+
+@requires_certs
+@requires_sessions
+def test_sessions_are_not_shared_between_servers(tls_server):
+    ctx = create_client_ssl_context(verify_certs=False)
+    resumed = _record_resumed(ctx)
+    other_server = _TLSServer()
+    thread = threading.Thread(target=other_server.serve_forever, args=(0.01,))
+    thread.daemon = True
+    thread.start()
+    try:
+        for port in (tls_server.server_port, other_server.server_port):
+            con = StdlibHttpConnection("127.0.0.1", port, use_ssl=True, ssl_context=ctx)
+            con.perform_request("GET", "/")
+            con.close()
+    finally:
+        other_server.shutdown()
+        other_server.server_close()
+
+    assert [False, False] == resumed
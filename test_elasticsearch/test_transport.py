@@ -18,18 +18,84 @@
 
 from __future__ import unicode_literals
 
+import io
 import json
+import socket
+import ssl
+import threading
 import time
+import warnings
 
 import pytest
-from mock import patch
-
-from elasticsearch.connection import Connection
-from elasticsearch.connection_pool import DummyConnectionPool
-from elasticsearch.exceptions import ConnectionError, TransportError
+from mock import ANY, patch
+from urllib3._collections import HTTPHeaderDict
+
+from elasticsearch import HttpxHttpConnection
+from elasticsearch.budget import RetryBudget
+from elasticsearch.connection import (
+    Connection,
+    RawResponse,
+    RequestsHttpConnection,
+    Urllib3HttpConnection,
+)
+from elasticsearch.connection_pool import (
+    CircuitBreaker,
+    DummyConnectionPool,
+    ZoneAwareSelector,
+)
+from elasticsearch.exceptions import (
+    ConnectionError,
+    ImproperlyConfigured,
+    PoolTimeout,
+    TransportError,
+)
+from elasticsearch.resolver import DNSResolver
+from elasticsearch.singleflight import SingleFlight
 from elasticsearch.transport import Transport, get_host_info
 
-from .test_cases import TestCase
+from .test_cases import SkipTest, TestCase
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+class _SlowHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", "11")
+        self.end_headers()
+        self.wfile.write(b'{"ok":true}')
+
+    def log_message(self, *args):
+        pass
+
+
+class _SlowServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, delay):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), _SlowHandler)
+        self.delay = delay
+
+
+def _addrinfo(*addresses):
+    return [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 0))
+        for address in addresses
+    ]
 
 
 class DummyConnection(Connection):
@@ -37,15 +103,42 @@ class DummyConnection(Connection):
         self.exception = kwargs.pop("exception", None)
         self.status, self.data = kwargs.pop("status", 200), kwargs.pop("data", "{}")
         self.headers = kwargs.pop("headers", {})
+        self.delay = kwargs.pop("delay", 0)
         self.calls = []
+        self.warm_ups = []
+        self.closed = False
         super(DummyConnection, self).__init__(**kwargs)
 
+    def warm_up(self, count=1):
+        self.warm_ups.append(count)
+        if self.exception:
+            raise self.exception
+        return count
+
     def perform_request(self, *args, **kwargs):
         self.calls.append((args, kwargs))
+        if self.delay:
+            time.sleep(self.delay)
         if self.exception:
             raise self.exception
         return self.status, self.headers, self.data
 
+    def close(self):
+        self.closed = True
+
+
+class BodyReadingConnection(DummyConnection):
+    """Consumes a streamed body as it's sent and records the bytes read."""
+
+    def perform_request(self, method, url, params=None, body=None, **kwargs):
+        if hasattr(body, "read"):
+            body = body.read()
+        elif body is not None and not isinstance(body, bytes):
+            body = b"".join(body)
+        return super(BodyReadingConnection, self).perform_request(
+            method, url, params, body, **kwargs
+        )
+
 
 CLUSTER_NODES = """{
   "_nodes" : {
@@ -133,6 +226,138 @@ class TestTransport(TestCase):
             t.get_connection().calls[0][1],
         )
 
+    def test_request_priority_extracted_from_params_and_passed(self):
+        t = Transport([{}], meta_header=False, connection_class=DummyConnection)
+
+        t.perform_request("GET", "/", params={"request_priority": "background"})
+        self.assertEqual(("GET", "/", {}, None), t.get_connection().calls[0][0])
+        self.assertEqual(
+            {"timeout": None, "ignore": (), "headers": None, "priority": "background"},
+            t.get_connection().calls[0][1],
+        )
+
+    def test_pool_timeout_is_not_retried_nor_a_node_failure(self):
+        t = Transport(
+            [{"exception": PoolTimeout("POOL_TIMEOUT", "no free connection")}, {}],
+            connection_class=DummyConnection,
+            retry_on_timeout=True,
+            randomize_hosts=False,
+        )
+        conn = t.connection_pool.connections[0]
+
+        with patch.object(t.connection_pool, "mark_request_end") as end:
+            self.assertRaises(PoolTimeout, t.perform_request, "GET", "/")
+        self.assertEqual(1, len(conn.calls))
+        self.assertEqual([], t.connection_pool.connections[1].calls)
+        self.assertEqual(False, end.call_args[0][2])
+        self.assertIn(conn, t.connection_pool.connections)
+
+    def test_errors_other_than_transport_errors_are_not_node_failures(self):
+        t = Transport(
+            [{"exception": TypeError("unexpected argument")}],
+            connection_class=DummyConnection,
+        )
+        conn = t.get_connection()
+
+        with patch.object(t.connection_pool, "mark_request_end") as end:
+            self.assertRaises(TypeError, t.perform_request, "GET", "/")
+        self.assertEqual(False, end.call_args[0][2])
+        self.assertIn(conn, t.connection_pool.connections)
+
+    def test_streamed_body_is_passed_as_is(self):
+        t = Transport(
+            [{}],
+            meta_header=False,
+            connection_class=DummyConnection,
+            send_get_body_as="source",
+        )
+        chunks = (chunk for chunk in [b"{}\n", b"{}\n"])
+
+        t.perform_request("GET", "/_msearch", body=chunks)
+        self.assertEqual(
+            ("POST", "/_msearch", None, chunks), t.get_connection().calls[0][0]
+        )
+
+    def _failing_over_transport(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}, {}],
+            meta_header=False,
+            connection_class=BodyReadingConnection,
+            randomize_hosts=False,
+        )
+        return t, t.connection_pool.connections
+
+    def test_seekable_streamed_body_is_rewound_before_retry(self):
+        t, (failing, live) = self._failing_over_transport()
+        body = io.BytesIO(b"skipped{}\n")
+        body.seek(7)
+
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[failing, live]
+        ):
+            t.perform_request("POST", "/_bulk", body=body)
+        self.assertEqual(b"{}\n", failing.calls[0][0][3])
+        self.assertEqual(b"{}\n", live.calls[0][0][3])
+
+    def test_streamed_iterator_is_not_retried(self):
+        t, (failing, live) = self._failing_over_transport()
+        chunks = (chunk for chunk in [b"{}\n", b"{}\n"])
+
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[failing, live]
+        ):
+            self.assertRaises(
+                ConnectionError, t.perform_request, "POST", "/_bulk", body=chunks
+            )
+        self.assertEqual(b"{}\n{}\n", failing.calls[0][0][3])
+        self.assertEqual([], live.calls)
+        # the node failed all the same
+        self.assertEqual([live], t.connection_pool.connections)
+
+    def test_streamed_body_is_not_hedged(self):
+        t = Transport(
+            [{"delay": 0.1}, {}],
+            connection_class=BodyReadingConnection,
+            hedge_delay=0.01,
+            hedge_max_ratio=1,
+            randomize_hosts=False,
+        )
+        t.perform_request("POST", "/_search", body=io.BytesIO(b"{}"))
+        self.assertEqual(1, sum(len(c.calls) for c in t.connection_pool.connections))
+        self.assertEqual(0, t.hedging.requests)
+
+    def test_streamed_request_ends_when_the_body_is_released(self):
+        t = Transport([{}], meta_header=False, connection_class=DummyConnection)
+        released = []
+        raw = RawResponse(200, {}, lambda amt: b"", lambda: released.append(1))
+        t.get_connection().data = raw
+
+        with patch.object(t.connection_pool, "mark_request_end") as end:
+            t.perform_request("GET", "/", params={"request_stream": True})
+            self.assertFalse(end.called)
+            raw.close()
+        self.assertEqual([1], released)
+        end.assert_called_once_with(t.get_connection(), ANY, False)
+
+    def test_request_stream_returns_the_response_as_is(self):
+        t = Transport([{}], meta_header=False, connection_class=DummyConnection)
+        raw = object()
+        t.get_connection().data = raw
+
+        self.assertIs(
+            raw, t.perform_request("GET", "/", params={"request_stream": True})
+        )
+        self.assertEqual(("GET", "/", {}, None), t.get_connection().calls[0][0])
+        self.assertEqual(
+            {"timeout": None, "ignore": (), "headers": None, "stream": True},
+            t.get_connection().calls[0][1],
+        )
+
+        # HEAD requests only return whether the document exists
+        t.get_connection().data = ""
+        self.assertTrue(t.perform_request("HEAD", "/", params={"request_stream": True}))
+        self.assertNotIn("stream", t.get_connection().calls[1][1])
+
     def test_opaque_id(self):
         t = Transport(
             [{}], opaque_id="app-1", meta_header=False, connection_class=DummyConnection
@@ -296,6 +521,127 @@ class TestTransport(TestCase):
         self.assertRaises(ConnectionError, t.perform_request, "GET", "/")
         self.assertEqual(0, len(t.connection_pool.connections))
 
+    def test_retries_are_limited_by_retry_budget(self):
+        budget = RetryBudget(ratio=0.5, burst=1)
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}] * 2,
+            connection_class=DummyConnection,
+            retry_budget=budget,
+        )
+
+        self.assertRaises(ConnectionError, t.perform_request, "GET", "/")
+        self.assertRaises(ConnectionError, t.perform_request, "GET", "/")
+        calls = sum(len(c.calls) for c, _ in t.connection_pool.connection_opts)
+        self.assertEqual(3, calls)
+        self.assertEqual(
+            {"requests": 2, "retries": 1, "denied": 2, "tokens": 0.5}, budget.stats()
+        )
+
+    def test_retry_budget_ratio(self):
+        t = Transport([{}], connection_class=DummyConnection, retry_budget=0.2)
+        self.assertEqual(0.2, t.retry_budget.ratio)
+        self.assertIsNone(Transport([{}]).retry_budget)
+
+    def test_identical_concurrent_reads_are_coalesced(self):
+        t = Transport(
+            [{"delay": 0.2, "data": '{"hits": {"total": 1}}'}],
+            connection_class=DummyConnection,
+            single_flight=True,
+        )
+        results = []
+
+        def search():
+            results.append(t.perform_request("POST", "/i/_search", body={"query": {}}))
+
+        threads = [threading.Thread(target=search) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(t.get_connection().calls))
+        self.assertEqual([{"hits": {"total": 1}}] * 3, results)
+        self.assertEqual(3, len(set(map(id, results))))
+        self.assertEqual(2, t.single_flight.coalesced)
+
+    def test_writes_are_not_coalesced(self):
+        single_flight = SingleFlight()
+        t = Transport(
+            [{"delay": 0.2}],
+            connection_class=DummyConnection,
+            single_flight=single_flight,
+        )
+
+        threads = [
+            threading.Thread(
+                target=t.perform_request, args=("PUT", "/i/_doc/1"), kwargs={"body": {}}
+            )
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(single_flight, t.single_flight)
+        self.assertEqual(2, len(t.get_connection().calls))
+        self.assertEqual(0, single_flight.requests)
+
+    def test_total_timeout_caps_the_request_timeout(self):
+        t = Transport([{}], connection_class=DummyConnection)
+
+        t.perform_request("GET", "/", params={"total_timeout": 0.5})
+        t.perform_request(
+            "GET", "/", params={"total_timeout": 0.5, "request_timeout": 0.1}
+        )
+        t.perform_request(
+            "GET", "/", params={"total_timeout": 20, "request_timeout": 15}
+        )
+        t.perform_request("GET", "/", params={"total_timeout": 20})
+
+        timeouts = [kwargs["timeout"] for _, kwargs in t.get_connection().calls]
+        self.assertTrue(0.4 < timeouts[0] <= 0.5)
+        self.assertEqual([0.1, 15, 10], timeouts[1:])
+
+    def test_retries_stop_once_total_timeout_is_over(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship"), "delay": 0.1}] * 4,
+            connection_class=DummyConnection,
+            max_retries=3,
+        )
+
+        self.assertRaises(
+            ConnectionError,
+            t.perform_request,
+            "GET",
+            "/",
+            params={"total_timeout": 0.15},
+        )
+        calls = [c.calls for c, _ in t.connection_pool.connection_opts]
+        self.assertEqual(2, sum(map(len, calls)))
+        timeouts = sorted(kwargs["timeout"] for c in calls for _, kwargs in c)
+        self.assertTrue(0 < timeouts[0] <= 0.05)
+
+    def test_total_timeout_ignores_wall_clock_jumps(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship"), "delay": 0.1}] * 4,
+            connection_class=DummyConnection,
+            max_retries=3,
+        )
+        clock = iter(range(0, -1000, -100))
+
+        # the wall clock going back doesn't extend the deadline
+        with patch("elasticsearch.transport.time.time", lambda: next(clock)):
+            self.assertRaises(
+                ConnectionError,
+                t.perform_request,
+                "GET",
+                "/",
+                params={"total_timeout": 0.15},
+            )
+        calls = [c.calls for c, _ in t.connection_pool.connection_opts]
+        self.assertEqual(2, sum(map(len, calls)))
+
     def test_resurrected_connection_will_be_marked_as_live_on_success(self):
         for method in ("GET", "HEAD"):
             t = Transport([{}, {}], connection_class=DummyConnection)
@@ -308,6 +654,224 @@ class TestTransport(TestCase):
             self.assertEqual(1, len(t.connection_pool.connections))
             self.assertEqual(1, len(t.connection_pool.dead_count))
 
+    def test_request_durations_are_reported_to_connection_pool(self):
+        t = Transport(
+            [{}, {"exception": TransportError(503, "unavailable")}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+            max_retries=0,
+        )
+        ok, failing = t.connection_pool.connections
+        with patch.object(t.connection_pool, "mark_request_end") as mark_request_end:
+            t.perform_request("GET", "/")
+            self.assertRaises(TransportError, t.perform_request, "GET", "/")
+
+        self.assertEqual(2, mark_request_end.call_count)
+        (conn, _, failed), _ = mark_request_end.call_args_list[0]
+        self.assertIs(ok, conn)
+        self.assertFalse(failed)
+        (conn, _, failed), _ = mark_request_end.call_args_list[1]
+        self.assertIs(failing, conn)
+        self.assertTrue(failed)
+
+    def test_dead_connection_is_resurrected_after_health_check(self):
+        t = Transport(
+            [{}, {}],
+            connection_class=DummyConnection,
+            health_check=True,
+            dead_timeout=0,
+        )
+        conn = t.connection_pool.connections[0]
+        t.mark_dead(conn)
+
+        for _ in range(100):
+            if conn in t.connection_pool.connections:
+                break
+            time.sleep(0.01)
+        t.close()
+
+        self.assertIn(conn, t.connection_pool.connections)
+        self.assertNotIn(conn, t.connection_pool.dead_count)
+        self.assertEqual((("HEAD", "/"), {"timeout": 1}), conn.calls[-1])
+
+    def test_circuit_breaker_trip_starts_health_checks(self):
+        class Breaker(CircuitBreaker):
+            window_size = min_requests = 2
+            slow_call_duration = 0.01
+
+        t = Transport(
+            [{"delay": 0.02}, {}],
+            connection_class=DummyConnection,
+            health_check=True,
+            dead_timeout=0,
+            circuit_breaker_class=Breaker,
+            randomize_hosts=False,
+        )
+        slow = t.connection_pool.connections[0]
+        with patch.object(t.connection_pool, "get_connection", return_value=slow):
+            t.perform_request("GET", "/")
+            self.assertIsNone(t._health_check_thread)
+            t.perform_request("GET", "/")
+        self.assertNotIn(slow, t.connection_pool.connections)
+        self.assertIsNotNone(t._health_check_thread)
+
+        for _ in range(100):
+            if slow in t.connection_pool.connections:
+                break
+            time.sleep(0.01)
+        t.close()
+
+        self.assertIn(slow, t.connection_pool.connections)
+        self.assertEqual((("HEAD", "/"), {"timeout": 1}), slow.calls[-1])
+
+    def test_failing_health_check_keeps_connection_dead(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}, {}],
+            connection_class=DummyConnection,
+            health_check=True,
+            dead_timeout=0.01,
+            randomize_hosts=False,
+        )
+        conn = t.connection_pool.connections[0]
+        t.mark_dead(conn)
+
+        for _ in range(100):
+            if t.connection_pool.dead_count[conn] > 2:
+                break
+            time.sleep(0.01)
+        t.close()
+
+        self.assertNotIn(conn, t.connection_pool.connections)
+        self.assertGreater(t.connection_pool.dead_count[conn], 2)
+        self.assertTrue(all(args == ("HEAD", "/") for args, _ in conn.calls))
+
+    def test_slow_read_is_hedged(self):
+        t = Transport(
+            [{"delay": 1, "data": '{"node": 1}'}, {"data": '{"node": 2}'}],
+            connection_class=DummyConnection,
+            hedge_delay=0.05,
+            hedge_max_ratio=1,
+            randomize_hosts=False,
+        )
+        slow, fast = t.connection_pool.connections
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[slow, fast]
+        ):
+            start = time.time()
+            self.assertEqual({"node": 2}, t.perform_request("POST", "/_search"))
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(1, len(slow.calls))
+        self.assertEqual((1, 1), (t.hedging.hedged, t.hedging.wins))
+
+    def test_hedge_is_sent_after_node_failure_of_slow_read(self):
+        t = Transport(
+            [
+                {"delay": 0.1, "exception": ConnectionError("abandon ship")},
+                {"delay": 0.2, "data": '{"node": 2}'},
+            ],
+            connection_class=DummyConnection,
+            hedge_delay=0.05,
+            hedge_max_ratio=1,
+            randomize_hosts=False,
+        )
+        failing, slow = t.connection_pool.connections
+        with patch.object(
+            t.connection_pool, "get_connection", side_effect=[failing, slow]
+        ):
+            self.assertEqual({"node": 2}, t.perform_request("GET", "/i/_doc/1"))
+        self.assertEqual([slow], t.connection_pool.connections)
+        self.assertEqual((1, 1), (t.hedging.hedged, t.hedging.wins))
+
+    def test_writes_are_not_hedged(self):
+        t = Transport(
+            [{"delay": 0.1}, {}],
+            connection_class=DummyConnection,
+            hedge_delay=0.01,
+            hedge_max_ratio=1,
+            randomize_hosts=False,
+        )
+        t.perform_request("PUT", "/i/_doc/1", body={})
+        self.assertEqual(1, sum(len(c.calls) for c in t.connection_pool.connections))
+        self.assertEqual(0, t.hedging.requests)
+
+    def _routing_state(self):
+        # a single shard index, primary on node "c" and replica on node "b"
+        return {
+            "nodes": dict(
+                (name, {"http": {"publish_address": "10.0.0.%d:9200" % i}})
+                for i, name in enumerate("abc", 1)
+            ),
+            "metadata": {
+                "indices": {"test": {"settings": {"index": {"number_of_shards": "1"}}}}
+            },
+            "routing_table": {
+                "indices": {
+                    "test": {
+                        "shards": {
+                            "0": [
+                                {"state": "STARTED", "primary": True, "node": "c"},
+                                {"state": "STARTED", "primary": False, "node": "b"},
+                            ]
+                        }
+                    }
+                }
+            },
+        }
+
+    @patch("elasticsearch.transport.Transport._start_routing_refresh")
+    def test_shard_aware_routing(self, start_routing_refresh):
+        t = Transport(
+            [{"host": "10.0.0.%d" % i, "port": 9200} for i in (1, 2, 3)],
+            connection_class=DummyConnection,
+            shard_aware_routing=True,
+            randomize_hosts=False,
+            data=json.dumps(self._routing_state()),
+        )
+        a, b, c = t.connection_pool.connections
+
+        # unknown index, not routed until the routing table is refreshed
+        t.perform_request("DELETE", "/test/_doc/1", params={})
+        start_routing_refresh.assert_called_once_with()
+        self.assertEqual(["test"], t.shard_router.names())
+
+        t.refresh_shard_routing()
+        for conn in (a, b, c):
+            conn.calls = []
+
+        for _ in range(3):
+            t.perform_request("DELETE", "/test/_doc/1", params={})
+        self.assertEqual(3, len(c.calls))
+
+        for _ in range(4):
+            t.perform_request("GET", "/test/_doc/1", params={})
+        self.assertEqual([], a.calls)
+        self.assertEqual(2, len(b.calls))
+        self.assertEqual({"preference": "_local"}, b.calls[0][0][2])
+
+        # other requests aren't routed
+        t.perform_request("GET", "/", params={})
+        self.assertEqual(8, sum(len(conn.calls) for conn in (a, b, c)))
+        self.assertEqual(1, start_routing_refresh.call_count)
+
+    def test_shard_aware_routing_skips_dead_nodes(self):
+        t = Transport(
+            [{"host": "10.0.0.%d" % i, "port": 9200} for i in (1, 2, 3)],
+            connection_class=DummyConnection,
+            shard_aware_routing=True,
+            randomize_hosts=False,
+            data=json.dumps(self._routing_state()),
+        )
+        t.shard_router.request_index("test")
+        t.refresh_shard_routing()
+        a, b, c = t.connection_pool.connections
+        t.mark_dead(c)
+        for conn in (a, b, c):
+            conn.calls = []
+
+        t.perform_request("PUT", "/test/_doc/1", params={}, body={})
+        self.assertEqual([], c.calls)
+        self.assertEqual(1, len(a.calls) + len(b.calls))
+
     def test_sniff_will_use_seed_connections(self):
         t = Transport([{"data": CLUSTER_NODES}], connection_class=DummyConnection)
         t.set_connections([{"data": "invalid"}])
@@ -361,6 +925,128 @@ class TestTransport(TestCase):
         self.assertEqual(1, len(t.connection_pool.connections))
         self.assertIs(connection, t.get_connection())
 
+    def test_set_connections_updates_pool_in_place(self):
+        t = Transport(
+            [{"host": "a"}, {"host": "b"}, {"host": "c"}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+        )
+        pool = t.connection_pool
+        a, b, c = pool.connections
+        pool.mark_dead(b)
+
+        t.set_connections([{"host": "b"}, {"host": "c"}, {"host": "d"}])
+
+        self.assertIs(pool, t.connection_pool)
+        self.assertEqual(1, pool.dead_count[b])
+        self.assertEqual([c], pool.connections[:1])
+        self.assertEqual("http://d:9200", pool.connections[1].host)
+        # seed connections are kept around for sniffing
+        self.assertFalse(a.closed)
+
+    def test_set_connections_closes_removed_connections(self):
+        t = Transport(
+            [{"host": "a"}, {"host": "b"}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+        )
+        t.set_connections([{"host": "c"}, {"host": "d"}])
+        c, d = t.connection_pool.connections
+
+        t.set_connections([{"host": "c", "attributes": {"zone": "z"}}, {"host": "d"}])
+        self.assertTrue(c.closed)
+        self.assertFalse(d.closed)
+        self.assertIs(d, t.connection_pool.connections[0])
+        self.assertEqual(2, len(t.connection_pool.connections))
+
+    def test_removed_connection_is_closed_once_its_requests_are_done(self):
+        t = Transport(
+            [{"host": "a"}, {"host": "b", "delay": 0.3}],
+            connection_class=DummyConnection,
+            randomize_hosts=False,
+        )
+        t.set_connections([{"host": "c"}, {"host": "d", "delay": 0.3}])
+        c, d = t.connection_pool.connections
+        thread = threading.Thread(
+            target=t._perform_on_connection,
+            args=(d, "GET", "/", None, None, None, (), None),
+        )
+        thread.start()
+        time.sleep(0.1)
+
+        t.set_connections([{"host": "c"}, {"host": "e"}])
+        self.assertFalse(d.closed)
+        self.assertEqual({d}, t._draining)
+        thread.join()
+        self.assertTrue(d.closed)
+        self.assertEqual({}, t._in_flight)
+        self.assertEqual(set(), t._draining)
+
+    def _remove_node_while_request_in_flight(self, **kwargs):
+        if httpx is None:
+            raise SkipTest("httpx isn't installed")
+        server = _SlowServer(delay=0.5)
+        thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        port = server.server_address[1]
+        t = Transport(
+            [{"host": "127.0.0.1", "port": port}],
+            connection_class=HttpxHttpConnection,
+            **kwargs
+        )
+        self.addCleanup(t.close)
+        t.set_connections(
+            [
+                {"host": "127.0.0.1", "port": port, "url_prefix": "/a"},
+                {"host": "127.0.0.1", "port": port, "url_prefix": "/b"},
+            ]
+        )
+        connection = t.connection_pool.connections[0]
+        results = []
+        request = threading.Thread(
+            target=lambda: results.append(
+                t._perform_on_connection(
+                    connection, "GET", "/", None, None, None, (), None
+                )
+            )
+        )
+        request.start()
+        time.sleep(0.1)
+
+        t.set_connections([{"host": "127.0.0.1", "port": port, "url_prefix": "/c"}])
+        request.join()
+        self.assertEqual(200, results[0][0])
+        self.assertEqual({"ok": True}, json.loads(results[0][2]))
+        self.assertEqual({}, t._in_flight)
+
+    def test_removing_a_node_lets_its_http2_requests_finish(self):
+        self._remove_node_while_request_in_flight()
+
+    def test_removing_a_node_lets_its_http1_requests_finish(self):
+        self._remove_node_while_request_in_flight(http2=False)
+
+    def test_host_attributes_are_not_passed_to_connections(self):
+        class RecordingConnection(DummyConnection):
+            def __init__(self, **kwargs):
+                self.kwargs = kwargs
+                super(RecordingConnection, self).__init__(**kwargs)
+
+        t = Transport(
+            [{"host": "a", "attributes": {"zone": "z"}}, {"host": "b"}],
+            connection_class=RecordingConnection,
+            selector_class=ZoneAwareSelector,
+            selector_kwargs={"zone": "z"},
+            randomize_hosts=False,
+        )
+        connection = t.connection_pool.connections[0]
+        self.assertNotIn("attributes", connection.kwargs)
+        self.assertEqual("z", t.connection_pool.selector.zone)
+        self.assertEqual([connection] * 3, [t.get_connection() for _ in range(3)])
+
     def test_sniff_on_fail_triggers_sniffing_on_fail(self):
         t = Transport(
             [{"exception": ConnectionError("abandon ship")}, {"data": CLUSTER_NODES}],
@@ -410,6 +1096,93 @@ class TestTransport(TestCase):
         self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
         self.assertTrue(time.time() - 1 < t.last_sniff < time.time() + 0.01)
 
+    def test_background_sniffing_after_n_seconds(self):
+        t = Transport(
+            [{"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            sniffer_timeout=5,
+            background_sniffing=True,
+        )
+        seed = t.get_connection()
+        t.last_sniff = time.time() - 5.1
+
+        # the request doesn't wait for the sniff
+        t.perform_request("GET", "/")
+        self.assertEqual(1, len(seed.calls))
+
+        for _ in range(100):
+            if t.get_connection() is not seed:
+                break
+            time.sleep(0.01)
+        self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
+        self.assertEqual("elasticsearch-sniffer", t._sniffer_thread.name)
+        t.close()
+
+    def test_background_sniffing_on_fail(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}, {"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            sniff_on_connection_fail=True,
+            background_sniffing=True,
+            max_retries=1,
+            randomize_hosts=False,
+        )
+        conn_err, conn_data = t.connection_pool.connections
+
+        # retried on the other node of the current pool
+        self.assertEqual(json.loads(CLUSTER_NODES), t.perform_request("GET", "/"))
+        self.assertEqual(1, len(conn_err.calls))
+
+        for _ in range(100):
+            if t.get_connection().host == "http://1.1.1.1:123":
+                break
+            time.sleep(0.01)
+        self.assertEqual(1, len(t.connection_pool.connections))
+        self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
+        t.close()
+
+    def test_close_stops_the_sniffer_thread(self):
+        t = Transport(
+            [{"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            sniffer_timeout=0.01,
+            background_sniffing=True,
+        )
+        seed = t.get_connection()
+        t._start_sniffer()
+        for _ in range(100):
+            if seed.calls:
+                break
+            time.sleep(0.01)
+
+        # the sniffer is waiting between two sniffs
+        start = time.time()
+        t.close()
+        t._sniffer_thread.join(1)
+        self.assertLess(time.time() - start, 0.5)
+        self.assertFalse(t._sniffer_thread.is_alive())
+        self.assertEqual(1, len(seed.calls))
+
+    def test_background_sniffing_queries_nodes_in_parallel(self):
+        t = Transport(
+            [{"data": CLUSTER_NODES, "delay": 1}, {"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            background_sniffing=True,
+        )
+
+        start = time.time()
+        t.sniff_hosts()
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual("http://1.1.1.1:123", t.get_connection().host)
+
+    def test_background_sniffing_failure_is_raised_when_no_node_answers(self):
+        t = Transport(
+            [{"exception": ConnectionError("abandon ship")}] * 2,
+            connection_class=DummyConnection,
+            background_sniffing=True,
+        )
+        self.assertRaises(TransportError, t.sniff_hosts)
+
     def test_sniff_7x_publish_host(self):
         # Test the response shaped when a 7.x node has publish_host set
         # and the returend data is shaped in the fqdn/ip:port format.
@@ -425,6 +1198,20 @@ class TestTransport(TestCase):
             {"host": "somehost.tld", "port": 123},
         )
 
+    def test_sniff_keeps_node_attributes(self):
+        nodes = json.loads(CLUSTER_NODES)
+        nodes["nodes"]["SRZpKFZdQguhhvifmN6UVA"]["attributes"] = {"zone": "a"}
+        t = Transport(
+            [{"data": json.dumps(nodes)}],
+            connection_class=DummyConnection,
+        )
+        t.sniff_hosts()
+
+        self.assertEqual(
+            t.connection_pool.connection_opts[0][1],
+            {"host": "1.1.1.1", "port": 123, "attributes": {"zone": "a"}},
+        )
+
     @patch("elasticsearch.transport.Transport.sniff_hosts")
     def test_sniffing_disabled_on_cloud_instances(self, sniff_hosts):
         t = Transport(
@@ -436,3 +1223,239 @@ class TestTransport(TestCase):
 
         self.assertFalse(t.sniff_on_connection_fail)
         self.assertIs(sniff_hosts.call_args, None)  # Assert not called.
+
+    @patch("elasticsearch.resolver.socket.getaddrinfo")
+    def test_resolve_dns_opens_one_connection_per_address(self, getaddrinfo):
+        getaddrinfo.return_value = _addrinfo("10.0.0.1", "10.0.0.2")
+        t = Transport(
+            [{"host": "es.local", "use_ssl": True}, {"host": "10.0.0.9"}],
+            connection_class=DummyConnection,
+            resolve_dns=True,
+            randomize_hosts=False,
+        )
+
+        self.assertEqual(
+            ["https://10.0.0.1:9200", "https://10.0.0.2:9200", "http://10.0.0.9:9200"],
+            [c.host for c in t.connection_pool.connections],
+        )
+        self.assertEqual(
+            ["es.local", "es.local", None],
+            [c.server_hostname for c in t.connection_pool.connections],
+        )
+        getaddrinfo.assert_called_once_with(
+            "es.local", None, socket.AF_UNSPEC, socket.SOCK_STREAM
+        )
+
+    @patch("elasticsearch.resolver.socket.getaddrinfo")
+    def test_resolve_dns_sends_the_hostname_in_the_host_header(self, getaddrinfo):
+        getaddrinfo.return_value = _addrinfo("10.0.0.1")
+        t = Transport(
+            [{"host": "es.local", "port": 9201}],
+            resolve_dns=True,
+            headers={"x-custom": "value"},
+            meta_header=False,
+        )
+        connection = t.get_connection()
+        self.assertEqual("http://10.0.0.1:9201", connection.host)
+
+        with patch.object(connection.pool, "urlopen") as urlopen:
+            urlopen.return_value.status = 200
+            urlopen.return_value.headers = HTTPHeaderDict()
+            urlopen.return_value.data = b"{}"
+            t.perform_request("GET", "/")
+        headers = urlopen.call_args[1]["headers"]
+        self.assertEqual("es.local:9201", headers["host"])
+        self.assertEqual("value", headers["x-custom"])
+
+    @patch("elasticsearch.resolver.socket.getaddrinfo")
+    def test_resolve_dns_updates_pool_in_place(self, getaddrinfo):
+        getaddrinfo.return_value = _addrinfo("10.0.0.1", "10.0.0.2")
+        t = Transport(
+            [{"host": "es.local"}],
+            connection_class=DummyConnection,
+            resolve_dns=DNSResolver(ttl=0),
+            randomize_hosts=False,
+        )
+        pool = t.connection_pool
+        a, b = pool.connections
+        pool.mark_dead(b)
+
+        getaddrinfo.return_value = _addrinfo("10.0.0.2", "10.0.0.3")
+        t.get_connection()
+        for _ in range(100):
+            if a not in pool.connections:
+                break
+            time.sleep(0.01)
+
+        self.assertIs(pool, t.connection_pool)
+        self.assertEqual(1, pool.dead_count[b])
+        self.assertEqual(["http://10.0.0.3:9200"], [c.host for c in pool.connections])
+        self.assertNotIn(a, pool.connections)
+        self.assertEqual(2, getaddrinfo.call_count)
+
+    @patch("elasticsearch.resolver.socket.getaddrinfo")
+    def test_resolve_dns_refreshes_in_the_background(self, getaddrinfo):
+        getaddrinfo.return_value = _addrinfo("10.0.0.1")
+        resolver = DNSResolver(ttl=3600)
+        t = Transport(
+            [{"host": "es.local"}],
+            connection_class=DummyConnection,
+            resolve_dns=resolver,
+        )
+        old = t.connection_pool.connections[0]
+
+        lookup = threading.Event()
+        release = threading.Event()
+
+        def slow_lookup(*args):
+            lookup.set()
+            release.wait(5)
+            return _addrinfo("10.0.0.2")
+
+        getaddrinfo.side_effect = slow_lookup
+        resolver._next_refresh = 0
+        self.assertIs(old, t.get_connection())
+        self.assertTrue(lookup.wait(5))
+        # the lookup is still running, the requests use the old address
+        self.assertIs(old, t.get_connection())
+
+        release.set()
+        for _ in range(100):
+            if old not in t.connection_pool.connections:
+                break
+            time.sleep(0.01)
+        self.assertEqual(
+            ["http://10.0.0.2:9200"], [c.host for c in t.connection_pool.connections]
+        )
+
+    @patch("elasticsearch.resolver.socket.getaddrinfo")
+    def test_resolve_dns_keeps_addresses_when_lookup_fails(self, getaddrinfo):
+        getaddrinfo.return_value = _addrinfo("10.0.0.1", "10.0.0.2")
+        t = Transport(
+            [{"host": "es.local"}],
+            connection_class=DummyConnection,
+            resolve_dns=True,
+        )
+        connections = set(t.connection_pool.connections)
+
+        getaddrinfo.side_effect = socket.gaierror("temporary failure")
+        t.resolve_hosts()
+
+        self.assertEqual(connections, set(t.connection_pool.connections))
+
+    @patch("elasticsearch.resolver.socket.getaddrinfo")
+    def test_resolve_dns_expands_sniffed_hostnames(self, getaddrinfo):
+        getaddrinfo.return_value = _addrinfo("10.0.0.1", "10.0.0.2")
+        t = Transport(
+            [{"data": CLUSTER_NODES_7x_PUBLISH_HOST}],
+            connection_class=DummyConnection,
+            resolve_dns=True,
+            randomize_hosts=False,
+        )
+        t.sniff_hosts()
+
+        self.assertEqual(
+            ["http://10.0.0.1:123", "http://10.0.0.2:123"],
+            [c.host for c in t.connection_pool.connections],
+        )
+        getaddrinfo.assert_called_once_with(
+            "somehost.tld", None, socket.AF_UNSPEC, socket.SOCK_STREAM
+        )
+
+    def test_shared_ssl_context_is_passed_to_every_connection(self):
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter("always")
+            t = Transport(
+                [{"host": "10.0.0.1"}, {"host": "10.0.0.2"}],
+                connection_class=Urllib3HttpConnection,
+                use_ssl=True,
+                verify_certs=False,
+                shared_ssl_context=True,
+            )
+
+        ctx = t.kwargs["ssl_context"]
+        self.assertNotIn("verify_certs", t.kwargs)
+        self.assertEqual(ssl.CERT_NONE, ctx.verify_mode)
+        self.assertEqual(
+            [ctx, ctx],
+            [c.pool.conn_kw["ssl_context"] for c in t.connection_pool.connections],
+        )
+        # warned once, not once per connection
+        self.assertEqual(
+            ["Connecting using SSL with verify_certs=False is insecure."],
+            [str(x.message) for x in w],
+        )
+
+    def test_shared_ssl_context_is_rejected_with_requests(self):
+        self.assertRaises(
+            ImproperlyConfigured,
+            Transport,
+            [{"host": "10.0.0.1"}],
+            connection_class=RequestsHttpConnection,
+            use_ssl=True,
+            ca_certs=__file__,
+            client_cert=__file__,
+            shared_ssl_context=True,
+        )
+
+        # the SSL options are passed as they are without the shared context
+        t = Transport(
+            [{"host": "10.0.0.1"}],
+            connection_class=RequestsHttpConnection,
+            use_ssl=True,
+            ca_certs=__file__,
+            client_cert=__file__,
+        )
+        session = t.connection_pool.connections[0].session
+        self.assertEqual(__file__, session.verify)
+        self.assertEqual(__file__, session.cert)
+
+    def test_shared_ssl_context_keeps_the_given_context(self):
+        ctx = ssl.create_default_context()
+        t = Transport(
+            [{}],
+            connection_class=DummyConnection,
+            ssl_context=ctx,
+            shared_ssl_context=True,
+        )
+        self.assertIs(ctx, t.kwargs["ssl_context"])
+
+    def test_warm_up_opens_connections_to_every_node(self):
+        t = Transport(
+            [
+                {},
+                {"host": "es2"},
+                {"host": "es3", "exception": ConnectionError("N/A", "refused", None)},
+            ],
+            connection_class=DummyConnection,
+        )
+        self.assertEqual(4, t.warm_up(2))
+        self.assertEqual(
+            [[2], [2], [2]], [c.warm_ups for c in t.connection_pool.connections]
+        )
+
+    def test_warm_up_on_sniff(self):
+        t = Transport(
+            [{"data": CLUSTER_NODES}],
+            connection_class=DummyConnection,
+            warm_up_on_sniff=3,
+        )
+        release = threading.Event()
+        warm_up = DummyConnection.warm_up
+
+        def slow_warm_up(connection, count):
+            release.wait(5)
+            return warm_up(connection, count)
+
+        with patch.object(DummyConnection, "warm_up", slow_warm_up):
+            # doesn't wait for the warm-up
+            t.sniff_hosts()
+            self.assertEqual([], t.get_connection().warm_ups)
+            release.set()
+            for _ in range(100):
+                if t.get_connection().warm_ups:
+                    break
+                time.sleep(0.01)
+
+        self.assertEqual(1, len(t.connection_pool.connections))
+        self.assertEqual([3], t.get_connection().warm_ups)
@@ -15,9 +15,15 @@
 #  specific language governing permissions and limitations
 #  under the License.
 
+import socket
+
 import pytest
 
-from elasticsearch.utils import _client_meta_version
+from elasticsearch.utils import (
+    _client_meta_version,
+    _connection_expired,
+    _socket_options,
+)
 
 
 @pytest.mark.parametrize(
@@ -26,3 +32,44 @@ from elasticsearch.utils import _client_meta_version
 )
 def test_client_meta_version(version, meta_version):
     assert _client_meta_version(version) == meta_version
+
+
+def test_socket_options():
+    nodelay = (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    keepalive = (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    assert _socket_options() == [nodelay]
+    assert _socket_options(tcp_nodelay=False) == []
+    assert _socket_options(tcp_keepalive=True) == [nodelay, keepalive]
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "TCP_KEEPIDLE"), reason="TCP_KEEPIDLE is not available"
+)
+def test_socket_options_keepalive_settings():
+    options = _socket_options(tcp_nodelay=False, tcp_keepalive=(30, 10, 3))
+    assert options == [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3),
+    ]
+    options = _socket_options(tcp_nodelay=False, tcp_keepalive=60)
+    assert options == [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 60),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 60),
+    ]
+
+
+def test_connection_expired():
+    assert not _connection_expired(100, 0, 90)
+    assert not _connection_expired(100, 0, 90, idle_timeout=10)
+    assert _connection_expired(100, 0, 89, idle_timeout=10)
+    # the idle timeout doesn't apply to connections in use
+    assert not _connection_expired(100, 0, None, idle_timeout=10)
+
+    assert not _connection_expired(100, 0, 99, max_age=100)
+    assert _connection_expired(100, 0, 99, max_age=99)
+    # up to 10% shorter
+    assert _connection_expired(100, 0, 99, max_age=110, jitter=1.0)
+    assert not _connection_expired(100, 0, 99, max_age=110, jitter=0.5)
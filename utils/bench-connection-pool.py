@@ -0,0 +1,98 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Micro-benchmark of the per-request overhead of the ConnectionPool.
+
+Every simulated request does what the Transport does around an actual HTTP
+request: get a connection from the pool, report the request start/end and
+mark the connection as live. Optionally a fraction of the requests marks
+its connection as dead, to exercise the state changes under contention.
+
+Usage:
+
+    $ python utils/bench-connection-pool.py
+    $ python utils/bench-connection-pool.py --threads 8 64 --nodes 3 500 --dead 0.001
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from elasticsearch.connection_pool import ConnectionPool  # noqa: E402
+
+
+def run(threads, nodes, requests, dead_ratio):
+    pool = ConnectionPool(
+        [(object(), {}) for _ in range(nodes)],
+        # resurrect dead connections on the next request
+        dead_timeout=0,
+    )
+    per_thread = requests // threads
+    barrier = threading.Event()
+
+    def worker():
+        rand = random.random
+        barrier.wait()
+        for _ in range(per_thread):
+            connection = pool.get_connection()
+            pool.mark_request_start(connection)
+            pool.mark_request_end(connection, 0.001)
+            if dead_ratio and rand() < dead_ratio:
+                pool.mark_dead(connection)
+            else:
+                pool.mark_live(connection)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for w in workers:
+        w.start()
+    start = time.time()
+    barrier.set()
+    for w in workers:
+        w.join()
+    duration = time.time() - start
+    return duration / (per_thread * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--threads", type=int, nargs="+", default=[8, 64, 256])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[3, 50, 500])
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument(
+        "--dead",
+        type=float,
+        default=0.0,
+        help="fraction of requests marking their connection as dead",
+    )
+    args = parser.parse_args()
+
+    print("%8s %8s %14s" % ("threads", "nodes", "usec/request"))
+    for threads in args.threads:
+        for nodes in args.nodes:
+            per_request = run(threads, nodes, args.requests, args.dead)
+            print("%8d %8d %14.2f" % (threads, nodes, per_request * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+#  Licensed to Elasticsearch B.V. under one or more contributor
+#  license agreements. See the NOTICE file distributed with
+#  this work for additional information regarding copyright
+#  ownership. Elasticsearch B.V. licenses this file to you under
+#  the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+# 	http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing,
+#  software distributed under the License is distributed on an
+#  "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+#  KIND, either express or implied.  See the License for the
+#  specific language governing permissions and limitations
+#  under the License.
+
+"""Benchmark of the connection classes against a local stand-in server.
+
+The stand-in server answers every request with the same small JSON document
+after an optional delay (``--latency``), over HTTP/1.1 or HTTP/2 (with prior
+knowledge, or negotiated with ALPN when ``--tls`` is set). It runs in a
+separate process so that only the client side is measured.
+
+For every class and concurrency it reports the requests per second and the
+CPU time the client process spent per request (all threads included), the
+latter being what the connection class costs regardless of the server.
+
+With a latency and more concurrent requests than ``--maxsize``, the HTTP/1.1
+connection classes are limited by the number of sockets while HTTP/2
+multiplexes the requests over a few connections.
+
+Usage:
+
+    $ python utils/bench-connections.py
+    $ python utils/bench-connections.py --latency 5 --concurrency 16 128 --tls
+    $ python utils/bench-connections.py --classes urllib3 httpx aiohttp httpx-async
+    $ python utils/bench-connections.py --classes aiohttp stdlib-async \
+        --concurrency 1000 --maxsize 100 --uvloop
+
+Requires ``h2`` (``httpx[http2]``) for the server and the HTTP/2 clients.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from elasticsearch import (  # noqa: E402
+    AIOHttpConnection,
+    AsyncHttpxHttpConnection,
+    AsyncStdlibHttpConnection,
+    HttpxHttpConnection,
+    RequestsHttpConnection,
+    StdlibHttpConnection,
+    Urllib3HttpConnection,
+)
+
+RESPONSE = b'{"took":1,"timed_out":false,"hits":{"total":{"value":0},"hits":[]}}'
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+# name -> (connection class, extra parameters, async)
+CLASSES = {
+    "urllib3": (Urllib3HttpConnection, {}, False),
+    "requests": (RequestsHttpConnection, {}, False),
+    "stdlib": (StdlibHttpConnection, {}, False),
+    "httpx": (HttpxHttpConnection, {"http2": False}, False),
+    "httpx-h2": (HttpxHttpConnection, {"http2": True}, False),
+    "aiohttp": (AIOHttpConnection, {}, True),
+    "httpx-async": (AsyncHttpxHttpConnection, {"http2": False}, True),
+    "httpx-h2-async": (AsyncHttpxHttpConnection, {"http2": True}, True),
+    "stdlib-async": (AsyncStdlibHttpConnection, {}, True),
+}
+
+
+async def serve_http1(reader, writer, first_line, latency):
+    line = first_line
+    while line:
+        content_length = 0
+        while True:
+            header = await reader.readline()
+            if header in (b"\r\n", b""):
+                break
+            name, _, value = header.partition(b":")
+            if name.strip().lower() == b"content-length":
+                content_length = int(value)
+        if content_length:
+            await reader.readexactly(content_length)
+        if latency:
+            await asyncio.sleep(latency)
+        writer.write(
+            b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+            b"content-length: %d\r\n\r\n%s" % (len(RESPONSE), RESPONSE)
+        )
+        line = await reader.readline()
+
+
+async def serve_http2(reader, writer, latency):
+    import h2.config
+    import h2.connection
+    import h2.events
+
+    conn = h2.connection.H2Connection(
+        config=h2.config.H2Configuration(client_side=False)
+    )
+    conn.initiate_connection()
+    conn.update_settings({h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 1000})
+    writer.write(conn.data_to_send())
+
+    async def respond(stream_id):
+        if latency:
+            await asyncio.sleep(latency)
+        conn.send_headers(
+            stream_id,
+            [
+                (":status", "200"),
+                ("content-type", "application/json"),
+                ("content-length", str(len(RESPONSE))),
+            ],
+        )
+        conn.send_data(stream_id, RESPONSE, end_stream=True)
+        writer.write(conn.data_to_send())
+
+    data = H2_PREFACE
+    while data:
+        for event in conn.receive_data(data):
+            if isinstance(event, h2.events.DataReceived):
+                conn.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id
+                )
+            elif isinstance(event, h2.events.StreamEnded):
+                asyncio.ensure_future(respond(event.stream_id))
+        writer.write(conn.data_to_send())
+        data = await reader.read(65536)
+
+
+def serve(latency, tls_dir):
+    import h2.settings  # noqa: F401
+
+    ssl_context = None
+    if tls_dir:
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(
+            os.path.join(tls_dir, "cert.pem"), os.path.join(tls_dir, "key.pem")
+        )
+        ssl_context.set_alpn_protocols(["h2", "http/1.1"])
+
+    async def handle(reader, writer):
+        try:
+            first_line = await reader.readline()
+            if first_line == H2_PREFACE[:16]:
+                await reader.readexactly(len(H2_PREFACE) - 16)
+                await serve_http2(reader, writer, latency)
+            else:
+                await serve_http1(reader, writer, first_line, latency)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        asyncio.start_server(handle, "127.0.0.1", 0, ssl=ssl_context, backlog=1024)
+    )
+    print(server.sockets[0].getsockname()[1])
+    sys.stdout.flush()
+    loop.run_forever()
+
+
+def start_server(latency, tls_dir):
+    command = [sys.executable, __file__, "--serve", "--latency", str(latency)]
+    if tls_dir:
+        command += ["--tls-dir", tls_dir]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    port = int(process.stdout.readline())
+    return process, port
+
+
+def create_tls_dir():
+    tls_dir = tempfile.mkdtemp()
+    subprocess.check_call(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-subj",
+            "/CN=localhost",
+            "-days",
+            "1",
+            "-keyout",
+            os.path.join(tls_dir, "key.pem"),
+            "-out",
+            os.path.join(tls_dir, "cert.pem"),
+        ],
+        stderr=subprocess.DEVNULL,
+    )
+    return tls_dir
+
+
+def run_sync(connection, concurrency, requests):
+    per_worker = requests // concurrency
+    barrier = threading.Event()
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_worker):
+            connection.perform_request("GET", "/")
+
+    workers = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for w in workers:
+        w.start()
+    start = time.time()
+    barrier.set()
+    for w in workers:
+        w.join()
+    return time.time() - start, per_worker * concurrency
+
+
+def run_async(connection, concurrency, requests, uvloop=False):
+    per_worker = requests // concurrency
+
+    async def worker():
+        for _ in range(per_worker):
+            await connection.perform_request("GET", "/")
+
+    async def main():
+        # the first request opens the connection(s)
+        await connection.perform_request("GET", "/")
+        start = time.time()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        duration = time.time() - start
+        await connection.close()
+        return duration
+
+    if uvloop:
+        import uvloop
+
+        loop = uvloop.new_event_loop()
+    else:
+        loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main()), per_worker * concurrency
+    finally:
+        loop.close()
+
+
+def run(name, port, tls, maxsize, concurrency, requests, uvloop=False):
+    """Returns the duration, the CPU time and the number of requests sent."""
+    cpu_start = time.process_time()
+    duration, requests = _run(name, port, tls, maxsize, concurrency, requests, uvloop)
+    return duration, time.process_time() - cpu_start, requests
+
+
+def _run(name, port, tls, maxsize, concurrency, requests, uvloop):
+    connection_class, params, is_async = CLASSES[name]
+    params = dict(params, host="127.0.0.1", port=port, maxsize=maxsize, timeout=60)
+    if tls:
+        params.update(use_ssl=True, verify_certs=False, ssl_show_warn=False)
+    elif params.get("http2"):
+        # no TLS to negotiate HTTP/2 with, use prior knowledge
+        params["http1"] = False
+    connection = connection_class(**params)
+    if is_async:
+        return run_async(connection, concurrency, requests, uvloop)
+    try:
+        return run_sync(connection, concurrency, requests)
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--classes", nargs="+", choices=sorted(CLASSES), default=sorted(CLASSES)
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 128])
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--maxsize", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="server latency in milliseconds"
+    )
+    parser.add_argument("--tls", action="store_true", help="use TLS (and ALPN)")
+    parser.add_argument(
+        "--uvloop", action="store_true", help="run the async clients on uvloop"
+    )
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--tls-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.latency / 1000.0, args.tls_dir)
+        return
+
+    tls_dir = create_tls_dir() if args.tls else None
+    process, port = start_server(args.latency, tls_dir)
+    try:
+        print(
+            "%16s %12s %12s %14s %18s"
+            % ("class", "concurrency", "requests/s", "usec/request", "cpu usec/request")
+        )
+        for name in args.classes:
+            for concurrency in args.concurrency:
+                duration, cpu, requests = run(
+                    name,
+                    port,
+                    args.tls,
+                    args.maxsize,
+                    concurrency,
+                    args.requests,
+                    args.uvloop,
+                )
+                print(
+                    "%16s %12d %12.0f %14.2f %18.2f"
+                    % (
+                        name,
+                        concurrency,
+                        requests / duration,
+                        duration / requests * 1e6,
+                        cpu / requests * 1e6,
+                    )
+                )
+    finally:
+        process.terminate()
+        process.wait()
+        if tls_dir:
+            shutil.rmtree(tls_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -52,6 +52,9 @@ GLOBAL_QUERY_PARAMS = {
     "format": "Optional[str]",
     "filter_path": "Optional[Union[str, Collection[str]]]",
     "request_timeout": "Optional[Union[int, float]]",
+    "total_timeout": "Optional[Union[int, float]]",
+    "request_priority": "Optional[str]",
+    "request_stream": "Optional[bool]",
     "ignore": "Optional[Union[int, Collection[int]]]",
     "opaque_id": "Optional[str]",
     "http_auth": "Optional[Union[str, Tuple[str, str]]]",